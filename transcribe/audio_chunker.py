@@ -7,19 +7,345 @@ for conversation-aware splitting, then transcribes using OpenAI's Whisper API.
 """
 
 import argparse
+import bisect
+import functools
+import hashlib
 import io
+import json
+import multiprocessing
 import os
+import random
+import re
 import shutil
+import signal
+import sqlite3
+import subprocess
 import sys
 import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager, redirect_stdout
+from datetime import datetime
+from email.utils import parsedate_to_datetime
 from pathlib import Path
+from types import SimpleNamespace
+from typing import TextIO
 
-from openai import OpenAI
+import numpy as np
+import tiktoken
+from openai import APIConnectionError, APIStatusError, OpenAI
 from pydub import AudioSegment
-from pydub.silence import split_on_silence
+
+from vault_config import get_transcription_dirs, load_config, resolve_vault_path
 
 MAX_CHUNK_BYTES = 25 * 1024 * 1024  # 25MB
 MAX_DIARIZE_DURATION_MS = 1300 * 1000  # 1300 seconds (API limit is 1400s for diarization)
+DIARIZE_BRIDGE_MS = 45 * 1000  # Audio from each side of a chunk boundary diarized to match speakers
+MIN_SPEAKER_OVERLAP_MS = 500  # Shortest shared speech that links two speaker labels
+STREAM_THRESHOLD_MS = 30 * 60 * 1000  # Stream-decode inputs longer than 30 minutes
+STREAM_BLOCK_MS = 10 * 1000  # PCM read from ffmpeg 10 seconds at a time
+ANALYSIS_WINDOW_MS = 5 * 60 * 1000  # Long recordings are decoded and scanned for silence in 5-minute windows in parallel
+ANALYSIS_PREROLL_MS = 1000  # Decoded and discarded before each window, so the decoder has settled by its start
+ANALYSIS_PARALLEL_MIN_MS = 20 * 60 * 1000  # Shorter recordings are scanned in one pass faster than worker processes start
+TRANSCRIBE_CONCURRENCY = 4  # Chunks uploaded in parallel
+MAX_RETRIES = 5  # Retries per API call on 429/5xx/connection errors
+RETRY_BASE_DELAY = 1.0  # Seconds; doubled on every attempt
+RETRY_MAX_DELAY = 60.0
+GPT_CONCURRENCY = 4  # Text parts sent to GPT-4o in parallel
+GPT_BATCH_TOKENS = 4000  # Input tokens packed into one GPT-4o formatting/translation request
+GPT_OUTPUT_TOKENS = 16384  # Output tokens one GPT-4o request may generate (GPT-4o's own limit)
+GPT_ENCODING = "o200k_base"  # GPT-4o's tokenizer
+CACHE_VERSION = "1"  # Bump to invalidate every cached API result
+CACHE_MAX_BYTES = 512 * 1024 * 1024  # 512MB of cached results before LRU eviction
+SILENCE_MAP_MAX_BYTES = 256 * 1024 * 1024  # 256MB of silence maps (~36h of audio) before LRU eviction
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "mindwork-transcribe"
+CHUNK_PLAN_SUFFIX = "_chunks.json"  # Written next to exported chunks with their source offsets
+SERVE_ADDRESS = "127.0.0.1:8750"  # Default --listen address for --serve
+TRANSCRIBE_MODELS = ["whisper-1", "gpt-4o-transcribe"]
+WATCH_SETTLE_SECONDS = 5.0  # A synced file must stop changing this long before it's transcribed
+AUDIO_EXTENSIONS = {".mp3", ".mp4", ".m4a", ".wav", ".webm", ".ogg", ".flac"}
+MIN_SILENCE_LEN = 500  # ms; typical sentence pause
+SILENCE_THRESH = -40  # dBFS; speech threshold
+TRIM_MIN_PAUSE_MS = 2000  # --trim-silence default: pauses longer than this are compacted
+TRIM_GAP_MS = 1000  # What a compacted pause is cut down to
+BITEXACT_ARGS = ["-fflags", "+bitexact", "-flags:a", "+bitexact"]  # Same input, same output bytes (no random ogg serials or encoder tags)
+
+REFUSAL_PHRASES = ["I can't assist", "I cannot assist", "I'm not able", "I am not able", "I'm sorry, but I can't", "I cannot help"]
+
+TRANSLATE_PROMPT = """You are a professional medical translator. Translate the following Turkish therapy session transcript to English.
+
+CONTEXT: This is the patient's own recording of their therapy session, being translated for their personal medical records. The patient has full consent and ownership of this content.
+
+INSTRUCTIONS:
+1. Translate ALL content faithfully and completely - do not skip, summarize, or censor anything
+2. Preserve all formatting including speaker labels like **Me:** and **Therapist:**
+3. Keep the same structure and paragraph breaks
+4. This is legitimate medical documentation - translate everything as-is
+5. Output only the complete translation, nothing else"""
+
+FORMAT_PROMPT = """You are a professional medical transcriptionist formatting a therapy session transcript.
+
+CONTEXT: This is the patient's own recording of their therapy session, being formatted for their personal medical records. The patient has full consent and ownership of this content.
+
+SPEAKER IDENTIFICATION RULES:
+- **Me:** = the PATIENT sharing personal experiences, struggles, relationships, feelings, life events
+- **Therapist:** = the PROFESSIONAL who listens, asks questions, reflects, provides guidance
+
+The therapist would NEVER share personal stories, relationships, or say things like "I broke up with someone."
+The therapist WOULD ask questions, validate feelings, provide observations, schedule appointments.
+
+YOUR TASK:
+1. PRESERVE ALL CONTENT completely - do not summarize, skip, or censor anything
+2. Identify speakers based on CONTENT (who shares personal stories vs who asks questions)
+3. Fix grammar, spelling, and transcription errors
+4. Combine fragmented sentences
+5. Format as:
+   **Me:** [patient's words]
+   **Therapist:** [therapist's words]
+6. This is legitimate medical documentation - process everything faithfully
+7. Output ONLY the complete formatted conversation"""
+
+FORMAT_TRANSLATE_PROMPT = """You are a professional medical transcriptionist and translator preparing a Turkish therapy session transcript.
+
+CONTEXT: This is the patient's own recording of their therapy session, being formatted and translated for their personal medical records. The patient has full consent and ownership of this content.
+
+SPEAKER IDENTIFICATION RULES:
+- Me = the PATIENT sharing personal experiences, struggles, relationships, feelings, life events
+- Therapist = the PROFESSIONAL who listens, asks questions, reflects, provides guidance
+
+The therapist would NEVER share personal stories, relationships, or say things like "I broke up with someone."
+The therapist WOULD ask questions, validate feelings, provide observations, schedule appointments.
+
+YOUR TASK:
+1. PRESERVE ALL CONTENT completely - do not summarize, skip, or censor anything
+2. Identify speakers based on CONTENT (who shares personal stories vs who asks questions)
+3. Fix grammar, spelling, and transcription errors and combine fragmented sentences
+4. Split the conversation into speaker turns, in order
+5. For every turn give the corrected text in the original language ("original") and its faithful, complete English translation ("english")
+6. This is legitimate medical documentation - process everything faithfully"""
+
+# Structured output for FORMAT_TRANSLATE_PROMPT: speaker turns in both languages
+FORMAT_TRANSLATE_SCHEMA = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "conversation",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "turns": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "speaker": {"type": "string", "enum": ["Me", "Therapist"]},
+                            "original": {"type": "string"},
+                            "english": {"type": "string"},
+                        },
+                        "required": ["speaker", "original", "english"],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["turns"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+# Speech-optimized encodings applied before chunking with --upload-profile
+UPLOAD_PROFILES = {
+    "speech-opus-16k": {
+        "format": "ogg",
+        "frame_rate": 16000,
+        "channels": 1,
+        "encoder_args": ["-c:a", "libopus", "-b:a", "24k", "-application", "voip"],
+    },
+    "flac-16k-mono": {
+        "format": "flac",
+        "frame_rate": 16000,
+        "channels": 1,
+        "encoder_args": ["-c:a", "flac", "-sample_fmt", "s16"],
+    },
+    "mp3-16k-mono": {
+        "format": "mp3",
+        "frame_rate": 16000,
+        "channels": 1,
+        "encoder_args": ["-c:a", "libmp3lame", "-b:a", "32k"],
+    },
+}
+
+
+class RunMetrics:
+    """
+    Spans timing the stages of one run, for the --metrics report.
+
+    A span covers one stage of the work (decode, export, transcription, ...)
+    and records its wall time, the CPU time of its thread and of any ffmpeg
+    processes that finished meanwhile, and counters (bytes, retries, tokens)
+    that code running inside it adds with add(). Spans nest per thread.
+    Nothing is recorded until enable() is called.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self, **attributes) -> None:
+        """Start recording; attributes describe the run (input, model, ...)."""
+        self.enabled = True
+        self.attributes = attributes
+        self._started = time.time()
+        self._wall = time.perf_counter()
+        self._cpu = os.times()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Record the enclosed block as a span called name; attributes describe it (file, model, ...)."""
+        if not self.enabled:
+            yield
+            return
+        stack = self._local.__dict__.setdefault("stack", [])
+        span = {
+            "id": uuid.uuid4().hex[:16],
+            "parent_id": stack[-1]["id"] if stack else None,
+            "name": name,
+            "thread": threading.current_thread().name,
+            "start": time.time(),
+            "attributes": attributes,
+            "counters": {},
+        }
+        wall, cpu, children = time.perf_counter(), time.thread_time(), os.times()
+        stack.append(span)
+        try:
+            yield
+        except BaseException as e:
+            span["error"] = f"{e.__class__.__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            end = os.times()
+            span["wall_s"] = round(time.perf_counter() - wall, 4)
+            span["cpu_s"] = round(time.thread_time() - cpu, 4)
+            span["child_cpu_s"] = round(
+                end.children_user + end.children_system - children.children_user - children.children_system, 4,
+            )
+            with self._lock:
+                self.spans.append(span)
+
+    def add(self, **counters: float) -> None:
+        """Add to counters of the innermost span open on this thread."""
+        stack = getattr(self._local, "stack", None)
+        if not self.enabled or not stack:
+            return
+        span_counters = stack[-1]["counters"]
+        for name, value in counters.items():
+            span_counters[name] = span_counters.get(name, 0) + value
+
+    def add_usage(self, response) -> None:
+        """Add the token (or audio duration) usage reported in an API response."""
+        usage = get_field(response, "usage")
+        if usage is None:
+            return
+        for field, counter in (
+            ("prompt_tokens", "input_tokens"),
+            ("completion_tokens", "output_tokens"),
+            ("input_tokens", "input_tokens"),
+            ("output_tokens", "output_tokens"),
+            ("seconds", "audio_seconds"),
+        ):
+            value = get_field(usage, field)
+            if isinstance(value, (int, float)):
+                self.add(**{counter: value})
+
+    def report(self) -> dict:
+        """The run as JSON: totals per span name, then every span in start order."""
+        end = os.times()
+        totals = {}
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start"])
+        for span in spans:
+            total = totals.setdefault(span["name"], {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "child_cpu_s": 0.0})
+            total["count"] += 1
+            for name in ("wall_s", "cpu_s", "child_cpu_s"):
+                total[name] = round(total[name] + span[name], 4)
+            for name, value in span["counters"].items():
+                total[name] = total.get(name, 0) + value
+        return {
+            "attributes": self.attributes,
+            "started": datetime.fromtimestamp(self._started).astimezone().isoformat(timespec="seconds"),
+            "wall_s": round(time.perf_counter() - self._wall, 4),
+            "cpu_s": round(end.user + end.system - self._cpu.user - self._cpu.system, 4),
+            "child_cpu_s": round(
+                end.children_user + end.children_system - self._cpu.children_user - self._cpu.children_system, 4,
+            ),
+            "totals": totals,
+            "spans": spans,
+        }
+
+    def otlp(self) -> dict:
+        """The run as OTLP/JSON trace data (what an OpenTelemetry collector's HTTP receiver accepts)."""
+        report = self.report()
+        trace_id = uuid.uuid4().hex
+        root_id = uuid.uuid4().hex[:16]
+
+        def value(v) -> dict:
+            if isinstance(v, bool):
+                return {"boolValue": v}
+            if isinstance(v, int):
+                return {"intValue": str(v)}
+            if isinstance(v, float):
+                return {"doubleValue": v}
+            return {"stringValue": str(v)}
+
+        def otlp_span(span_id, parent_id, name, start, wall_s, attributes, error=None) -> dict:
+            span = {
+                "traceId": trace_id,
+                "spanId": span_id,
+                "name": name,
+                "kind": 1,
+                "startTimeUnixNano": str(int(start * 1e9)),
+                "endTimeUnixNano": str(int((start + wall_s) * 1e9)),
+                "attributes": [{"key": k, "value": value(v)} for k, v in attributes.items() if v is not None],
+            }
+            if parent_id:
+                span["parentSpanId"] = parent_id
+            if error:
+                span["status"] = {"code": 2, "message": error}
+            return span
+
+        spans = [otlp_span(
+            root_id, None, "run", self._started, report["wall_s"],
+            {**self.attributes, "cpu_s": report["cpu_s"], "child_cpu_s": report["child_cpu_s"]},
+        )]
+        for span in report["spans"]:
+            attributes = {
+                **span["attributes"], **span["counters"],
+                "thread": span["thread"], "cpu_s": span["cpu_s"], "child_cpu_s": span["child_cpu_s"],
+            }
+            spans.append(otlp_span(
+                span["id"], span["parent_id"] or root_id, span["name"], span["start"], span["wall_s"],
+                attributes, span.get("error"),
+            ))
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "mindwork-transcribe"}}]},
+            "scopeSpans": [{"scope": {"name": "audio_chunker"}, "spans": spans}],
+        }]}
+
+    def write(self, path: Path, format: str = "json") -> None:
+        """Save the report (format "json") or OTLP trace data (format "otlp") to path."""
+        data = self.otlp() if format == "otlp" else self.report()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2, ensure_ascii=False))
+
+
+# Recorder for --metrics; disabled (and free) unless main enables it
+metrics = RunMetrics()
 
 
 def load_audio(path: Path) -> AudioSegment:
@@ -27,6 +353,124 @@ def load_audio(path: Path) -> AudioSegment:
     return AudioSegment.from_file(str(path))
 
 
+def probe_audio(path: Path) -> dict:
+    """
+    Read duration, sample rate, channel count and bitrate of the first audio stream, and the file size, with ffprobe.
+
+    bit_rate (bits per second) is the audio stream's own where the container
+    records it and the whole file's otherwise, or None if neither is known.
+    """
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-select_streams", "a:0",
+            "-show_entries", "stream=sample_rate,channels,duration,bit_rate:format=duration,bit_rate,size",
+            "-of", "json",
+            str(path),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    info = json.loads(result.stdout)
+    if not info.get("streams"):
+        raise ValueError(f"No audio stream found in {path}")
+
+    stream = info["streams"][0]
+    container = info.get("format", {})
+    duration = container.get("duration") or stream.get("duration") or 0
+    bit_rate = stream.get("bit_rate") or container.get("bit_rate")
+    return {
+        "duration_ms": int(float(duration) * 1000),
+        "frame_rate": int(stream["sample_rate"]),
+        "channels": int(stream["channels"]),
+        "bit_rate": int(bit_rate) if bit_rate else None,
+        "size_bytes": int(container["size"]) if container.get("size") else path.stat().st_size,
+    }
+
+
+def read_pcm_blocks(
+    path: Path,
+    frame_rate: int,
+    channels: int,
+    block_ms: int = STREAM_BLOCK_MS,
+    duration_ms: int | None = None,
+    start_ms: int = 0,
+) -> Iterator[np.ndarray]:
+    """
+    Decode an audio file through an ffmpeg pipe and yield 16-bit PCM in fixed-size blocks.
+
+    Each block is a flat, channel-interleaved int16 array of block_ms of audio
+    (the last one may be shorter), so memory use doesn't depend on file length.
+    Decoding starts at start_ms and stops after duration_ms if given.
+    """
+    command = ["ffmpeg", "-v", "error", "-nostdin"]
+    if start_ms:
+        command += ["-ss", f"{start_ms / 1000:.3f}"]
+    command += ["-i", str(path)]
+    if duration_ms is not None:
+        command += ["-t", f"{duration_ms / 1000:.3f}"]
+    command += ["-vn", "-f", "s16le", "-ac", str(channels), "-ar", str(frame_rate), "pipe:1"]
+
+    block_bytes = max(frame_rate * block_ms // 1000, 1) * channels * 2
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            # A short read can split a sample; ffmpeg only does so at end of stream
+            usable = len(data) - len(data) % 2
+            yield np.frombuffer(data[:usable], dtype=np.int16)
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read().decode(errors="replace")
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode {path}: {stderr.strip()}")
+
+
+def load_audio_sample(path: Path, info: dict, duration_ms: int, start_ms: int = 0) -> AudioSegment:
+    """Decode only duration_ms of a file from start_ms, e.g. for size calibration."""
+    data = b"".join(
+        block.tobytes()
+        for block in read_pcm_blocks(
+            path, info["frame_rate"], info["channels"], duration_ms=duration_ms, start_ms=start_ms,
+        )
+    )
+    return AudioSegment(data, frame_rate=info["frame_rate"], sample_width=2, channels=info["channels"])
+
+
+def transcode_for_upload(input_path: Path, output_dir: Path, profile_name: str) -> Path:
+    """
+    Downmix, resample and re-encode a recording with an upload profile.
+
+    Speech doesn't need more than 16kHz mono, so this usually shrinks the
+    file enough to fit in one or two API uploads.
+    """
+    profile = UPLOAD_PROFILES[profile_name]
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"{input_path.stem}.{profile['format']}"
+    subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-nostdin", "-y",
+            "-i", str(input_path),
+            "-vn",
+            "-ac", str(profile["channels"]),
+            "-ar", str(profile["frame_rate"]),
+            *profile["encoder_args"],
+            *BITEXACT_ARGS,
+            "-f", profile["format"],
+            str(path),
+        ],
+        capture_output=True,
+        check=True,
+    )
+    return path
+
+
 def get_format_from_path(path: Path) -> str:
     """Get the audio format from file extension."""
     ext = path.suffix.lower().lstrip(".")
@@ -45,19 +489,78 @@ def get_format_from_path(path: Path) -> str:
     return format_map.get(ext, ext)
 
 
-def get_segment_size(segment: AudioSegment, format: str) -> int:
+def get_segment_size(segment: AudioSegment, format: str, encoder_args: list[str] | None = None) -> int:
     """Get the size of an audio segment when exported to the given format."""
     buffer = io.BytesIO()
-    segment.export(buffer, format=format)
-    return buffer.tell()
+    segment.export(buffer, format=format, parameters=encoder_args)
+    # export() rewinds the buffer, so measure its contents rather than the position
+    return len(buffer.getvalue())
 
 
-def calibrate_bytes_per_ms(audio: AudioSegment, format: str) -> float:
-    """Calibrate bytes-per-millisecond by exporting a small sample."""
+def calibrate_bytes_per_ms(audio: AudioSegment, format: str, encoder_args: list[str] | None = None) -> float:
+    """Calibrate bytes-per-millisecond by exporting a small sample from the middle of the audio."""
     sample_duration = min(10000, len(audio))  # 10 seconds max
-    sample = audio[:sample_duration]
-    size = get_segment_size(sample, format)
-    return size / sample_duration
+    # The opening seconds are often silence, which compresses far better than speech
+    start = (len(audio) - sample_duration) // 2
+    sample = audio[start:start + sample_duration]
+    size = get_segment_size(sample, format, encoder_args)
+    return size / max(sample_duration, 1)
+
+
+def get_encoded_bytes_per_ms(
+    format: str,
+    frame_rate: int,
+    channels: int,
+    encoder_args: list[str] | None = None,
+) -> float | None:
+    """
+    Bytes-per-millisecond of re-encoded audio when the output format fixes it, else None.
+
+    That is 16-bit PCM WAV, and MP3 at a set bitrate (LAME encodes those at
+    a constant bitrate); anything else has to be calibrated.
+    """
+    encoder_args = encoder_args or []
+    if format == "wav" and not encoder_args:
+        return frame_rate * channels * 2 / 1000
+    if format == "mp3" and "-b:a" in encoder_args:
+        bitrate = encoder_args[encoder_args.index("-b:a") + 1].lower()
+        bits = float(bitrate.rstrip("k")) * (1000 if bitrate.endswith("k") else 1)
+        return bits / 8 / 1000
+    return None
+
+
+def calibrate_file_bytes_per_ms(
+    path: Path,
+    info: dict,
+    format: str,
+    encoder_args: list[str] | None = None,
+) -> float:
+    """Bytes-per-millisecond of chunks re-encoded from a file, decoding a 10s sample only if the encoder doesn't fix it."""
+    bytes_per_ms = get_encoded_bytes_per_ms(format, info["frame_rate"], info["channels"], encoder_args)
+    if bytes_per_ms is not None:
+        return bytes_per_ms
+    start_ms = max(info["duration_ms"] // 2 - 5000, 0)
+    return calibrate_bytes_per_ms(load_audio_sample(path, info, 10000, start_ms=start_ms), format, encoder_args)
+
+
+def get_stream_bytes_per_ms(info: dict) -> float:
+    """
+    Bytes-per-millisecond of stream-copied chunks, from the audio bitrate probe_audio read.
+
+    Chunks only carry the audio stream, so cover art or video in the source
+    doesn't count against them; without a known bitrate the whole file's
+    average is used.
+    """
+    if info["bit_rate"]:
+        return info["bit_rate"] / 8 / 1000
+    return info["size_bytes"] / max(info["duration_ms"], 1)
+
+
+def fits_upload(path: Path, info: dict, diarize: bool = False) -> bool:
+    """Whether a recording can be sent to the API as it is, in a supported format and within the size (and diarization length) limits."""
+    if path.suffix.lower() not in AUDIO_EXTENSIONS or info["size_bytes"] > MAX_CHUNK_BYTES:
+        return False
+    return not diarize or info["duration_ms"] <= MAX_DIARIZE_DURATION_MS
 
 
 def estimate_size(duration_ms: int, bytes_per_ms: float) -> int:
@@ -65,47 +568,527 @@ def estimate_size(duration_ms: int, bytes_per_ms: float) -> int:
     return int(duration_ms * bytes_per_ms * 1.1)
 
 
-def split_at_silence(audio: AudioSegment) -> list[AudioSegment]:
+def sum_frame_energies(samples: np.ndarray, channels: int, offsets: np.ndarray) -> np.ndarray:
+    """
+    Sum squared samples between consecutive frame offsets.
+
+    samples is a flat, channel-interleaved array starting at frame offsets[0];
+    returns one sum per pair of neighbouring offsets.
+    """
+    # 16-bit squares fit in int64 without overflow; wider samples need floats
+    acc_dtype = np.int64 if samples.dtype.itemsize <= 2 else np.float64
+    frames = samples[offsets[0] * channels:offsets[-1] * channels].astype(acc_dtype)
+    cumulative = np.zeros(len(frames) // channels + 1, dtype=acc_dtype)
+    np.cumsum((frames * frames).reshape(-1, channels).sum(axis=1), out=cumulative[1:])
+    relative = offsets - offsets[0]
+    return cumulative[relative[1:]] - cumulative[relative[:-1]]
+
+
+def get_ms_energies(audio: AudioSegment) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the sum of squared samples and the sample count for every millisecond.
+
+    Millisecond boundaries follow pydub's slicing rules so that windowed RMS
+    values match AudioSegment.rms exactly. Samples are squared in fixed-size
+    blocks to keep the int64 working set small for long recordings.
+    """
+    duration_ms = len(audio)
+    channels = audio.channels
+    dtype = {1: np.int8, 2: np.int16, 4: np.int32}.get(audio.sample_width)
+    if dtype is None:
+        # 24-bit audio has no native numpy dtype; widen it first
+        audio = audio.set_sample_width(4)
+        dtype = np.int32
+    samples = np.frombuffer(audio.raw_data, dtype=dtype)
+    frame_count = len(samples) // channels
+
+    # Frame index where each millisecond starts (same rounding as AudioSegment[i:j])
+    bounds = (np.arange(duration_ms + 1) * (audio.frame_rate / 1000.0)).astype(np.int64)
+    counts = get_ms_counts(audio.frame_rate, channels, duration_ms)
+    clipped = np.minimum(bounds, frame_count)
+
+    energies = np.zeros(duration_ms, dtype=np.int64 if audio.sample_width <= 2 else np.float64)
+    block_ms = 60 * 1000
+    for start_ms in range(0, duration_ms, block_ms):
+        end_ms = min(start_ms + block_ms, duration_ms)
+        energies[start_ms:end_ms] = sum_frame_energies(samples, channels, clipped[start_ms:end_ms + 1])
+
+    return energies, counts
+
+
+def get_silence_amplitude(silence_thresh: float, sample_width: int) -> float:
+    """Convert a dBFS silence threshold into a raw RMS amplitude."""
+    max_amplitude = 2 ** (sample_width * 8) / 2
+    return 10 ** (silence_thresh / 20) * max_amplitude
+
+
+def get_ms_rms(energies: np.ndarray, counts: np.ndarray, sample_width: int) -> np.ndarray:
+    """Per-millisecond RMS as a fraction of full scale, compact enough to keep on disk."""
+    mean_square = np.divide(
+        energies, counts,
+        out=np.zeros(len(energies)), where=counts > 0,
+    )
+    return (np.sqrt(mean_square) / get_silence_amplitude(0, sample_width)).astype(np.float16)
+
+
+def get_ms_counts(frame_rate: int, channels: int, duration_ms: int) -> np.ndarray:
+    """Sample count of every millisecond, using the same rounding as AudioSegment[i:j]."""
+    bounds = (np.arange(duration_ms + 1) * (frame_rate / 1000.0)).astype(np.int64)
+    return np.diff(bounds) * channels
+
+
+def find_silent_windows(
+    energies: np.ndarray,
+    counts: np.ndarray,
+    thresh: float,
+    min_silence_len: int,
+) -> np.ndarray:
+    """Return the start offsets of every min_silence_len window whose RMS is at or below thresh."""
+    cumulative_energy = np.concatenate(([0], np.cumsum(energies)))
+    cumulative_count = np.concatenate(([0], np.cumsum(counts)))
+    window_energy = cumulative_energy[min_silence_len:] - cumulative_energy[:-min_silence_len]
+    window_count = cumulative_count[min_silence_len:] - cumulative_count[:-min_silence_len]
+
+    # audioop.rms truncates to an integer and reports 0 for empty input
+    mean_square = np.divide(
+        window_energy, window_count,
+        out=np.zeros(len(window_energy)), where=window_count > 0,
+    )
+    return np.flatnonzero(np.floor(np.sqrt(mean_square)) <= thresh)
+
+
+def detect_silence_ranges(
+    energies: np.ndarray,
+    counts: np.ndarray,
+    sample_width: int,
+    min_silence_len: int = MIN_SILENCE_LEN,
+    silence_thresh: float = SILENCE_THRESH,
+) -> list[tuple[int, int]]:
+    """
+    Find silent ranges as (start_ms, end_ms) offsets from per-millisecond energies.
+
+    Equivalent to pydub.silence.detect_silence with seek_step=1, but every
+    window RMS is computed at once from a cumulative sum instead of slicing
+    and measuring the audio once per millisecond.
+    """
+    duration_ms = len(energies)
+    if duration_ms < min_silence_len:
+        return []
+
+    thresh = get_silence_amplitude(silence_thresh, sample_width)
+    silent_starts = find_silent_windows(energies, counts, thresh, min_silence_len)
+    if len(silent_starts) == 0:
+        return []
+
+    # Windows closer together than min_silence_len belong to the same silence
+    breaks = np.flatnonzero(np.diff(silent_starts) > min_silence_len)
+    range_starts = np.concatenate(([silent_starts[0]], silent_starts[breaks + 1]))
+    range_ends = np.concatenate((silent_starts[breaks], [silent_starts[-1]])) + min_silence_len
+
+    return [(int(start), int(end)) for start, end in zip(range_starts, range_ends)]
+
+
+def detect_silence_from_rms(
+    rms: np.ndarray,
+    frame_rate: int,
+    channels: int,
+    min_silence_len: int = MIN_SILENCE_LEN,
+    silence_thresh: float = SILENCE_THRESH,
+) -> list[tuple[int, int]]:
+    """
+    Re-run detect_silence_ranges on a stored per-millisecond RMS map.
+
+    The energies are rebuilt from float16 RMS values, so windows sitting
+    right at the threshold may come out differently than from the audio.
+    """
+    counts = get_ms_counts(frame_rate, channels, len(rms))
+    amplitude = rms.astype(np.float64) * get_silence_amplitude(0, 2)
+    return detect_silence_ranges(amplitude * amplitude * counts, counts, 2, min_silence_len, silence_thresh)
+
+
+class StreamingSilenceDetector:
+    """
+    Incremental detect_silence_ranges for 16-bit PCM that arrives in blocks.
+
+    Feed interleaved sample blocks in order; each call returns the silent
+    ranges that can no longer grow. Only the last min_silence_len milliseconds
+    of energies are retained, so memory stays constant for any stream length.
+    With record=True the per-millisecond RMS and every silent range are kept
+    as well (about 2 bytes per millisecond) so they can be saved afterwards.
+    A detector with start_ms is fed the audio from that millisecond on (a
+    whole second, so it starts on a frame) and reports times from the start
+    of the recording.
+    """
+
+    def __init__(
+        self,
+        frame_rate: int,
+        channels: int,
+        min_silence_len: int = MIN_SILENCE_LEN,
+        silence_thresh: float = SILENCE_THRESH,
+        record: bool = False,
+        start_ms: int = 0,
+    ):
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.min_silence_len = min_silence_len
+        self.thresh = get_silence_amplitude(silence_thresh, 2)
+        self.duration_ms = start_ms
+        self.silent_ranges = [] if record else None
+        self._rms_blocks = [] if record else None
+
+        self._frames_done = self._frame_at(start_ms)  # frames folded into completed milliseconds
+        self._ms_done = start_ms  # completed milliseconds
+        self._carry = np.zeros(0, dtype=np.int16)  # samples of the unfinished millisecond
+        self._energies = np.zeros(0, dtype=np.int64)  # energies from _base_ms to _ms_done
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._base_ms = start_ms  # first window start not evaluated yet
+        self._run_start = None
+        self._run_last = None
+
+    def _frame_at(self, ms: int) -> int:
+        return int(ms * (self.frame_rate / 1000.0))
+
+    def _frame_bounds(self, start_ms: int, end_ms: int) -> np.ndarray:
+        return (np.arange(start_ms, end_ms + 1) * (self.frame_rate / 1000.0)).astype(np.int64)
+
+    def feed(self, samples: np.ndarray) -> list[tuple[int, int]]:
+        """Consume a block of samples and return silences that are now complete."""
+        pending = np.concatenate((self._carry, samples))
+        available = self._frames_done + len(pending) // self.channels
+
+        # Last millisecond whose frames have fully arrived
+        ms_end = max(available * 1000 // self.frame_rate, self._ms_done)
+        while self._frame_at(ms_end + 1) <= available:
+            ms_end += 1
+        while ms_end > self._ms_done and self._frame_at(ms_end) > available:
+            ms_end -= 1
+
+        bounds = self._frame_bounds(self._ms_done, ms_end)
+        offsets = bounds - self._frames_done
+        self._append(
+            sum_frame_energies(pending, self.channels, offsets),
+            np.diff(bounds) * self.channels,
+        )
+        self._carry = pending[offsets[-1] * self.channels:]
+        self._frames_done = int(bounds[-1])
+        self._ms_done = ms_end
+
+        ranges = self._scan(self._ms_done)
+        if self.silent_ranges is not None:
+            self.silent_ranges.extend(ranges)
+        return ranges
+
+    def finish(self) -> list[tuple[int, int]]:
+        """Flush the final partial millisecond and return the remaining silences."""
+        total_frames = self._frames_done + len(self._carry) // self.channels
+        # Same rounding as len(AudioSegment)
+        self.duration_ms = round(1000 * (total_frames / self.frame_rate))
+
+        if self.duration_ms > self._ms_done:
+            # Trailing milliseconds may be short; pydub pads them with silence
+            bounds = self._frame_bounds(self._ms_done, self.duration_ms)
+            offsets = np.minimum(bounds, total_frames) - self._frames_done
+            self._append(
+                sum_frame_energies(self._carry, self.channels, offsets),
+                np.diff(bounds) * self.channels,
+            )
+            self._ms_done = self.duration_ms
+            self._carry = np.zeros(0, dtype=np.int16)
+
+        ranges = self._scan(self.duration_ms)
+        if self._run_start is not None:
+            ranges.append((self._run_start, self._run_last + self.min_silence_len))
+            self._run_start = None
+        if self.silent_ranges is not None:
+            self.silent_ranges.extend(ranges)
+        return ranges
+
+    @property
+    def rms(self) -> np.ndarray | None:
+        """Recorded per-millisecond RMS (see get_ms_rms), or None when not recording."""
+        if self._rms_blocks is None:
+            return None
+        return np.concatenate(self._rms_blocks) if self._rms_blocks else np.zeros(0, dtype=np.float16)
+
+    def _append(self, energies: np.ndarray, counts: np.ndarray) -> None:
+        self._energies = np.concatenate((self._energies, energies))
+        self._counts = np.concatenate((self._counts, counts))
+        if self._rms_blocks is not None:
+            self._rms_blocks.append(get_ms_rms(energies, counts, 2))
+
+    def _scan(self, limit_ms: int) -> list[tuple[int, int]]:
+        """Evaluate every window that ends by limit_ms and close finished silences."""
+        ranges = []
+        last_window = limit_ms - self.min_silence_len
+        if last_window >= self._base_ms:
+            span = last_window - self._base_ms + 1 + self.min_silence_len
+            silent_starts = find_silent_windows(
+                self._energies[:span], self._counts[:span], self.thresh, self.min_silence_len,
+            ) + self._base_ms
+
+            for start in silent_starts.tolist():
+                if self._run_start is None:
+                    self._run_start = start
+                elif start - self._run_last > self.min_silence_len:
+                    ranges.append((self._run_start, self._run_last + self.min_silence_len))
+                    self._run_start = start
+                self._run_last = start
+
+            consumed = last_window + 1 - self._base_ms
+            self._energies = self._energies[consumed:]
+            self._counts = self._counts[consumed:]
+            self._base_ms = last_window + 1
+
+        # No later window can extend a silence that ended min_silence_len ago
+        if self._run_start is not None and self._base_ms - self._run_last > self.min_silence_len:
+            ranges.append((self._run_start, self._run_last + self.min_silence_len))
+            self._run_start = None
+
+        return ranges
+
+
+def detect_window_silence(
+    path: Path,
+    info: dict,
+    start_ms: int,
+    end_ms: int | None,
+    min_silence_len: int = MIN_SILENCE_LEN,
+    silence_thresh: float = SILENCE_THRESH,
+    record: bool = False,
+) -> tuple[list[tuple[int, int]], np.ndarray | None, int]:
+    """
+    Find the silences of the windows starting from start_ms up to end_ms (the end of the file if None).
+
+    Decoding seeks to ANALYSIS_PREROLL_MS before start_ms and runs
+    min_silence_len past end_ms, so the windows that start just before
+    end_ms are complete; a silence still running there is closed at that
+    point (see ParallelSilenceDetector). Returns the silent ranges, the
+    per-millisecond RMS from start_ms to end_ms when recording, and where the
+    decoded audio ended.
+    """
+    frame_rate, channels = info["frame_rate"], info["channels"]
+    detector = StreamingSilenceDetector(
+        frame_rate, channels, min_silence_len, silence_thresh, record=record, start_ms=start_ms,
+    )
+    decode_start_ms = max(start_ms - ANALYSIS_PREROLL_MS, 0)
+    skip = (start_ms - decode_start_ms) // 1000 * frame_rate * channels
+    remaining = None
+    duration_ms = None
+    if end_ms is not None:
+        limit_ms = end_ms + min_silence_len
+        remaining = (int(limit_ms * (frame_rate / 1000.0)) - start_ms // 1000 * frame_rate) * channels
+        # A second to spare; the samples past limit_ms are dropped below
+        duration_ms = limit_ms - decode_start_ms + 1000
+
+    ranges = []
+    for block in read_pcm_blocks(path, frame_rate, channels, duration_ms=duration_ms, start_ms=decode_start_ms):
+        if skip:
+            dropped = min(skip, len(block))
+            block, skip = block[dropped:], skip - dropped
+        if remaining is not None:
+            block = block[:remaining]
+            remaining -= len(block)
+        ranges += detector.feed(block)
+    ranges += detector.finish()
+
+    rms = detector.rms
+    if rms is not None and end_ms is not None:
+        rms = rms[:end_ms - start_ms]
+    return ranges, rms, detector.duration_ms
+
+
+class ParallelSilenceDetector:
+    """
+    StreamingSilenceDetector counterpart that splits a recording into windows and analyses them on a process pool.
+
+    Every window is decoded on its own with a seeking ffmpeg read (see
+    detect_window_silence). Windows are consumed in order, and a silence
+    that crosses a window edge is stitched back together from both sides,
+    so the silent ranges (and with record=True, the per-millisecond RMS) are
+    the same as from one pass over the file. duration_ms, silent_ranges and
+    rms are filled in as with a StreamingSilenceDetector once the stream is
+    exhausted (see stream_silent_ranges).
+    """
+
+    def __init__(
+        self,
+        jobs: int,
+        min_silence_len: int = MIN_SILENCE_LEN,
+        silence_thresh: float = SILENCE_THRESH,
+        record: bool = False,
+        window_ms: int = ANALYSIS_WINDOW_MS,
+    ):
+        self.jobs = jobs
+        self.min_silence_len = min_silence_len
+        self.silence_thresh = silence_thresh
+        self.window_ms = window_ms
+        self.duration_ms = 0
+        self.silent_ranges = [] if record else None
+        self._rms_blocks = [] if record else None
+
+    @property
+    def rms(self) -> np.ndarray | None:
+        """Recorded per-millisecond RMS (see get_ms_rms), or None when not recording."""
+        if self._rms_blocks is None:
+            return None
+        return np.concatenate(self._rms_blocks) if self._rms_blocks else np.zeros(0, dtype=np.float16)
+
+    def stream(self, path: Path, info: dict) -> Iterator[tuple[int, int]]:
+        """Yield the silent ranges of the file in order, then a zero-length end-of-audio marker."""
+        # Windows start on whole seconds, so each one starts on a frame
+        window_ms = max(self.window_ms // 1000, 1) * 1000
+        starts = list(range(0, max(info["duration_ms"], 1), window_ms))
+        record = self._rms_blocks is not None
+        workers = min(self.jobs, len(starts))
+        print(f"Scanning {len(starts)} windows for silence on {workers} processes...", flush=True)
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futures = [
+                pool.submit(
+                    detect_window_silence, path, info, start_ms,
+                    starts[i + 1] if i + 1 < len(starts) else None,
+                    self.min_silence_len, self.silence_thresh, record,
+                )
+                for i, start_ms in enumerate(starts)
+            ]
+            pending = None  # Last silence so far; the next window may extend it
+            for future in futures:
+                ranges, rms, duration_ms = future.result()
+                if record:
+                    self._rms_blocks.append(rms)
+                self.duration_ms = max(self.duration_ms, duration_ms)
+                for start, end in ranges:
+                    if pending is not None and start <= pending[1]:
+                        # Windows less than min_silence_len apart belong to the same silence
+                        pending = (pending[0], max(pending[1], end))
+                        continue
+                    if pending is not None:
+                        yield from self._emit(pending)
+                    pending = (start, end)
+            if pending is not None:
+                yield from self._emit(pending)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        yield (self.duration_ms, self.duration_ms)
+
+    def _emit(self, silence: tuple[int, int]) -> Iterator[tuple[int, int]]:
+        if self.silent_ranges is not None:
+            self.silent_ranges.append(silence)
+        yield silence
+
+
+def make_silence_detector(
+    info: dict,
+    min_silence_len: int = MIN_SILENCE_LEN,
+    silence_thresh: float = SILENCE_THRESH,
+    record: bool = False,
+    jobs: int = 1,
+) -> "StreamingSilenceDetector | ParallelSilenceDetector":
+    """A detector for stream_silent_ranges: parallel with jobs > 1 for recordings of at least ANALYSIS_PARALLEL_MIN_MS."""
+    if jobs > 1 and info["duration_ms"] >= ANALYSIS_PARALLEL_MIN_MS:
+        return ParallelSilenceDetector(jobs, min_silence_len, silence_thresh, record=record)
+    return StreamingSilenceDetector(
+        info["frame_rate"], info["channels"],
+        min_silence_len=min_silence_len,
+        silence_thresh=silence_thresh,
+        record=record,
+    )
+
+
+def iter_speech_ranges(
+    silent_ranges: Iterable[tuple[int, int]],
+    duration_ms: int | None = None,
+    keep_silence: int = 250,
+) -> Iterator[tuple[int, int]]:
+    """
+    Turn silent ranges into padded (start_ms, end_ms) speech ranges as they arrive.
+
+    Mirrors pydub.silence.split_on_silence: each non-silent range is padded by
+    keep_silence on both sides, and overlapping padding is split in the middle.
+    When duration_ms isn't known up front, the input must end with a
+    zero-length (duration_ms, duration_ms) range marking the end of the audio.
+    """
+    if duration_ms is not None:
+        silent_ranges = [*silent_ranges, (duration_ms, duration_ms)]
+
+    pending = None
+    prev_end = 0
+    for start, end in silent_ranges:
+        if start > prev_end:
+            padded = [prev_end - keep_silence, start + keep_silence]
+            if pending is not None:
+                if padded[0] < pending[1]:
+                    pending[1] = (pending[1] + padded[0]) // 2
+                    padded[0] = pending[1]
+                yield (max(pending[0], 0), pending[1])
+            pending = padded
+        prev_end = end
+
+    if pending is not None:
+        yield (max(pending[0], 0), min(pending[1], prev_end))
+
+
+def get_speech_ranges(
+    silent_ranges: list[tuple[int, int]],
+    duration_ms: int,
+    keep_silence: int = 250,
+) -> list[tuple[int, int]]:
+    """Turn silent ranges into padded (start_ms, end_ms) speech ranges."""
+    return list(iter_speech_ranges(silent_ranges, duration_ms, keep_silence))
+
+
+def get_speech_segments(
+    silent_ranges: list[tuple[int, int]],
+    duration_ms: int,
+    keep_silence: int = 250,
+) -> list[tuple[int, int]]:
+    """Speech ranges for chunking; the whole audio is one segment if no silence splits it."""
+    segments = get_speech_ranges(silent_ranges, duration_ms, keep_silence)
+    return segments or [(0, duration_ms)]
+
+
+def split_at_silence(
+    audio: AudioSegment,
+    min_silence_len: int = MIN_SILENCE_LEN,
+    silence_thresh: float = SILENCE_THRESH,
+    keep_silence: int = 250,
+) -> list[tuple[int, int]]:
     """
     Split audio at silence points for conversation-aware chunking.
 
+    Returns (start_ms, end_ms) ranges of speech rather than audio copies.
+
     Uses parameters optimized for speech:
     - min_silence_len: 500ms (typical sentence pause)
     - silence_thresh: -40 dBFS (speech threshold)
     - keep_silence: 250ms (padding to avoid abrupt cuts)
     """
-    segments = split_on_silence(
-        audio,
-        min_silence_len=500,
-        silence_thresh=-40,
-        keep_silence=250,
+    energies, counts = get_ms_energies(audio)
+    silent_ranges = detect_silence_ranges(
+        energies, counts, audio.sample_width,
+        min_silence_len=min_silence_len,
+        silence_thresh=silence_thresh,
     )
+    return get_speech_segments(silent_ranges, len(audio), keep_silence)
 
-    # If no silence detected, return the whole audio as one segment
-    if not segments:
-        return [audio]
-
-    return segments
 
-
-def combine_segments_to_chunks(
-    segments: list[AudioSegment],
-    format: str,
+def iter_chunk_ranges(
+    segments: Iterable[tuple[int, int]],
     bytes_per_ms: float,
     max_bytes: int = MAX_CHUNK_BYTES,
     max_duration_ms: int | None = None,
-) -> list[AudioSegment]:
+) -> Iterator[tuple[int, int]]:
     """
-    Combine small segments into chunks that don't exceed max_bytes or max_duration_ms.
+    Combine speech ranges into chunk ranges that don't exceed max_bytes or max_duration_ms.
 
-    Uses bytes_per_ms ratio to estimate sizes instantly instead of exporting.
+    Works purely on (start_ms, end_ms) offsets; a chunk spans from its first
+    segment's start to its last segment's end in the source audio. Uses the
+    bytes_per_ms ratio to estimate sizes instantly instead of exporting, and
+    yields each chunk as soon as the next segment no longer fits into it.
     """
-    if not segments:
-        return []
-
-    chunks = []
-    current_chunk = AudioSegment.empty()
-    current_duration_ms = 0
+    current_start = None
+    current_end = None
 
     def exceeds_limits(duration_ms: int) -> bool:
         """Check if duration exceeds size or duration limits."""
@@ -115,46 +1098,164 @@ def combine_segments_to_chunks(
             return True
         return False
 
-    for segment in segments:
-        segment_duration = len(segment)
-        test_duration = current_duration_ms + segment_duration
+    for start, end in segments:
+        test_start = start if current_start is None else current_start
 
-        if exceeds_limits(test_duration):
+        if exceeds_limits(end - test_start):
             # Current chunk is full, save it and start new one
-            if len(current_chunk) > 0:
-                chunks.append(current_chunk)
+            if current_start is not None:
+                yield (current_start, current_end)
 
             # Check if single segment exceeds limit
-            if exceeds_limits(segment_duration):
+            if exceeds_limits(end - start):
                 # Split large segment by duration
-                sub_chunks = split_large_segment(segment, format, max_bytes, bytes_per_ms, max_duration_ms)
-                chunks.extend(sub_chunks[:-1])
-                current_chunk = sub_chunks[-1] if sub_chunks else AudioSegment.empty()
-                current_duration_ms = len(current_chunk)
+                sub_chunks = split_large_segment(start, end, max_bytes, bytes_per_ms, max_duration_ms)
+                yield from sub_chunks[:-1]
+                current_start, current_end = sub_chunks[-1]
             else:
-                current_chunk = segment
-                current_duration_ms = segment_duration
+                current_start, current_end = start, end
         else:
-            current_chunk = current_chunk + segment
-            current_duration_ms = test_duration
+            current_start, current_end = test_start, end
 
     # Don't forget the last chunk
-    if len(current_chunk) > 0:
-        chunks.append(current_chunk)
+    if current_start is not None and current_end > current_start:
+        yield (current_start, current_end)
 
-    return chunks
+
+def combine_segments_to_chunks(
+    segments: list[tuple[int, int]],
+    bytes_per_ms: float,
+    max_bytes: int = MAX_CHUNK_BYTES,
+    max_duration_ms: int | None = None,
+) -> list[tuple[int, int]]:
+    """Combine speech ranges into chunk ranges that don't exceed max_bytes or max_duration_ms."""
+    return list(iter_chunk_ranges(segments, bytes_per_ms, max_bytes, max_duration_ms))
+
+
+def stream_silent_ranges(
+    path: Path,
+    info: dict,
+    detector: StreamingSilenceDetector | ParallelSilenceDetector,
+) -> Iterator[tuple[int, int]]:
+    """Decode the file block by block (or window by window) and yield its silent ranges, then a zero-length end-of-audio marker."""
+    if isinstance(detector, ParallelSilenceDetector):
+        yield from detector.stream(path, info)
+        return
+    for block in read_pcm_blocks(path, info["frame_rate"], info["channels"]):
+        yield from detector.feed(block)
+    yield from detector.finish()
+    yield (detector.duration_ms, detector.duration_ms)
+
+
+def iter_trimmed_silence(
+    silent_ranges: Iterable[tuple[int, int]],
+    min_pause_ms: int,
+    time_map: list[tuple[int, int]],
+    gap_ms: int = TRIM_GAP_MS,
+) -> Iterator[tuple[int, int]]:
+    """
+    Compact pauses longer than min_pause_ms to gap_ms and yield the silent ranges on the compacted timeline.
+
+    silent_ranges must end with a zero-length end-of-audio marker (see
+    iter_speech_ranges), which is passed on compacted. Half of gap_ms is
+    kept on each side of a compacted pause; dead air before the first and
+    after the last speech is cut to half of it. Every compacted pause adds a
+    (compact_ms, source_ms) breakpoint to time_map as it is seen (see
+    to_source_ms).
+    """
+    half = gap_ms // 2
+    removed = 0
+    time_map.append((0, 0))
+
+    def compact(start: int, end: int, at_end: bool) -> tuple[int, int]:
+        nonlocal removed
+        if end - start <= min_pause_ms:
+            return start - removed, end - removed
+        cut_start = 0 if start == 0 else start + half
+        cut_end = end if at_end and start > 0 else end - half
+        compact_start = start - removed
+        removed += cut_end - cut_start
+        if time_map[-1][0] == cut_end - removed:
+            time_map.pop()
+        time_map.append((cut_end - removed, cut_end))
+        return compact_start, end - removed
+
+    previous = None
+    for start, end in silent_ranges:
+        if start == end:
+            # End-of-audio marker: the range before it may be trailing dead air
+            if previous is not None:
+                yield compact(*previous, at_end=previous[1] == end)
+            yield end - removed, end - removed
+            return
+        if previous is not None:
+            yield compact(*previous, at_end=False)
+        previous = (start, end)
+
+
+def to_source_ms(time_map: list[tuple[int, int]], compact_ms: int, end: bool = False) -> int:
+    """
+    Map a position on a compacted timeline back to the source recording.
+
+    time_map holds (compact_ms, source_ms) breakpoints, each starting a kept
+    stretch of the source. A position on a breakpoint maps to the start of
+    the stretch after it, or with end=True to the end of the one before it.
+    """
+    if end:
+        i = bisect.bisect_left(time_map, compact_ms, key=lambda point: point[0]) - 1
+    else:
+        i = bisect.bisect_right(time_map, compact_ms, key=lambda point: point[0]) - 1
+    compact_start, source_start = time_map[max(i, 0)]
+    return source_start + compact_ms - compact_start
+
+
+def get_chunk_time_map(time_map: list[tuple[int, int]], start_ms: int, end_ms: int) -> list[tuple[int, int]]:
+    """The time map of the compacted range start_ms-end_ms, with positions relative to start_ms."""
+    chunk_map = [(0, to_source_ms(time_map, start_ms))]
+    chunk_map += [(compact_ms - start_ms, source_ms) for compact_ms, source_ms in time_map if start_ms < compact_ms < end_ms]
+    return chunk_map
+
+
+def stream_speech_ranges(
+    path: Path,
+    info: dict,
+    min_silence_len: int = MIN_SILENCE_LEN,
+    silence_thresh: float = SILENCE_THRESH,
+    keep_silence: int = 250,
+    detector: StreamingSilenceDetector | ParallelSilenceDetector | None = None,
+) -> Iterator[tuple[int, int]]:
+    """
+    Streaming counterpart of split_at_silence.
+
+    Decodes the file block by block through ffmpeg and yields speech ranges as
+    soon as the silence after them has been seen. Pass a detector to inspect
+    it once the stream is exhausted; its own parameters are used then.
+    """
+    if detector is None:
+        detector = StreamingSilenceDetector(
+            info["frame_rate"], info["channels"],
+            min_silence_len=min_silence_len,
+            silence_thresh=silence_thresh,
+        )
+
+    found = False
+    for segment in iter_speech_ranges(stream_silent_ranges(path, info, detector), keep_silence=keep_silence):
+        found = True
+        yield segment
+
+    # If no speech detected, return the whole audio as one segment
+    if not found and detector.duration_ms > 0:
+        yield (0, detector.duration_ms)
 
 
 def split_large_segment(
-    segment: AudioSegment,
-    format: str,
+    start_ms: int,
+    end_ms: int,
     max_bytes: int,
     bytes_per_ms: float,
     max_duration_ms: int | None = None,
-) -> list[AudioSegment]:
-    """Split a segment that's too large by duration or size."""
-    duration_ms = len(segment)
-
+) -> list[tuple[int, int]]:
+    """Split a range that's too large by duration or size."""
     # Calculate chunk duration based on size limit
     size_based_duration = int(max_bytes / (bytes_per_ms * 1.1))
 
@@ -165,44 +1266,533 @@ def split_large_segment(
         chunk_duration_ms = size_based_duration
 
     chunks = []
-    start = 0
-    while start < duration_ms:
-        end = min(start + chunk_duration_ms, duration_ms)
-        chunks.append(segment[start:end])
+    start = start_ms
+    while start < end_ms:
+        end = min(start + chunk_duration_ms, end_ms)
+        chunks.append((start, end))
         start = end
 
     return chunks
 
 
 def export_chunks(
-    chunks: list[AudioSegment],
+    audio: AudioSegment,
+    chunks: list[tuple[int, int]],
     output_dir: Path,
     format: str,
     input_name: str,
+    encoder_args: list[str] | None = None,
 ) -> list[Path]:
-    """Export chunks to files and return their paths."""
+    """Slice each planned chunk from the source audio, export it, and return the paths."""
     output_dir.mkdir(parents=True, exist_ok=True)
 
     paths = []
-    for i, chunk in enumerate(chunks):
+    for i, (start_ms, end_ms) in enumerate(chunks):
         filename = f"{input_name}_chunk_{i:03d}.{format}"
         path = output_dir / filename
-        chunk.export(str(path), format=format)
+        audio[start_ms:end_ms].export(str(path), format=format, parameters=[*(encoder_args or []), *BITEXACT_ARGS])
         paths.append(path)
+        metrics.add(bytes_written=path.stat().st_size)
         file_size_mb = path.stat().st_size / 1024 / 1024
         print(f"Exported: {path} ({file_size_mb:.2f} MB)", flush=True)
 
     return paths
 
 
+def export_chunk_from_file(
+    input_path: Path,
+    start_ms: int,
+    end_ms: int | None,
+    path: Path,
+    format: str,
+    encoder_args: list[str] | None = None,
+) -> None:
+    """Decode one time range of the source file with ffmpeg and encode it to path."""
+    command = ["ffmpeg", "-v", "error", "-nostdin", "-y", "-ss", f"{start_ms / 1000:.3f}", "-i", str(input_path)]
+    if end_ms is not None:
+        command += ["-t", f"{(end_ms - start_ms) / 1000:.3f}"]
+    command += ["-vn", *(encoder_args or []), *BITEXACT_ARGS, "-f", format, str(path)]
+    subprocess.run(command, capture_output=True, check=True)
+
+
+def export_trimmed_chunk(
+    input_path: Path,
+    info: dict,
+    chunk_map: list[tuple[int, int]],
+    length_ms: int,
+    path: Path,
+    format: str,
+    encoder_args: list[str] | None = None,
+) -> None:
+    """
+    Encode a chunk of a compacted recording to path from the source stretches in its time map.
+
+    The source span the chunk covers is decoded once; only the kept
+    stretches are piped on to the encoder, back to back.
+    """
+    frame_rate, channels = info["frame_rate"], info["channels"]
+    ends = [chunk_ms for chunk_ms, _ in chunk_map[1:]] + [length_ms]
+    pieces = [(source_ms, end - chunk_ms) for (chunk_ms, source_ms), end in zip(chunk_map, ends)]
+    span_start = pieces[0][0]
+    span_end = pieces[-1][0] + pieces[-1][1]
+    # Frame ranges to keep, counted from span_start
+    keep = [
+        ((source_ms - span_start) * frame_rate // 1000, (source_ms + length - span_start) * frame_rate // 1000)
+        for source_ms, length in pieces
+    ]
+
+    encoder = subprocess.Popen(
+        [
+            "ffmpeg", "-v", "error", "-nostdin", "-y",
+            "-f", "s16le", "-ar", str(frame_rate), "-ac", str(channels), "-i", "pipe:0",
+            *(encoder_args or []), *BITEXACT_ARGS, "-f", format, str(path),
+        ],
+        stdin=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        position = 0
+        k = 0
+        for block in read_pcm_blocks(
+            input_path, frame_rate, channels, start_ms=span_start, duration_ms=span_end - span_start,
+        ):
+            block_end = position + len(block) // channels
+            while k < len(keep) and keep[k][0] < block_end:
+                first, last = max(keep[k][0], position), min(keep[k][1], block_end)
+                if last > first:
+                    encoder.stdin.write(block[(first - position) * channels:(last - position) * channels].tobytes())
+                if keep[k][1] > block_end:
+                    break
+                k += 1
+            position = block_end
+    finally:
+        encoder.stdin.close()
+        stderr = encoder.stderr.read().decode(errors="replace")
+        encoder.stderr.close()
+        returncode = encoder.wait()
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to encode {path}: {stderr.strip()}")
+
+
+def get_packet_times(path: Path) -> np.ndarray:
+    """Get the start time in milliseconds of every packet in the first audio stream."""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-select_streams", "a:0",
+            "-show_entries", "packet=pts_time",
+            "-of", "csv=p=0",
+            str(path),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in result.stdout.splitlines():
+        value = line.strip().rstrip(",")
+        if value and value != "N/A":
+            times.append(float(value) * 1000)
+    return np.array(times)
+
+
+def snap_to_packets(
+    start_ms: int,
+    end_ms: int,
+    packet_times: np.ndarray,
+) -> tuple[int, int | None]:
+    """
+    Move a chunk range onto the nearest packet boundaries.
+
+    Returns end_ms as None when the range runs into the final packet, meaning
+    the cut should continue to the end of the file. A range that collapses
+    onto a single packet boundary comes back empty (end_ms == start_ms).
+    """
+    if len(packet_times) == 0:
+        return start_ms, end_ms
+
+    def nearest(ms: int) -> int:
+        i = int(np.searchsorted(packet_times, ms))
+        candidates = packet_times[max(i - 1, 0):i + 1]
+        return int(candidates[np.argmin(np.abs(candidates - ms))])
+
+    start = nearest(start_ms)
+    if end_ms >= packet_times[-1]:
+        return start, None
+    return start, nearest(end_ms)
+
+
+def export_chunk_copy(
+    input_path: Path,
+    start_ms: int,
+    end_ms: int | None,
+    path: Path,
+    format: str,
+    max_bytes: int = MAX_CHUNK_BYTES,
+) -> bool:
+    """
+    Cut one time range out of the source file with ffmpeg stream copy (no re-encoding).
+
+    Returns False when the container couldn't be cut cleanly or the result
+    would exceed max_bytes, so the caller can fall back to re-encoding.
+    """
+    command = ["ffmpeg", "-v", "error", "-nostdin", "-y", "-ss", f"{start_ms / 1000:.3f}"]
+    if end_ms is not None:
+        command += ["-to", f"{end_ms / 1000:.3f}"]
+    command += [
+        "-i", str(input_path),
+        "-map", "0:a:0", "-c", "copy",
+        "-avoid_negative_ts", "make_zero",
+        *BITEXACT_ARGS,
+        "-f", format,
+        str(path),
+    ]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0 or not path.exists():
+        return False
+
+    size = path.stat().st_size
+    return 0 < size <= max_bytes
+
+
+def export_chunks_from_file(
+    input_path: Path,
+    chunks: Iterable[tuple[int, int]],
+    output_dir: Path,
+    format: str,
+    input_name: str,
+    copy: bool = True,
+    encoder_args: list[str] | None = None,
+    cuts: list[tuple[int, int]] | None = None,
+    max_bytes: int = MAX_CHUNK_BYTES,
+) -> list[Path]:
+    """
+    Cut planned chunks straight out of the source file and return their paths.
+
+    With copy=True, each chunk is snapped to packet boundaries and stream
+    copied losslessly; re-encoding is only used for chunks that can't be
+    copied. chunks may be a generator, in which case each chunk is exported
+    as soon as it's planned. Ranges that come out empty after snapping are
+    skipped. A re-encoded chunk can come out larger than the plan assumed;
+    one over max_bytes is cut in two and each half exported again. The
+    (start_ms, end_ms) actually cut are appended to cuts if given.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    packet_times = None
+    if copy:
+        # PCM can be cut at any sample, so there are no packets to snap to
+        packet_times = np.array([]) if format == "wav" else get_packet_times(input_path)
+
+    def export(start_ms: int, end_ms: int | None, path: Path) -> None:
+        if packet_times is not None:
+            if export_chunk_copy(input_path, start_ms, end_ms, path, format, max_bytes):
+                return
+            print(f"  Stream copy failed for {path.name}, re-encoding", flush=True)
+        export_chunk_from_file(input_path, start_ms, end_ms, path, format, encoder_args)
+
+    paths = []
+    for planned_start_ms, planned_end_ms in chunks:
+        start_ms, end_ms = planned_start_ms, planned_end_ms
+        if packet_times is not None:
+            start_ms, end_ms = snap_to_packets(start_ms, end_ms, packet_times)
+        if (end_ms if end_ms is not None else planned_end_ms) <= start_ms:
+            print(f"  Skipping empty chunk at {start_ms / 1000:.1f}s", flush=True)
+            continue
+
+        ranges = [(start_ms, end_ms, planned_end_ms)]
+        while ranges:
+            start_ms, end_ms, planned_end_ms = ranges.pop(0)
+            path = output_dir / f"{input_name}_chunk_{len(paths):03d}.{format}"
+            export(start_ms, end_ms, path)
+            # A cut that runs to the end of the file ends where the plan did
+            cut_end_ms = planned_end_ms if end_ms is None else end_ms
+            if path.stat().st_size > max_bytes:
+                middle_ms = (start_ms + cut_end_ms) // 2
+                if packet_times is not None:
+                    middle_ms = snap_to_packets(middle_ms, middle_ms, packet_times)[0]
+                if not start_ms < middle_ms < cut_end_ms:
+                    raise RuntimeError(f"Couldn't cut {path.name} to under {max_bytes / 1024 / 1024:g}MB")
+                print(f"  {path.name} is over {max_bytes / 1024 / 1024:g}MB, splitting it in two", flush=True)
+                path.unlink()
+                ranges[:0] = [(start_ms, middle_ms, middle_ms), (middle_ms, end_ms, planned_end_ms)]
+                continue
+            if cuts is not None:
+                cuts.append((start_ms, cut_end_ms))
+            paths.append(path)
+            metrics.add(bytes_written=path.stat().st_size)
+            file_size_mb = path.stat().st_size / 1024 / 1024
+            print(f"Exported: {path} ({file_size_mb:.2f} MB)", flush=True)
+
+    return paths
+
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache for API results, stored in SQLite.
+
+    Keys hash the input (chunk bytes or text) together with everything that
+    shapes the output: endpoint, model and prompt. Once the stored values
+    grow past max_bytes the least recently used entries are evicted. Safe to
+    share between worker threads.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = CACHE_MAX_BYTES):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / "results.sqlite3"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    @staticmethod
+    def make_key(*parts: str | bytes) -> str:
+        """Hash the given parts into a cache key; each part is length-prefixed so they can't run together."""
+        digest = hashlib.sha256()
+        for part in (CACHE_VERSION, *parts):
+            data = part.encode() if isinstance(part, str) else part
+            digest.update(len(data).to_bytes(8, "big"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Return the cached value for key, marking it as recently used."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """Store value under key and evict old entries if the cache is over its size limit."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, len(value.encode()), time.time()),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM results WHERE key = ?", stale)
+
+
+def hash_file(path: Path) -> str:
+    """SHA-256 of a file's contents, read in 1MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SilenceMapStore:
+    """
+    On-disk silence analysis, so re-chunking a recording skips decoding it.
+
+    Maps are stored under a key naming the source recording and the upload
+    profile it was analysed with (see make_key). Each key gets <key>.npz
+    holding the per-millisecond RMS (float16, see get_ms_rms) and the frame
+    rate and channel count needed to rebuild the energies. The silent ranges
+    found with a given min_silence_len and silence_thresh go to
+    <key>_<len>_<thresh>.npy. Ranges for new parameters are derived from the
+    RMS map and stored alongside. Once the maps grow past max_bytes the least
+    recently used ones are evicted.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = SILENCE_MAP_MAX_BYTES):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(file_hash: str, upload_profile: str | None = None) -> str:
+        """Key for a recording's map; a transcoded upload is analysed separately from the original."""
+        return file_hash if upload_profile is None else f"{file_hash}-{upload_profile}"
+
+    def _rms_path(self, key: str) -> Path:
+        return self.directory / f"{key}.npz"
+
+    def _ranges_path(self, key: str, min_silence_len: int, silence_thresh: float) -> Path:
+        return self.directory / f"{key}_{min_silence_len}_{silence_thresh:g}.npy"
+
+    def load(
+        self,
+        key: str,
+        min_silence_len: int = MIN_SILENCE_LEN,
+        silence_thresh: float = SILENCE_THRESH,
+    ) -> tuple[list[tuple[int, int]], int] | None:
+        """Return (silent_ranges, duration_ms) for the key, or None if it was never analysed."""
+        rms_path = self._rms_path(key)
+        try:
+            # The modification time doubles as the last use for eviction
+            os.utime(rms_path)
+        except FileNotFoundError:
+            return None
+        with np.load(rms_path) as data:
+            rms = data["rms"]
+            frame_rate = int(data["frame_rate"])
+            channels = int(data["channels"])
+
+        ranges_path = self._ranges_path(key, min_silence_len, silence_thresh)
+        if ranges_path.exists():
+            silent_ranges = [(int(start), int(end)) for start, end in np.load(ranges_path)]
+        else:
+            silent_ranges = detect_silence_from_rms(rms, frame_rate, channels, min_silence_len, silence_thresh)
+            self._save_ranges(ranges_path, silent_ranges)
+        return silent_ranges, len(rms)
+
+    def save(
+        self,
+        key: str,
+        rms: np.ndarray,
+        frame_rate: int,
+        channels: int,
+        silent_ranges: list[tuple[int, int]],
+        min_silence_len: int = MIN_SILENCE_LEN,
+        silence_thresh: float = SILENCE_THRESH,
+    ) -> None:
+        """Store a recording's RMS map and the silent ranges detected with the given parameters."""
+        # Write under a temporary name so an interrupted run never leaves a truncated map
+        tmp_path = self.directory / f"{key}.tmp.npz"
+        np.savez(tmp_path, rms=rms, frame_rate=frame_rate, channels=channels)
+        os.replace(tmp_path, self._rms_path(key))
+        self._save_ranges(self._ranges_path(key, min_silence_len, silence_thresh), silent_ranges)
+
+    def _save_ranges(self, path: Path, silent_ranges: list[tuple[int, int]]) -> None:
+        tmp_path = path.with_name(path.stem + ".tmp.npy")
+        np.save(tmp_path, np.array(silent_ranges, dtype=np.int64).reshape(-1, 2))
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        maps = []
+        total = 0
+        for path in self.directory.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            total += stat.st_size
+            if path.suffix == ".npz" and not path.name.endswith(".tmp.npz"):
+                maps.append((stat.st_mtime, path))
+        # Drop whole maps, oldest use first, together with their stored ranges
+        for _, rms_path in sorted(maps):
+            if total <= self.max_bytes:
+                break
+            for path in [rms_path, *self.directory.glob(f"{rms_path.stem}_*.npy")]:
+                try:
+                    total -= path.stat().st_size
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+def create_client() -> OpenAI:
+    """
+    Create an OpenAI client for this run.
+
+    Retries are handled by call_with_retries so they can honour Retry-After
+    and be shared across worker threads. OPENAI_BASE_URL can point the
+    client at a local stub server.
+    """
+    return OpenAI(max_retries=0)  # Uses OPENAI_API_KEY env var
+
+
+def get_retry_delay(error: Exception, attempt: int) -> float | None:
+    """
+    Return how long to wait before retrying a failed API call, or None if it shouldn't be retried.
+
+    Rate limits (429), server errors (5xx) and connection failures are
+    retried with exponential backoff and full jitter; a Retry-After header
+    from the server takes precedence when present.
+    """
+    if isinstance(error, APIStatusError):
+        if error.status_code != 429 and error.status_code < 500:
+            return None
+        headers = error.response.headers
+        if headers.get("retry-after-ms"):
+            try:
+                return float(headers["retry-after-ms"]) / 1000
+            except ValueError:
+                pass
+        if headers.get("retry-after"):
+            retry_after = headers["retry-after"]
+            try:
+                return float(retry_after)
+            except ValueError:
+                try:
+                    return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+                except (TypeError, ValueError):
+                    pass
+    elif not isinstance(error, APIConnectionError):
+        return None
+
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def call_with_retries(func: Callable, *args, max_retries: int = MAX_RETRIES, **kwargs):
+    """Call func, retrying rate-limited and transient API failures with backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            delay = get_retry_delay(e, attempt)
+            if delay is None or attempt == max_retries:
+                raise
+            print(f"  {e.__class__.__name__}, retrying in {delay:.1f}s ({attempt + 1}/{max_retries})...", flush=True)
+            metrics.add(retries=1, retry_wait_s=delay)
+            time.sleep(delay)
+
+
 def transcribe_chunk(
     client: OpenAI,
     chunk_path: Path,
     model: str,
     diarize: bool,
     translate: bool = False,
+    cache: ResultCache | None = None,
+    timestamps: bool = False,
 ) -> dict:
-    """Transcribe or translate a single chunk using OpenAI API."""
+    """
+    Transcribe or translate a single chunk using OpenAI API.
+
+    With timestamps, whisper-1 is asked for verbose_json so the response
+    carries timed segments (diarized responses always do; gpt-4o-transcribe
+    can't provide them). With a cache, a chunk whose bytes were already sent
+    to the same endpoint and model is answered from disk without uploading
+    it again.
+    """
+    verbose = timestamps and not translate and not diarize and model == "whisper-1"
+    if cache is not None:
+        if translate:
+            endpoint, request_model = "translations", "whisper-1"
+        elif diarize:
+            endpoint, request_model = "transcriptions/diarized_json", "gpt-4o-transcribe-diarize"
+        elif verbose:
+            endpoint, request_model = "transcriptions/verbose_json", model
+        else:
+            endpoint, request_model = "transcriptions", model
+        key = ResultCache.make_key("audio", endpoint, request_model, hash_file(chunk_path))
+        cached = cache.get(key)
+        if cached is not None:
+            metrics.add(cached=1)
+            return SimpleNamespace(**json.loads(cached))
+
+    metrics.add(bytes_uploaded=chunk_path.stat().st_size)
     with open(chunk_path, "rb") as audio_file:
         if translate:
             # Translation endpoint only supports whisper-1
@@ -217,30 +1807,157 @@ def transcribe_chunk(
                 response_format="diarized_json",
                 chunking_strategy="auto",
             )
+        elif verbose:
+            response = client.audio.transcriptions.create(
+                model=model,
+                file=audio_file,
+                response_format="verbose_json",
+                timestamp_granularities=["segment"],
+            )
         else:
             response = client.audio.transcriptions.create(
                 model=model,
                 file=audio_file,
             )
+    metrics.add_usage(response)
+
+    if cache is not None:
+        if hasattr(response, "model_dump_json"):
+            cache.set(key, response.model_dump_json())
+        elif isinstance(response, str):
+            cache.set(key, json.dumps({"text": response}))
     return response
 
 
-def format_diarized_transcript(segments: list) -> str:
-    """Format diarized segments into readable text."""
-    lines = []
-    current_speaker = None
-    current_text = []
+def submit_transcriptions(
+    pool: ThreadPoolExecutor,
+    client: OpenAI,
+    chunk_paths: list[Path],
+    model: str,
+    diarize: bool,
+    translate: bool = False,
+    cache: ResultCache | None = None,
+    timestamps: bool = False,
+) -> list[Future]:
+    """Queue every chunk for transcription on pool and return one future per chunk, in order."""
+    def transcribe(path: Path):
+        with metrics.span("transcription", file=path.name, model="gpt-4o-transcribe-diarize" if diarize else model):
+            return call_with_retries(
+                transcribe_chunk, client, path, model, diarize, translate, cache=cache, timestamps=timestamps,
+            )
 
-    for segment in segments:
-        speaker = segment.get("speaker", "Unknown")
-        text = segment.get("text", "").strip()
+    return [pool.submit(transcribe, path) for path in chunk_paths]
 
-        if speaker != current_speaker:
-            if current_text:
-                lines.append(f"[{current_speaker}]: {' '.join(current_text)}")
-            current_speaker = speaker
-            current_text = [text] if text else []
-        else:
+
+def get_field(item, name: str, default=None):
+    """Read a field from an API response object, or from its dict form when it came from the cache."""
+    if isinstance(item, dict):
+        return item.get(name, default)
+    return getattr(item, name, default)
+
+
+def get_response_text(response) -> str:
+    """Transcript text of one chunk; diarized responses are rendered with their speaker labels."""
+    segments = get_field(response, "segments") or []
+    if segments and any(get_field(segment, "speaker") for segment in segments):
+        return format_diarized_transcript(segments)
+    return get_field(response, "text", "")
+
+
+def get_chunk_segments(response) -> list[dict]:
+    """
+    Timed segments of one chunk's transcription, in milliseconds from the chunk start.
+
+    Diarized and whisper-1 verbose_json responses carry their own segments.
+    Responses without any (gpt-4o-transcribe) are split into sentences
+    with no times; place_segments spreads them over the chunk.
+    """
+    segments = get_field(response, "segments") or []
+    if not segments:
+        sentences = re.split(r"(?<=[.!?])\s+", get_field(response, "text", "").strip())
+        return [
+            {"start_ms": None, "end_ms": None, "speaker": None, "text": sentence}
+            for sentence in sentences if sentence
+        ]
+    return [
+        {
+            "start_ms": round(get_field(segment, "start", 0) * 1000),
+            "end_ms": round(get_field(segment, "end", 0) * 1000),
+            "speaker": get_field(segment, "speaker"),
+            "text": get_field(segment, "text", "").strip(),
+        }
+        for segment in segments
+    ]
+
+
+def place_segments(
+    chunk_segments: list[list[dict]],
+    chunk_paths: list[Path],
+    chunk_offsets: dict[str, tuple[int, int]],
+    time_maps: dict[str, list[tuple[int, int]]] | None = None,
+) -> list[dict]:
+    """
+    Put every chunk's segments on the source recording's timeline using the chunk plan.
+
+    Untimed segments share out their chunk's span in proportion to their
+    length and are marked approximate. Times stay None for chunks that
+    aren't in a chunk plan. Timed segments of chunks with a time map
+    (see read_time_maps) are mapped through it, past the trimmed pauses.
+    """
+    time_maps = time_maps or {}
+    placed = []
+    for i, (segments, path) in enumerate(zip(chunk_segments, chunk_paths)):
+        chunk_start_ms, chunk_end_ms = chunk_offsets.get(path.name, (None, None))
+        time_map = time_maps.get(path.name)
+        total_chars = sum(len(segment["text"]) for segment in segments if segment["start_ms"] is None)
+        chars_before = 0
+        for segment in segments:
+            start_ms, end_ms = segment["start_ms"], segment["end_ms"]
+            approximate = start_ms is None
+            if chunk_start_ms is None:
+                start_ms = end_ms = None
+            elif approximate:
+                span = chunk_end_ms - chunk_start_ms
+                start_ms = chunk_start_ms + span * chars_before // max(total_chars, 1)
+                chars_before += len(segment["text"])
+                end_ms = chunk_start_ms + span * chars_before // max(total_chars, 1)
+            elif time_map is not None:
+                start_ms, end_ms = to_source_ms(time_map, start_ms), to_source_ms(time_map, end_ms, end=True)
+            else:
+                start_ms, end_ms = chunk_start_ms + start_ms, chunk_start_ms + end_ms
+            placed.append({
+                **segment, "start_ms": start_ms, "end_ms": end_ms, "chunk": i, "approximate": approximate,
+            })
+    return placed
+
+
+def write_segments(path: Path, segments: list[dict]) -> None:
+    """Save segments as JSON Lines: chunk, start_ms, end_ms, speaker, approximate and text per line."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        for segment in segments:
+            line = {key: segment[key] for key in ("chunk", "start_ms", "end_ms", "speaker", "approximate", "text")}
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    os.replace(temp_path, path)
+
+
+def format_diarized_transcript(segments: list) -> str:
+    """Format diarized segments into readable text."""
+    lines = []
+    current_speaker = None
+    current_text = []
+
+    for segment in segments:
+        speaker = get_field(segment, "speaker") or "Unknown"
+        text = get_field(segment, "text", "").strip()
+
+        if speaker != current_speaker:
+            if current_text:
+                lines.append(f"[{current_speaker}]: {' '.join(current_text)}")
+            current_speaker = speaker
+            current_text = [text] if text else []
+        else:
             if text:
                 current_text.append(text)
 
@@ -251,185 +1968,933 @@ def format_diarized_transcript(segments: list) -> str:
     return "\n\n".join(lines)
 
 
-def split_text_into_chunks(text: str, max_chars: int = 8000) -> list[str]:
-    """Split text into smaller chunks for processing."""
-    words = text.split()
-    chunks = []
-    current_chunk = []
-    current_length = 0
-
-    for word in words:
-        if current_length + len(word) + 1 > max_chars:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = [word]
-            current_length = len(word)
-        else:
-            current_chunk.append(word)
-            current_length += len(word) + 1
+def cut_bridge(first: Path, second: Path, first_start_ms: int, second_ms: int, path: Path) -> Path:
+    """Join the end of one chunk (from first_start_ms) and the first second_ms of the next into a 16kHz mono WAV."""
+    subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-nostdin", "-y",
+            "-ss", f"{first_start_ms / 1000:.3f}", "-i", str(first),
+            "-t", f"{second_ms / 1000:.3f}", "-i", str(second),
+            "-filter_complex",
+            "[0:a]aresample=16000,aformat=sample_fmts=s16:channel_layouts=mono[a];"
+            "[1:a]aresample=16000,aformat=sample_fmts=s16:channel_layouts=mono[b];"
+            "[a][b]concat=n=2:v=0:a=1",
+            *BITEXACT_ARGS,
+            "-f", "wav",
+            str(path),
+        ],
+        capture_output=True,
+        check=True,
+    )
+    return path
 
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
 
-    return chunks
+def get_speaker_overlaps(
+    segments: list[dict],
+    bridge_segments: list[dict],
+    offset_ms: int,
+    start_ms: int,
+    end_ms: int,
+) -> dict[tuple[str, str], int]:
+    """
+    Milliseconds each (bridge speaker, chunk speaker) pair spend talking at the same time.
 
+    Bridge segment times are shifted by offset_ms onto the chunk's timeline,
+    and only the part of the bridge between start_ms and end_ms on that
+    timeline counts. Segments are in the form of get_chunk_segments.
+    """
+    overlaps = {}
+    for bridge_segment in bridge_segments:
+        bridge_start_ms = max(bridge_segment["start_ms"] + offset_ms, start_ms)
+        bridge_end_ms = min(bridge_segment["end_ms"] + offset_ms, end_ms)
+        if bridge_segment["speaker"] is None or bridge_end_ms <= bridge_start_ms:
+            continue
+        for segment in segments:
+            if segment["speaker"] is None or segment["start_ms"] is None:
+                continue
+            overlap = min(bridge_end_ms, segment["end_ms"]) - max(bridge_start_ms, segment["start_ms"])
+            if overlap > 0:
+                key = (bridge_segment["speaker"], segment["speaker"])
+                overlaps[key] = overlaps.get(key, 0) + overlap
+    return overlaps
+
+
+def match_speakers(
+    previous: dict[tuple[str, str], int],
+    current: dict[tuple[str, str], int],
+) -> dict[str, str]:
+    """
+    Pair the current chunk's speakers with the previous chunk's through a boundary bridge.
 
-def translate_text(text: str, client: OpenAI) -> str:
-    """Translate text to English using GPT-4o."""
-    print("Translating transcript to English...", flush=True)
+    previous and current are the get_speaker_overlaps of each chunk with the
+    bridge. A bridge speaker who mostly overlaps speaker a before the cut and
+    speaker b after it links b to a. The strongest links win and each
+    speaker is matched at most once. Returns {current speaker: previous speaker}.
+    """
+    def strongest(overlaps: dict[tuple[str, str], int]) -> dict[str, tuple[str, int]]:
+        best = {}
+        for (bridge_speaker, speaker), overlap in sorted(overlaps.items()):
+            if overlap >= MIN_SPEAKER_OVERLAP_MS and overlap > best.get(bridge_speaker, (None, 0))[1]:
+                best[bridge_speaker] = (speaker, overlap)
+        return best
+
+    before, after = strongest(previous), strongest(current)
+    links = sorted(
+        (
+            (min(before[bridge_speaker][1], after[bridge_speaker][1]), after[bridge_speaker][0], before[bridge_speaker][0])
+            for bridge_speaker in before.keys() & after.keys()
+        ),
+        reverse=True,
+    )
+    matches = {}
+    for _, speaker, previous_speaker in links:
+        if speaker not in matches and previous_speaker not in matches.values():
+            matches[speaker] = previous_speaker
+    return matches
 
-    # Split into smaller pieces to avoid output truncation
-    text_chunks = split_text_into_chunks(text, max_chars=8000)
-    translated_parts = []
 
-    for i, chunk in enumerate(text_chunks):
-        if len(text_chunks) > 1:
-            print(f"  Translating part {i+1}/{len(text_chunks)}...", flush=True)
+def assign_speakers(segments: list[dict], matches: dict[str, str], speakers: list[str]) -> dict[str, str]:
+    """
+    Map a chunk's speaker labels onto the recording's speakers.
 
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a professional medical translator. Translate the following Turkish therapy session transcript to English.
+    matches holds the labels already linked to a known speaker. If exactly
+    one label is left over and exactly one known speaker hasn't been heard
+    in the chunk, they are taken to be the same person. Any other label is a
+    new speaker and is appended to speakers (A, B, C... in order of first
+    appearance).
+    """
+    labels = dict(matches)
+    unmatched = []
+    for segment in segments:
+        speaker = segment["speaker"]
+        if speaker is not None and speaker not in labels and speaker not in unmatched:
+            unmatched.append(speaker)
+    unheard = [speaker for speaker in speakers if speaker not in labels.values()]
+    if len(unmatched) == 1 and len(unheard) == 1:
+        labels[unmatched.pop()] = unheard[0]
+    for speaker in unmatched:
+        n = len(speakers)
+        speakers.append(chr(ord("A") + n) if n < 26 else f"S{n + 1}")
+        labels[speaker] = speakers[-1]
+    return labels
+
+
+class SpeakerReconciler:
+    """
+    Give diarized chunks one set of speaker labels for the whole recording.
+
+    The diarization model labels speakers per request, so "A" in one chunk
+    may be "B" in the next. For every chunk boundary a bridge clip, made of
+    the last bridge_ms of one chunk and the first bridge_ms of the next, is
+    diarized on pool as soon as the reconciler is created. Speakers the
+    bridge hears on both sides of the cut are the same person (see
+    match_speakers); the rest are placed by assign_speakers.
+    """
 
-CONTEXT: This is the patient's own recording of their therapy session, being translated for their personal medical records. The patient has full consent and ownership of this content.
+    def __init__(
+        self,
+        client: OpenAI,
+        chunk_paths: list[Path],
+        pool: ThreadPoolExecutor,
+        cache: ResultCache | None = None,
+        bridge_ms: int = DIARIZE_BRIDGE_MS,
+    ):
+        self.chunk_paths = chunk_paths
+        self.bridge_ms = bridge_ms
+        self.speakers = []
+        self.temp_dir = Path(tempfile.mkdtemp(prefix="audio-chunker-bridges-"))
+        self._labels = {}
+        self._lock = threading.RLock()
+        self._bridges = [
+            pool.submit(self._diarize_bridge, client, i, cache)
+            for i in range(1, len(chunk_paths))
+        ]
+
+    def _diarize_bridge(self, client: OpenAI, i: int, cache: ResultCache | None) -> dict:
+        """Cut and diarize the bridge over the boundary in front of chunk i."""
+        previous_ms = probe_audio(self.chunk_paths[i - 1])["duration_ms"]
+        tail_ms = min(self.bridge_ms, previous_ms)
+        path = cut_bridge(
+            self.chunk_paths[i - 1], self.chunk_paths[i], previous_ms - tail_ms, self.bridge_ms,
+            self.temp_dir / f"bridge_{i:03d}.wav",
+        )
+        with metrics.span("speaker_bridge", chunk=i):
+            response = call_with_retries(transcribe_chunk, client, path, "whisper-1", True, cache=cache)
+        return {"segments": get_chunk_segments(response), "previous_ms": previous_ms, "tail_ms": tail_ms}
+
+    def relabel(self, i: int, chunk_segments: Callable[[int], list[dict]]) -> list[dict]:
+        """
+        Chunk i's segments with the recording's speaker labels.
+
+        chunk_segments(j) returns chunk j's own segments; labels depend on
+        every earlier chunk, so it may be called for any j up to i.
+        """
+        labels = self._get_labels(i, chunk_segments)
+        return [{**segment, "speaker": labels.get(segment["speaker"])} for segment in chunk_segments(i)]
+
+    def _get_labels(self, i: int, chunk_segments: Callable[[int], list[dict]]) -> dict[str, str]:
+        with self._lock:
+            if i not in self._labels:
+                matches = {}
+                if i > 0:
+                    previous_labels = self._get_labels(i - 1, chunk_segments)
+                    try:
+                        bridge = self._bridges[i - 1].result()
+                    except Exception as e:
+                        print(f"  Couldn't diarize the boundary before chunk {i + 1}: {e}", flush=True)
+                    else:
+                        before = get_speaker_overlaps(
+                            chunk_segments(i - 1), bridge["segments"],
+                            bridge["previous_ms"] - bridge["tail_ms"],
+                            bridge["previous_ms"] - bridge["tail_ms"], bridge["previous_ms"],
+                        )
+                        after = get_speaker_overlaps(
+                            chunk_segments(i), bridge["segments"], -bridge["tail_ms"], 0, self.bridge_ms,
+                        )
+                        matches = {
+                            speaker: previous_labels[previous_speaker]
+                            for speaker, previous_speaker in match_speakers(before, after).items()
+                        }
+                self._labels[i] = assign_speakers(chunk_segments(i), matches, self.speakers)
+            return self._labels[i]
+
+    def close(self) -> None:
+        for bridge in self._bridges:
+            bridge.cancel()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+@functools.cache
+def get_tokenizer() -> "tiktoken.Encoding | None":
+    """GPT-4o's tokenizer, or None if tiktoken can't load it (the encoding is downloaded on first use)."""
+    try:
+        return tiktoken.get_encoding(GPT_ENCODING)
+    except Exception as e:
+        print(f"Warning: couldn't load the {GPT_ENCODING} tokenizer ({e.__class__.__name__}), estimating token counts", flush=True)
+        return None
 
-INSTRUCTIONS:
-1. Translate ALL content faithfully and completely - do not skip, summarize, or censor anything
-2. Preserve all formatting including speaker labels like **Me:** and **Therapist:**
-3. Keep the same structure and paragraph breaks
-4. This is legitimate medical documentation - translate everything as-is
-5. Output only the complete translation, nothing else""",
-                    },
-                    {"role": "user", "content": chunk},
-                ],
-            )
-            result = response.choices[0].message.content
 
-            # Check for actual refusals (starts with refusal phrase)
-            refusal_phrases = ["I can't assist", "I cannot assist", "I'm not able", "I am not able", "I'm sorry, but I can't", "I cannot help"]
-            is_refusal = any(result.strip().startswith(phrase) for phrase in refusal_phrases) if result else True
+def count_tokens(text: str) -> int:
+    """GPT-4o tokens in text; estimated from its UTF-8 length when the tokenizer is unavailable."""
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        # About 3 bytes per token for Turkish, fewer tokens than that for English
+        return -(-len(text.encode()) // 3)
+    return len(tokenizer.encode(text, disallowed_special=()))
 
-            if result and not is_refusal:
-                translated_parts.append(result)
-            else:
-                print(f"  Warning: GPT refused translation, keeping original", flush=True)
-                translated_parts.append(chunk)
 
-        except Exception as e:
-            print(f"  Error translating part: {e}", flush=True)
-            translated_parts.append(chunk)
+def split_text_units(text: str, max_tokens: int) -> list[tuple[str, str, int]]:
+    """
+    Break text into the pieces batches are packed from, as (separator, text, tokens).
+
+    Paragraphs (speaker turns in diarized and formatted transcripts) are kept
+    whole; one over max_tokens is broken into sentences, and a sentence over
+    max_tokens into runs of words. separator is what joins a piece to the
+    one before it; tokens include one for it.
+    """
+    max_tokens -= 1
+    units = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        separator = "\n\n"
+        tokens = count_tokens(paragraph)
+        if tokens <= max_tokens:
+            if paragraph:
+                units.append((separator, paragraph, tokens + 1))
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            tokens = count_tokens(sentence)
+            if tokens <= max_tokens:
+                units.append((separator, sentence, tokens + 1))
+                separator = " "
+                continue
+            words = []
+            for word in sentence.split():
+                if words and count_tokens(" ".join(words + [word])) > max_tokens:
+                    units.append((separator, " ".join(words), count_tokens(" ".join(words)) + 1))
+                    separator = " "
+                    words = []
+                words.append(word)
+            units.append((separator, " ".join(words), count_tokens(" ".join(words)) + 1))
+            separator = " "
+    return units
+
+
+def pack_text_units(units: list[tuple[str, str, int]], max_tokens: int) -> list[list[tuple[str, str, int]]]:
+    """Group units in order into as few batches of at most max_tokens as possible."""
+    batches = []
+    batch_tokens = 0
+    for unit in units:
+        if not batches or batch_tokens + unit[2] > max_tokens:
+            batches.append([])
+            batch_tokens = 0
+        batches[-1].append(unit)
+        batch_tokens += unit[2]
+    return batches
+
+
+def join_text_units(units: list[tuple[str, str, int]]) -> str:
+    return "".join((separator if i else "") + text for i, (separator, text, _) in enumerate(units))
+
+
+def plan_text_batches(text: str, max_tokens: int = GPT_BATCH_TOKENS) -> list[str]:
+    """
+    Split text into as few GPT requests of at most max_tokens as it takes, without breaking sentences.
+
+    Batches are filled to about the same size, so no small tail ends up in
+    a request of its own.
+    """
+    units = split_text_units(text, max_tokens)
+    if not units:
+        return []
+    # Smallest batch size that still needs no more batches than packing them full
+    count = len(pack_text_units(units, max_tokens))
+    low, high = -(-sum(unit[2] for unit in units) // count), max_tokens
+    while low < high:
+        middle = (low + high) // 2
+        if len(pack_text_units(units, middle)) <= count:
+            high = middle
+        else:
+            low = middle + 1
+    return [join_text_units(batch) for batch in pack_text_units(units, low)]
+
+
+def split_leftover(text: str, max_tokens: int = GPT_BATCH_TOKENS) -> tuple[str, str]:
+    """
+    Split text into whole batches and a short leftover to go with the text that follows it.
+
+    Batches are packed full; when the last one comes out under half of
+    max_tokens it is returned as the leftover instead of becoming a small
+    request of its own. Returns (text to process now, leftover).
+    """
+    batches = pack_text_units(split_text_units(text, max_tokens), max_tokens)
+    if len(batches) > 1 and sum(unit[2] for unit in batches[-1]) < max_tokens / 2:
+        return join_text_units([unit for batch in batches[:-1] for unit in batch]), join_text_units(batches[-1])
+    return text, ""
+
+
+def is_refusal(result: str | None) -> bool:
+    """Check whether a GPT response is empty or an actual refusal (starts with a refusal phrase)."""
+    if not result:
+        return True
+    return any(result.strip().startswith(phrase) for phrase in REFUSAL_PHRASES)
+
+
+def map_parts(func: Callable[[str], str], parts: list[str], pool: ThreadPoolExecutor | None = None) -> list[str]:
+    """Apply func to every text part, fanning out over pool if given, keeping the input order."""
+    if pool is None or len(parts) <= 1:
+        return [func(part) for part in parts]
+    return list(pool.map(func, parts))
+
+
+@metrics.span("translation", model="gpt-4o")
+def translate_part(
+    chunk: str, client: OpenAI, cache: ResultCache | None = None, output_tokens: int = GPT_OUTPUT_TOKENS,
+) -> str:
+    """Translate one text part, keeping the original on refusal or error; a truncated reply is redone in halves."""
+    if cache is not None:
+        key = ResultCache.make_key("chat/completions", "gpt-4o", TRANSLATE_PROMPT, chunk)
+        cached = cache.get(key)
+        if cached is not None:
+            metrics.add(cached=1)
+            return cached
+
+    try:
+        response = call_with_retries(
+            client.chat.completions.create,
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": TRANSLATE_PROMPT},
+                {"role": "user", "content": chunk},
+            ],
+            max_tokens=output_tokens,
+        )
+        metrics.add_usage(response)
+        result = response.choices[0].message.content
+        if response.choices[0].finish_reason == "length":
+            # Hit the output limit; redo the part as two smaller requests
+            halves = plan_text_batches(chunk, count_tokens(chunk) // 2 + 1)
+            if len(halves) > 1:
+                print("  Warning: translation was cut off, translating the part in halves", flush=True)
+                return "\n\n".join(translate_part(half, client, cache, output_tokens) for half in halves)
+
+        if not is_refusal(result):
+            if cache is not None:
+                cache.set(key, result)
+            return result
+        print(f"  Warning: GPT refused translation, keeping original", flush=True)
+        return chunk
+
+    except Exception as e:
+        print(f"  Error translating part: {e}", flush=True)
+        return chunk
+
+
+def translate_text(
+    text: str,
+    client: OpenAI,
+    pool: ThreadPoolExecutor | None = None,
+    cache: ResultCache | None = None,
+    max_tokens: int = GPT_BATCH_TOKENS,
+    output_tokens: int = GPT_OUTPUT_TOKENS,
+) -> str:
+    """Translate text to English using GPT-4o, parts of up to max_tokens (output_tokens out) in parallel on pool if given."""
+    print("Translating transcript to English...", flush=True)
 
+    # Split into smaller pieces to avoid output truncation
+    text_chunks = plan_text_batches(text, max_tokens)
+    if len(text_chunks) > 1:
+        print(f"  Translating {len(text_chunks)} parts...", flush=True)
+
+    translated_parts = map_parts(lambda chunk: translate_part(chunk, client, cache, output_tokens), text_chunks, pool)
     return "\n\n".join(translated_parts)
 
 
-def format_conversation(text: str, client: OpenAI) -> str:
-    """Fix grammar and format as a 2-person conversation using GPT-4o."""
+@metrics.span("formatting", model="gpt-4o")
+def format_part(
+    chunk: str, client: OpenAI, cache: ResultCache | None = None, output_tokens: int = GPT_OUTPUT_TOKENS,
+) -> str:
+    """Format one text part as conversation, falling back to the raw text on refusal or error; a truncated reply is redone in halves."""
+    if cache is not None:
+        key = ResultCache.make_key("chat/completions", "gpt-4o", FORMAT_PROMPT, chunk)
+        cached = cache.get(key)
+        if cached is not None:
+            metrics.add(cached=1)
+            return cached
+
+    try:
+        response = call_with_retries(
+            client.chat.completions.create,
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": FORMAT_PROMPT},
+                {"role": "user", "content": chunk},
+            ],
+            max_tokens=output_tokens,
+        )
+        metrics.add_usage(response)
+        result = response.choices[0].message.content
+        if response.choices[0].finish_reason == "length":
+            # Hit the output limit; redo the part as two smaller requests
+            halves = plan_text_batches(chunk, count_tokens(chunk) // 2 + 1)
+            if len(halves) > 1:
+                print("  Warning: formatted part was cut off, formatting it in halves", flush=True)
+                return "\n\n".join(format_part(half, client, cache, output_tokens) for half in halves)
+
+        if not is_refusal(result):
+            if cache is not None:
+                cache.set(key, result)
+            return result
+        # Fallback: return raw text with basic formatting
+        print("  Warning: GPT refused, using raw text", flush=True)
+        return f"**[Raw transcript]:**\n{chunk}"
+
+    except Exception as e:
+        print(f"  Error processing part: {e}", flush=True)
+        return f"**[Raw transcript]:**\n{chunk}"
+
+
+def format_conversation(
+    text: str,
+    client: OpenAI,
+    pool: ThreadPoolExecutor | None = None,
+    cache: ResultCache | None = None,
+    max_tokens: int = GPT_BATCH_TOKENS,
+    output_tokens: int = GPT_OUTPUT_TOKENS,
+) -> str:
+    """Fix grammar and format as a 2-person conversation using GPT-4o, parts of up to max_tokens in parallel on pool if given."""
     print("Formatting as conversation and fixing grammar...", flush=True)
 
     # Split into smaller pieces to avoid output truncation
-    text_chunks = split_text_into_chunks(text, max_chars=8000)
-    formatted_parts = []
+    text_chunks = plan_text_batches(text, max_tokens)
+    if len(text_chunks) > 1:
+        print(f"  Processing {len(text_chunks)} parts...", flush=True)
+
+    formatted_parts = map_parts(lambda chunk: format_part(chunk, client, cache, output_tokens), text_chunks, pool)
+    return "\n\n".join(formatted_parts)
 
-    for i, chunk in enumerate(text_chunks):
-        if len(text_chunks) > 1:
-            print(f"  Processing part {i+1}/{len(text_chunks)}...", flush=True)
 
+def parse_turns(content: str | None) -> list[dict] | None:
+    """Speaker turns from a FORMAT_TRANSLATE_SCHEMA response, or None if it is malformed, empty or a refusal."""
+    try:
+        turns = json.loads(content or "")["turns"]
+    except (ValueError, TypeError, KeyError):
+        return None
+    if not turns or not all(
+        isinstance(turn, dict)
+        and turn.get("speaker") in ("Me", "Therapist")
+        and isinstance(turn.get("original"), str)
+        and isinstance(turn.get("english"), str)
+        and not is_refusal(turn["english"])
+        for turn in turns
+    ):
+        return None
+    return turns
+
+
+def render_turns(turns: list[dict], language: str) -> str:
+    """Speaker turns as **Me:**/**Therapist:** paragraphs, in "original" or "english"."""
+    return "\n\n".join(f"**{turn['speaker']}:** {turn[language]}" for turn in turns)
+
+
+@metrics.span("format_translate", model="gpt-4o")
+def format_translate_part(
+    chunk: str, client: OpenAI, cache: ResultCache | None = None, output_tokens: int = GPT_OUTPUT_TOKENS,
+) -> tuple[str, str]:
+    """
+    Format and translate one text part in a single request, returning (formatted, translated).
+
+    A refused or malformed reply falls back to format_part and then
+    translate_part; a truncated one is redone in halves.
+    """
+    key = ResultCache.make_key("chat/completions", "gpt-4o", FORMAT_TRANSLATE_PROMPT, chunk)
+    content = cache.get(key) if cache is not None else None
+    if content is not None:
+        metrics.add(cached=1)
+    else:
         try:
-            response = client.chat.completions.create(
+            response = call_with_retries(
+                client.chat.completions.create,
                 model="gpt-4o",
                 messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a professional medical transcriptionist formatting a therapy session transcript.
-
-CONTEXT: This is the patient's own recording of their therapy session, being formatted for their personal medical records. The patient has full consent and ownership of this content.
-
-SPEAKER IDENTIFICATION RULES:
-- **Me:** = the PATIENT sharing personal experiences, struggles, relationships, feelings, life events
-- **Therapist:** = the PROFESSIONAL who listens, asks questions, reflects, provides guidance
-
-The therapist would NEVER share personal stories, relationships, or say things like "I broke up with someone."
-The therapist WOULD ask questions, validate feelings, provide observations, schedule appointments.
-
-YOUR TASK:
-1. PRESERVE ALL CONTENT completely - do not summarize, skip, or censor anything
-2. Identify speakers based on CONTENT (who shares personal stories vs who asks questions)
-3. Fix grammar, spelling, and transcription errors
-4. Combine fragmented sentences
-5. Format as:
-   **Me:** [patient's words]
-   **Therapist:** [therapist's words]
-6. This is legitimate medical documentation - process everything faithfully
-7. Output ONLY the complete formatted conversation""",
-                    },
+                    {"role": "system", "content": FORMAT_TRANSLATE_PROMPT},
                     {"role": "user", "content": chunk},
                 ],
+                response_format=FORMAT_TRANSLATE_SCHEMA,
+                max_tokens=output_tokens,
             )
-            result = response.choices[0].message.content
+        except Exception as e:
+            print(f"  Error processing part: {e}", flush=True)
+            return f"**[Raw transcript]:**\n{chunk}", chunk
+        metrics.add_usage(response)
+        if response.choices[0].finish_reason == "length":
+            # Hit the output limit; redo the part as two smaller requests
+            halves = plan_text_batches(chunk, count_tokens(chunk) // 2 + 1)
+            if len(halves) > 1:
+                print("  Warning: formatted part was cut off, formatting it in halves", flush=True)
+                results = [format_translate_part(half, client, cache, output_tokens) for half in halves]
+                return "\n\n".join(r[0] for r in results), "\n\n".join(r[1] for r in results)
+        message = response.choices[0].message
+        content = None if getattr(message, "refusal", None) else message.content
+
+    turns = parse_turns(content)
+    if turns is None:
+        print("  Warning: GPT refused the combined request, formatting and translating separately", flush=True)
+        formatted = format_part(chunk, client, cache, output_tokens)
+        return formatted, translate_part(formatted, client, cache, output_tokens)
+    if cache is not None:
+        cache.set(key, content)
+    return render_turns(turns, "original"), render_turns(turns, "english")
+
+
+def format_translate_conversation(
+    text: str,
+    client: OpenAI,
+    pool: ThreadPoolExecutor | None = None,
+    cache: ResultCache | None = None,
+    max_tokens: int = GPT_BATCH_TOKENS,
+    output_tokens: int = GPT_OUTPUT_TOKENS,
+) -> tuple[str, str]:
+    """Format and translate text with one GPT-4o request per part (see format_translate_part), returning (formatted, translated)."""
+    print("Formatting as conversation and translating to English...", flush=True)
 
-            # Check for actual refusals (starts with refusal phrase)
-            refusal_phrases = ["I can't assist", "I cannot assist", "I'm not able", "I am not able", "I'm sorry, but I can't", "I cannot help"]
-            is_refusal = any(result.strip().startswith(phrase) for phrase in refusal_phrases) if result else True
+    text_chunks = plan_text_batches(text, max_tokens)
+    if len(text_chunks) > 1:
+        print(f"  Processing {len(text_chunks)} parts...", flush=True)
 
-            if result and not is_refusal:
-                formatted_parts.append(result)
-            else:
-                # Fallback: return raw text with basic formatting
-                print("  Warning: GPT refused, using raw text", flush=True)
-                formatted_parts.append(f"**[Raw transcript]:**\n{chunk}")
+    results = map_parts(lambda chunk: format_translate_part(chunk, client, cache, output_tokens), text_chunks, pool)
+    return "\n\n".join(r[0] for r in results), "\n\n".join(r[1] for r in results)
 
-        except Exception as e:
-            print(f"  Error processing part: {e}", flush=True)
-            formatted_parts.append(f"**[Raw transcript]:**\n{chunk}")
 
-    return "\n\n".join(formatted_parts)
+class JobManifest:
+    """
+    Resumable record of one transcription job, stored as JSON next to the output.
 
+    Holds the chunk plan, each chunk's content hash and the result of every
+    stage it has completed (see STAGES). The file is
+    rewritten atomically after every completed stage, so a crash never loses
+    finished work.
+    """
 
-def transcribe_chunks(
+    STAGES = ("segments", "transcribed", "formatted", "translated")
+
+    def __init__(self, path: Path, data: dict):
+        self.path = path
+        self.data = data
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def path_for(output: Path) -> Path:
+        return output.with_name(f"{output.name}.manifest.json")
+
+    @classmethod
+    def load(cls, path: Path) -> "JobManifest | None":
+        if not path.exists():
+            return None
+        return cls(path, json.loads(path.read_text()))
+
+    @classmethod
+    def create(cls, path: Path, input_path: Path, options: dict, source_hash: str | None = None) -> "JobManifest":
+        return cls(path, {
+            "version": 1,
+            "input": str(input_path.resolve()),
+            "source_hash": source_hash or cls.source_hash(input_path),
+            "options": options,
+            "chunks": [],
+        })
+
+    @staticmethod
+    def source_hash(input_path: Path) -> str | None:
+        """Hash of the recording a job was started from; chunk directories have none."""
+        return hash_file(input_path) if input_path.is_file() else None
+
+    @property
+    def options(self) -> dict:
+        return self.data["options"]
+
+    @property
+    def chunk_plan(self) -> list[tuple[int, int]] | None:
+        """The recorded (start_ms, end_ms) of every chunk, if the job was chunked from a recording."""
+        chunks = self.data["chunks"]
+        if not chunks or any(chunk.get("start_ms") is None for chunk in chunks):
+            return None
+        return [(chunk["start_ms"], chunk["end_ms"]) for chunk in chunks]
+
+    def set_chunks(self, chunk_paths: list[Path], offsets: dict[str, tuple[int, int]]) -> None:
+        """Record the current chunks, keeping completed stages only for chunks whose bytes are unchanged."""
+        previous = self.data["chunks"]
+        chunks = []
+        for i, path in enumerate(chunk_paths):
+            digest = hash_file(path)
+            start_ms, end_ms = offsets.get(path.name, (None, None))
+            stages = {}
+            if i < len(previous) and previous[i]["hash"] == digest:
+                stages = previous[i]["stages"]
+            chunks.append({
+                "index": i,
+                "file": path.name,
+                "start_ms": start_ms,
+                "end_ms": end_ms,
+                "hash": digest,
+                "stages": stages,
+            })
+        with self._lock:
+            self.data["chunks"] = chunks
+            self._save()
+
+    def result(self, index: int, stage: str) -> str | None:
+        with self._lock:
+            return self.data["chunks"][index]["stages"].get(stage)
+
+    def complete(self, index: int, stage: str, result: str) -> None:
+        with self._lock:
+            self.data["chunks"][index]["stages"][stage] = result
+            self._save()
+
+    def remove(self) -> None:
+        """Delete the manifest once the transcript is written; it is only needed to resume."""
+        self.path.unlink(missing_ok=True)
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f"{self.path.name}.tmp")
+        temp_path.write_text(json.dumps(self.data, indent=2, ensure_ascii=False))
+        os.replace(temp_path, self.path)
+
+
+def run_transcript_pipeline(
+    client: OpenAI,
     chunk_paths: list[Path],
     model: str,
-    diarize: bool,
-    translate: bool = False,
-) -> str:
-    """Transcribe or translate all chunks and combine the results."""
-    client = OpenAI()  # Uses OPENAI_API_KEY env var
-
-    all_text = []
-    all_segments = []
-
-    action = "Translating" if translate else "Transcribing"
-    for i, path in enumerate(chunk_paths):
-        print(f"{action} chunk {i + 1}/{len(chunk_paths)}: {path.name}", flush=True)
-        response = transcribe_chunk(client, path, model, diarize, translate)
-
-        if diarize:
-            # diarized_json response has segments with speaker info
-            if hasattr(response, "segments"):
-                all_segments.extend(response.segments)
-            elif isinstance(response, dict) and "segments" in response:
-                all_segments.extend(response["segments"])
-            else:
-                # Fallback to text
-                all_text.append(response.text if hasattr(response, "text") else str(response))
-        else:
-            all_text.append(response.text if hasattr(response, "text") else str(response))
+    format: bool = False,
+    diarize: bool = False,
+    single_pass: bool = False,
+    concurrency: int = TRANSCRIBE_CONCURRENCY,
+    gpt_concurrency: int = GPT_CONCURRENCY,
+    batch_tokens: int = GPT_BATCH_TOKENS,
+    output_tokens: int = GPT_OUTPUT_TOKENS,
+    cache: ResultCache | None = None,
+    manifest: JobManifest | None = None,
+    transcribe_pool: ThreadPoolExecutor | None = None,
+    parts_pool: ThreadPoolExecutor | None = None,
+    on_chunk: Callable[[int, str], None] | None = None,
+    on_segments: Callable[[int, list[dict]], None] | None = None,
+) -> list[str]:
+    """
+    Transcribe chunks and, if format is set, format and translate them as a staged pipeline.
+
+    With diarize, chunks go to the diarization model and their text carries
+    speaker labels (see format_diarized_transcript); with several chunks the
+    labels are made consistent across them by a SpeakerReconciler.
+
+    Every chunk moves through transcribe -> format -> translate on its own as
+    soon as the previous stage finishes, so formatting of chunk N overlaps
+    with transcription of chunk N+1 and translation of chunk N overlaps with
+    formatting of chunk N+1. Text parts within a stage fan out over a shared
+    pool of gpt_concurrency workers, batch_tokens in and at most output_tokens
+    out per request; a short tail
+    of one chunk's text is formatted with the next chunk instead of on its
+    own (see split_leftover). With single_pass, format and translate are one
+    request per part (see format_translate_conversation), which records
+    both stages at once. Results are returned in chunk order.
+    With a manifest, stages it already records are skipped and every newly
+    finished stage is checkpointed. Pass transcribe_pool and parts_pool to
+    share one set of API workers between several recordings; concurrency
+    and gpt_concurrency should then be their sizes, as they also bound how
+    many chunks are in flight at once. on_chunk is called with the index
+    and final text of every chunk as soon as it is done, in completion order.
+    on_segments likewise gets each chunk's timed transcription segments (see
+    get_chunk_segments); they are checkpointed in the manifest as well.
+    """
+    if not chunk_paths:
+        return []
 
-    if diarize and all_segments:
-        return format_diarized_transcript(all_segments)
+    with ExitStack() as stack:
+        if transcribe_pool is None:
+            transcribe_pool = stack.enter_context(ThreadPoolExecutor(max_workers=max(concurrency, 1)))
+        if parts_pool is None:
+            parts_pool = stack.enter_context(ThreadPoolExecutor(max_workers=max(gpt_concurrency, 1)))
+        # A chunk in flight is either waiting on its upload or on a GPT-4o request
+        stage_pool = stack.enter_context(
+            ThreadPoolExecutor(max_workers=min(len(chunk_paths), max(concurrency, 1) + max(gpt_concurrency, 1)))
+        )
+
+        reconciler = None
+        if diarize and len(chunk_paths) > 1:
+            reconciler = SpeakerReconciler(client, chunk_paths, transcribe_pool, cache)
+            stack.callback(reconciler.close)
+        # Speaker reconciliation works from every chunk's own segments
+        keep_segments = on_segments is not None or reconciler is not None
+
+        pending = [
+            i for i in range(len(chunk_paths))
+            if manifest is None
+            or manifest.result(i, "transcribed") is None
+            or (keep_segments and manifest.result(i, "segments") is None)
+        ]
+        if manifest is not None and len(pending) < len(chunk_paths):
+            print(f"Resuming: {len(chunk_paths) - len(pending)} chunks already transcribed", flush=True)
+        futures = submit_transcriptions(
+            transcribe_pool, client, [chunk_paths[i] for i in pending], model, diarize=diarize, cache=cache,
+            timestamps=on_segments is not None,
+        )
+        transcriptions = dict(zip(pending, futures))
+
+        def run_stage(i: int, stage: str, func: Callable[[], str]) -> str:
+            if manifest is not None:
+                result = manifest.result(i, stage)
+                if result is not None:
+                    return result
+            result = func()
+            if manifest is not None:
+                manifest.complete(i, stage, result)
+            return result
+
+        def process(i: int) -> str:
+            chunk_transcript = finish_chunk(i)
+            if on_chunk is not None:
+                on_chunk(i, chunk_transcript)
+            return chunk_transcript
+
+        def chunk_segments(i: int) -> list[dict]:
+            return json.loads(run_stage(
+                i, "segments", lambda: json.dumps(get_chunk_segments(transcriptions[i].result())),
+            ))
+
+        def chunk_text(i: int) -> str:
+            if reconciler is not None:
+                return run_stage(
+                    i, "transcribed", lambda: format_diarized_transcript(reconciler.relabel(i, chunk_segments)),
+                )
+            return run_stage(i, "transcribed", lambda: get_response_text(transcriptions[i].result()))
+
+        split_locks = [threading.Lock() for _ in chunk_paths]
+        splits = {}
+
+        def split_chunk(i: int) -> tuple[str, str]:
+            """Chunk i's (text to format, leftover for chunk i + 1), worked out once per chunk."""
+            with split_locks[i]:
+                if i not in splits:
+                    leftover = split_chunk(i - 1)[1] if i > 0 else ""
+                    text = "\n\n".join(part for part in (leftover, chunk_text(i)) if part)
+                    splits[i] = split_leftover(text, batch_tokens) if i < len(chunk_paths) - 1 else (text, "")
+                return splits[i]
+
+        def format_input(i: int) -> str:
+            """Chunk i's text as formatted: the previous chunk's leftover, then its own text less its leftover."""
+            return split_chunk(i)[0]
+
+        def finish_chunk(i: int) -> str:
+            if on_segments is not None:
+                on_segments(i, reconciler.relabel(i, chunk_segments) if reconciler is not None else chunk_segments(i))
+            raw_text = chunk_text(i)
+            print(f"Transcribed chunk {i + 1}/{len(chunk_paths)}: {chunk_paths[i].name}", flush=True)
+            if not format:
+                return raw_text
+
+            fused = {}
+
+            def format_translate() -> str:
+                fused["formatted"], fused["translated"] = format_translate_conversation(
+                    format_input(i), client, parts_pool, cache, batch_tokens, output_tokens,
+                )
+                return fused["formatted"]
+
+            # Step 2: Format as conversation (and translate, in single-pass mode)
+            chunk_transcript = run_stage(
+                i, "formatted",
+                format_translate if single_pass
+                else lambda: format_conversation(
+                    format_input(i), client, parts_pool, cache, batch_tokens, output_tokens,
+                ),
+            )
+            # Step 3: Translate to English, unless the formatting request already did
+            chunk_transcript = run_stage(
+                i, "translated",
+                lambda: fused["translated"] if fused
+                else translate_text(chunk_transcript, client, parts_pool, cache, batch_tokens, output_tokens),
+            )
+            print(f"Finished chunk {i + 1}/{len(chunk_paths)}", flush=True)
+            return chunk_transcript
 
-    return "\n".join(all_text)
+        stages = [stage_pool.submit(process, i) for i in range(len(chunk_paths))]
+        return [stage.result() for stage in stages]
 
 
 def chunk_audio(
     input_path: Path,
     output_dir: Path,
     diarize: bool = False,
+    stream_threshold_ms: int | None = STREAM_THRESHOLD_MS,
+    export_mode: str = "copy",
+    upload_profile: str | None = None,
+    encoder_args: list[str] | None = None,
+    chunks: list[tuple[int, int]] | None = None,
+    min_silence_len: int = MIN_SILENCE_LEN,
+    silence_thresh: float = SILENCE_THRESH,
+    silence_maps: SilenceMapStore | None = None,
+    silence_key: str | None = None,
+    trim_silence_ms: int | None = None,
+    jobs: int = 1,
 ) -> list[Path]:
-    """Main function to chunk an audio file."""
+    """
+    Main function to chunk an audio file.
+
+    export_mode "copy" cuts chunks losslessly out of the source file;
+    "encode" re-encodes every chunk from the decoded audio. With an
+    upload_profile, the recording is first transcoded to that profile and
+    the transcoded file is chunked instead. Passing a previous chunk plan
+    as chunks skips decoding and silence analysis and just re-cuts it.
+    With silence_maps, the silence analysis is saved after the first run
+    and later runs on the same file plan chunks from it without decoding.
+    Maps are keyed on the original recording and upload profile (or on
+    silence_key when given), not on the transcoded file.
+    With trim_silence_ms, pauses longer than that are cut down first (see
+    chunk_audio_trimmed); chunks are then always re-encoded.
+    With jobs > 1, long recordings are decoded and scanned for silence in
+    windows on that many processes (see ParallelSilenceDetector).
+    A recording that already fits in one upload (see fits_upload) is
+    passed on whole, without decoding it, unless an upload_profile or the
+    "encode" export_mode asks for it to be re-encoded.
+    The plan is written next to the chunks (see write_chunk_plan).
+    """
+    info = probe_audio(input_path)
+    reencode = trim_silence_ms is not None or upload_profile is not None or export_mode == "encode"
+    if not reencode and fits_upload(input_path, info, diarize):
+        return use_whole_file(input_path, output_dir, info)
+
+    if silence_maps is not None and silence_key is None and chunks is None:
+        silence_key = SilenceMapStore.make_key(hash_file(input_path), upload_profile)
+
+    if upload_profile is not None:
+        profile = UPLOAD_PROFILES[upload_profile]
+        upload_dir = Path(tempfile.mkdtemp(prefix="audio-chunker-upload-"))
+        try:
+            print(f"Transcoding for upload ({upload_profile})...", flush=True)
+            with metrics.span("transcode", file=input_path.name, profile=upload_profile):
+                upload_path = transcode_for_upload(input_path, upload_dir, upload_profile)
+                metrics.add(bytes_read=input_path.stat().st_size, bytes_written=upload_path.stat().st_size)
+            upload_size_mb = upload_path.stat().st_size / 1024 / 1024
+            print(f"Transcoded: {upload_path.name} ({upload_size_mb:.2f} MB)", flush=True)
+            return chunk_audio(
+                upload_path,
+                output_dir,
+                diarize=diarize,
+                stream_threshold_ms=stream_threshold_ms,
+                export_mode=export_mode,
+                encoder_args=profile["encoder_args"],
+                chunks=chunks,
+                min_silence_len=min_silence_len,
+                silence_thresh=silence_thresh,
+                silence_maps=silence_maps,
+                silence_key=silence_key,
+                trim_silence_ms=trim_silence_ms,
+                jobs=jobs,
+            )
+        finally:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+
+    if trim_silence_ms is not None:
+        # A saved plan holds cuts on the source timeline, which can't be re-cut
+        # into compacted chunks; the silence map makes re-planning cheap, and
+        # bit-exact encoding gives the same chunks (and manifest hashes) again.
+        if silence_maps is not None and silence_key is None:
+            silence_key = SilenceMapStore.make_key(hash_file(input_path))
+        return chunk_audio_trimmed(
+            input_path, output_dir, trim_silence_ms,
+            diarize=diarize, encoder_args=encoder_args,
+            min_silence_len=min_silence_len, silence_thresh=silence_thresh,
+            silence_maps=silence_maps, silence_key=silence_key, jobs=jobs,
+        )
+
+    if chunks is not None and chunks[-1][0] >= info["duration_ms"]:
+        print("Chunk plan runs past the end of this recording, planning again", flush=True)
+        chunks = None
+
+    if chunks is not None:
+        print(f"Re-cutting {len(chunks)} planned chunks from: {input_path}", flush=True)
+        cuts = []
+        with metrics.span("export", file=input_path.name, mode=export_mode):
+            chunk_paths = export_chunks_from_file(
+                input_path, chunks, output_dir, get_format_from_path(input_path), input_path.stem,
+                copy=export_mode == "copy", encoder_args=encoder_args, cuts=cuts,
+            )
+        write_chunk_plan(output_dir, input_path, cuts, chunk_paths)
+        return chunk_paths
+
+    if silence_maps is not None:
+        if silence_key is None:
+            silence_key = SilenceMapStore.make_key(hash_file(input_path))
+        silence = silence_maps.load(silence_key, min_silence_len, silence_thresh)
+        if silence is not None:
+            return chunk_audio_from_silence_map(
+                input_path, output_dir, *silence,
+                diarize=diarize, export_mode=export_mode, encoder_args=encoder_args,
+            )
+
+    detector = make_silence_detector(
+        info, min_silence_len, silence_thresh, record=silence_maps is not None, jobs=jobs,
+    )
+    parallel = isinstance(detector, ParallelSilenceDetector)
+    if parallel or (stream_threshold_ms is not None and info["duration_ms"] > stream_threshold_ms):
+        # Decoding, silence detection, planning and export interleave, so they share one span
+        with metrics.span("stream_chunking", file=input_path.name, mode=export_mode, parallel=parallel):
+            metrics.add(bytes_read=input_path.stat().st_size)
+            chunk_paths = chunk_audio_streaming(
+                input_path, output_dir, info,
+                diarize=diarize, export_mode=export_mode, encoder_args=encoder_args,
+                detector=detector,
+            )
+        if silence_maps is not None:
+            silence_maps.save(
+                silence_key, detector.rms, info["frame_rate"], info["channels"],
+                detector.silent_ranges, min_silence_len, silence_thresh,
+            )
+        return chunk_paths
+
     print(f"Loading audio: {input_path}", flush=True)
-    audio = load_audio(input_path)
+    with metrics.span("decode", file=input_path.name):
+        audio = load_audio(input_path)
+        metrics.add(bytes_read=input_path.stat().st_size, audio_ms=len(audio))
     format = get_format_from_path(input_path)
 
     duration_sec = len(audio) / 1000
@@ -437,32 +2902,600 @@ def chunk_audio(
 
     # Calibrate size estimation
     print(f"Calibrating size estimation...", flush=True)
-    bytes_per_ms = calibrate_bytes_per_ms(audio, format)
-
-    print(f"Splitting at silence points (this may take a while for long files)...", flush=True)
-    segments = split_at_silence(audio)
-    print(f"Found {len(segments)} segments", flush=True)
+    with metrics.span("calibrate", file=input_path.name, mode=export_mode):
+        if export_mode == "copy":
+            bytes_per_ms = get_stream_bytes_per_ms(info)
+        else:
+            bytes_per_ms = get_encoded_bytes_per_ms(format, audio.frame_rate, audio.channels, encoder_args)
+            if bytes_per_ms is None:
+                bytes_per_ms = calibrate_bytes_per_ms(audio, format, encoder_args)
+
+    print(f"Splitting at silence points...", flush=True)
+    with metrics.span("silence_detection", file=input_path.name):
+        energies, counts = get_ms_energies(audio)
+        silent_ranges = detect_silence_ranges(
+            energies, counts, audio.sample_width,
+            min_silence_len=min_silence_len,
+            silence_thresh=silence_thresh,
+        )
+        if silence_maps is not None:
+            silence_maps.save(
+                silence_key, get_ms_rms(energies, counts, audio.sample_width), audio.frame_rate, audio.channels,
+                silent_ranges, min_silence_len, silence_thresh,
+            )
 
     # Set duration limit for diarization (API limit is 1400s)
     max_duration_ms = MAX_DIARIZE_DURATION_MS if diarize else None
     limit_msg = "max 25MB" if not diarize else "max 25MB / 21 min"
-    print(f"Combining segments into chunks ({limit_msg})...", flush=True)
-    chunks = combine_segments_to_chunks(segments, format, bytes_per_ms, max_duration_ms=max_duration_ms)
-    print(f"Created {len(chunks)} chunks", flush=True)
+    with metrics.span("planning", file=input_path.name):
+        segments = get_speech_segments(silent_ranges, len(audio))
+        print(f"Found {len(segments)} segments", flush=True)
+        print(f"Combining segments into chunks ({limit_msg})...", flush=True)
+        chunks = combine_segments_to_chunks(segments, bytes_per_ms, max_duration_ms=max_duration_ms)
+        print(f"Created {len(chunks)} chunks", flush=True)
 
     input_name = input_path.stem
-    chunk_paths = export_chunks(chunks, output_dir, format, input_name)
+    with metrics.span("export", file=input_path.name, mode=export_mode):
+        if export_mode == "copy":
+            cuts = []
+            chunk_paths = export_chunks_from_file(
+                input_path, chunks, output_dir, format, input_name, encoder_args=encoder_args, cuts=cuts,
+            )
+        else:
+            cuts = chunks
+            chunk_paths = export_chunks(audio, chunks, output_dir, format, input_name, encoder_args)
+
+    write_chunk_plan(output_dir, input_path, cuts, chunk_paths)
+    return chunk_paths
+
+
+def use_whole_file(input_path: Path, output_dir: Path, info: dict) -> list[Path]:
+    """Pass a recording that fits in one upload on as its only chunk, linked (or copied) into output_dir."""
+    size_mb = info["size_bytes"] / 1024 / 1024
+    print(
+        f"{input_path.name} fits in one upload ({size_mb:.2f} MB, {info['duration_ms'] / 1000:.1f} seconds), "
+        "sending it as is",
+        flush=True,
+    )
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"{input_path.stem}_chunk_000{input_path.suffix.lower()}"
+    path.unlink(missing_ok=True)
+    try:
+        os.link(input_path, path)
+    except OSError:
+        shutil.copyfile(input_path, path)
+    write_chunk_plan(output_dir, input_path, [(0, info["duration_ms"])], [path])
+    return [path]
+
+
+def chunk_audio_streaming(
+    input_path: Path,
+    output_dir: Path,
+    info: dict,
+    diarize: bool = False,
+    export_mode: str = "copy",
+    encoder_args: list[str] | None = None,
+    detector: StreamingSilenceDetector | ParallelSilenceDetector | None = None,
+) -> list[Path]:
+    """
+    Chunk an audio file without ever holding the full decoded recording in memory.
 
+    PCM is read from an ffmpeg pipe in fixed-size blocks, silence is detected
+    incrementally, and every chunk is cut from the source file as soon as its
+    end boundary is known.
+    """
+    format = get_format_from_path(input_path)
+    print(f"Streaming audio: {input_path}", flush=True)
+    print(f"Audio duration: {info['duration_ms'] / 1000:.1f} seconds", flush=True)
+
+    # Calibrate size estimation from a short sample at most
+    print(f"Calibrating size estimation...", flush=True)
+    if export_mode == "copy":
+        bytes_per_ms = get_stream_bytes_per_ms(info)
+    else:
+        bytes_per_ms = calibrate_file_bytes_per_ms(input_path, info, format, encoder_args)
+
+    max_duration_ms = MAX_DIARIZE_DURATION_MS if diarize else None
+    limit_msg = "max 25MB" if not diarize else "max 25MB / 21 min"
+    print(f"Splitting at silence points and planning chunks ({limit_msg})...", flush=True)
+
+    segments = stream_speech_ranges(input_path, info, detector=detector)
+    cuts = []
+    chunk_paths = export_chunks_from_file(
+        input_path,
+        iter_chunk_ranges(segments, bytes_per_ms, max_duration_ms=max_duration_ms),
+        output_dir, format, input_path.stem,
+        copy=export_mode == "copy", encoder_args=encoder_args, cuts=cuts,
+    )
+
+    print(f"Created {len(chunk_paths)} chunks", flush=True)
+    write_chunk_plan(output_dir, input_path, cuts, chunk_paths)
     return chunk_paths
 
 
+def chunk_audio_from_silence_map(
+    input_path: Path,
+    output_dir: Path,
+    silent_ranges: list[tuple[int, int]],
+    duration_ms: int,
+    diarize: bool = False,
+    export_mode: str = "copy",
+    encoder_args: list[str] | None = None,
+) -> list[Path]:
+    """Chunk an audio file using stored silent ranges; only a short sample is decoded for calibration."""
+    format = get_format_from_path(input_path)
+    print(f"Using saved silence map for: {input_path}", flush=True)
+    print(f"Audio duration: {duration_ms / 1000:.1f} seconds", flush=True)
+
+    print(f"Calibrating size estimation...", flush=True)
+    with metrics.span("calibrate", file=input_path.name, mode=export_mode):
+        info = probe_audio(input_path)
+        if export_mode == "copy":
+            bytes_per_ms = get_stream_bytes_per_ms(info)
+        else:
+            bytes_per_ms = calibrate_file_bytes_per_ms(input_path, info, format, encoder_args)
+
+    max_duration_ms = MAX_DIARIZE_DURATION_MS if diarize else None
+    limit_msg = "max 25MB" if not diarize else "max 25MB / 21 min"
+    with metrics.span("planning", file=input_path.name):
+        segments = get_speech_segments(silent_ranges, duration_ms)
+        print(f"Found {len(segments)} segments", flush=True)
+        print(f"Combining segments into chunks ({limit_msg})...", flush=True)
+        chunks = combine_segments_to_chunks(segments, bytes_per_ms, max_duration_ms=max_duration_ms)
+        print(f"Created {len(chunks)} chunks", flush=True)
+
+    cuts = []
+    with metrics.span("export", file=input_path.name, mode=export_mode):
+        chunk_paths = export_chunks_from_file(
+            input_path, chunks, output_dir, format, input_path.stem,
+            copy=export_mode == "copy", encoder_args=encoder_args, cuts=cuts,
+        )
+    write_chunk_plan(output_dir, input_path, cuts, chunk_paths)
+    return chunk_paths
+
+
+def chunk_audio_trimmed(
+    input_path: Path,
+    output_dir: Path,
+    min_pause_ms: int = TRIM_MIN_PAUSE_MS,
+    diarize: bool = False,
+    encoder_args: list[str] | None = None,
+    min_silence_len: int = MIN_SILENCE_LEN,
+    silence_thresh: float = SILENCE_THRESH,
+    silence_maps: SilenceMapStore | None = None,
+    silence_key: str | None = None,
+    jobs: int = 1,
+) -> list[Path]:
+    """
+    Chunk an audio file with every pause longer than min_pause_ms cut down to TRIM_GAP_MS.
+
+    Chunks are planned on the compacted timeline, so less audio is uploaded
+    and billed. Silence comes from the silence map if there is one and is
+    otherwise detected while streaming the file; each chunk is encoded as
+    soon as it is planned (stream copy can't join the kept stretches). The
+    chunk plan records each chunk's time map back to the source.
+    """
+    format = get_format_from_path(input_path)
+    info = probe_audio(input_path)
+    print(f"Trimming pauses longer than {min_pause_ms / 1000:g}s from: {input_path}", flush=True)
+
+    print(f"Calibrating size estimation...", flush=True)
+    with metrics.span("calibrate", file=input_path.name, mode="encode"):
+        bytes_per_ms = calibrate_file_bytes_per_ms(input_path, info, format, encoder_args)
+
+    silence = silence_maps.load(silence_key, min_silence_len, silence_thresh) if silence_maps is not None else None
+    detector = None
+    if silence is not None:
+        print("Using saved silence map", flush=True)
+        silent_ranges, duration_ms = silence
+        silent_ranges = [*silent_ranges, (duration_ms, duration_ms)]
+    else:
+        detector = make_silence_detector(
+            info, min_silence_len, silence_thresh, record=silence_maps is not None, jobs=jobs,
+        )
+        silent_ranges = stream_silent_ranges(input_path, info, detector)
+
+    max_duration_ms = MAX_DIARIZE_DURATION_MS if diarize else None
+    limit_msg = "max 25MB" if not diarize else "max 25MB / 21 min"
+    print(f"Splitting at silence points and planning chunks ({limit_msg})...", flush=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    time_map = []
+    segments = iter_speech_ranges(iter_trimmed_silence(silent_ranges, min_pause_ms, time_map))
+    cuts, chunk_maps, chunk_paths = [], [], []
+    kept_ms = 0
+    with metrics.span("stream_chunking", file=input_path.name, mode="trim"):
+        for start_ms, end_ms in iter_chunk_ranges(segments, bytes_per_ms, max_duration_ms=max_duration_ms):
+            chunk_map = get_chunk_time_map(time_map, start_ms, end_ms)
+            path = output_dir / f"{input_path.stem}_chunk_{len(chunk_paths):03d}.{format}"
+            export_trimmed_chunk(input_path, info, chunk_map, end_ms - start_ms, path, format, encoder_args)
+            cuts.append((chunk_map[0][1], to_source_ms(time_map, end_ms, end=True)))
+            chunk_maps.append(chunk_map)
+            chunk_paths.append(path)
+            kept_ms += end_ms - start_ms
+            metrics.add(bytes_written=path.stat().st_size, audio_ms=end_ms - start_ms)
+            print(f"Exported: {path} ({path.stat().st_size / 1024 / 1024:.2f} MB)", flush=True)
+
+    duration_ms = detector.duration_ms if detector is not None else silent_ranges[-1][1]
+    if detector is not None and silence_maps is not None:
+        silence_maps.save(
+            silence_key, detector.rms, info["frame_rate"], info["channels"],
+            detector.silent_ranges, min_silence_len, silence_thresh,
+        )
+    trimmed_ms = duration_ms - kept_ms
+    print(
+        f"Created {len(chunk_paths)} chunks; trimmed {trimmed_ms / 1000:.0f}s of "
+        f"{duration_ms / 1000:.0f}s ({trimmed_ms / max(duration_ms, 1):.0%})",
+        flush=True,
+    )
+    write_chunk_plan(output_dir, input_path, cuts, chunk_paths, chunk_maps)
+    return chunk_paths
+
+
+def write_chunk_plan(
+    output_dir: Path,
+    input_path: Path,
+    chunks: list[tuple[int, int]],
+    chunk_paths: list[Path],
+    time_maps: list[list[tuple[int, int]]] | None = None,
+) -> Path:
+    """
+    Record where each exported chunk was cut from its source recording.
+
+    Chunks of a compacted recording (see chunk_audio_trimmed) also get their
+    time map, (chunk_ms, source_ms) breakpoints back to the source.
+    """
+    plan = {
+        "source": input_path.name,
+        "chunks": [
+            {"file": path.name, "start_ms": start_ms, "end_ms": end_ms}
+            for path, (start_ms, end_ms) in zip(chunk_paths, chunks)
+        ],
+    }
+    if time_maps is not None:
+        for chunk, time_map in zip(plan["chunks"], time_maps):
+            chunk["time_map"] = time_map
+    plan_path = output_dir / f"{input_path.stem}{CHUNK_PLAN_SUFFIX}"
+    plan_path.write_text(json.dumps(plan, indent=2))
+    return plan_path
+
+
+def read_chunk_plan(directory: Path) -> dict[str, tuple[int, int]]:
+    """Map chunk file names to their (start_ms, end_ms) source offsets from any plan files in directory."""
+    offsets = {}
+    for plan_path in sorted(directory.glob(f"*{CHUNK_PLAN_SUFFIX}")):
+        for chunk in json.loads(plan_path.read_text())["chunks"]:
+            offsets[chunk["file"]] = (chunk["start_ms"], chunk["end_ms"])
+    return offsets
+
+
+def read_time_maps(directory: Path) -> dict[str, list[tuple[int, int]]]:
+    """Map chunk file names to their time maps, for chunks of compacted recordings in any plan files in directory."""
+    time_maps = {}
+    for plan_path in sorted(directory.glob(f"*{CHUNK_PLAN_SUFFIX}")):
+        for chunk in json.loads(plan_path.read_text())["chunks"]:
+            if "time_map" in chunk:
+                time_maps[chunk["file"]] = [tuple(point) for point in chunk["time_map"]]
+    return time_maps
+
+
 def get_chunk_files(directory: Path) -> list[Path]:
     """Get all audio chunk files from a directory, sorted by name."""
-    audio_extensions = {".mp3", ".mp4", ".m4a", ".wav", ".webm", ".ogg", ".flac"}
-    chunks = [f for f in directory.iterdir() if f.suffix.lower() in audio_extensions]
+    chunks = [f for f in directory.iterdir() if f.suffix.lower() in AUDIO_EXTENSIONS]
     return sorted(chunks)
 
 
+def find_recordings(config: dict, vault: Path) -> list[Path]:
+    """List every recording matched by sources.recordings, sorted by path."""
+    recordings = config.get("sources", {}).get("recordings", {})
+    patterns = recordings.get("patterns") or [f"*{ext}" for ext in sorted(AUDIO_EXTENSIONS)]
+    found = set()
+    for path in recordings.get("paths", ["recordings/"]):
+        directory = resolve_vault_path(vault, path)
+        if directory.is_dir():
+            for pattern in patterns:
+                found.update(f for f in directory.glob(pattern) if f.is_file())
+    return sorted(found)
+
+
+def find_untranscribed_recordings(config: dict, vault: Path) -> list[tuple[Path, Path]]:
+    """
+    Pair every recording without a transcript with the transcript path to write.
+
+    A recording counts as transcribed when a transcript named after it
+    exists, with or without a date prefix (session-001.md or
+    2024-01-15-session-001.md). New transcripts follow the transcribe
+    skill's naming: {outputs.transcriptions}/{date}-{filename}.md, dated by
+    the recording's modification time.
+    """
+    transcription_dirs = get_transcription_dirs(config, vault)
+    existing = [
+        f.stem
+        for directory in transcription_dirs if directory.is_dir()
+        for f in directory.iterdir() if f.suffix in (".md", ".txt")
+    ]
+    date_format = config.get("preferences", {}).get("date_format", "%Y-%m-%d")
+
+    pending = []
+    for recording in find_recordings(config, vault):
+        stem = recording.stem
+        if any(name == stem or name.endswith(f"-{stem}") for name in existing):
+            continue
+        date = datetime.fromtimestamp(recording.stat().st_mtime).strftime(date_format)
+        pending.append((recording, transcription_dirs[0] / f"{date}-{stem}.md"))
+    return pending
+
+
+def open_manifest(
+    output: Path, input_path: Path, options: dict, resume: bool, source_hash: str | None = None,
+) -> JobManifest:
+    """
+    Pick up the job manifest next to output when resuming the same recording with the same options.
+
+    Otherwise a new one is started, so a plan cut from another recording
+    (or an earlier version of this one) is never reused. Pass source_hash
+    if the recording has already been hashed (see JobManifest.source_hash).
+    """
+    manifest_path = JobManifest.path_for(output)
+    source_hash = source_hash or JobManifest.source_hash(input_path)
+    if resume:
+        manifest = JobManifest.load(manifest_path)
+        if manifest is None:
+            print(f"No job manifest at {manifest_path}, starting from scratch", flush=True)
+        elif manifest.options != options:
+            print("Job manifest was written with different options, starting from scratch", flush=True)
+        elif manifest.data.get("source_hash") != source_hash:
+            print("Job manifest was written for a different recording, starting from scratch", flush=True)
+        else:
+            return manifest
+    return JobManifest.create(manifest_path, input_path, options, source_hash)
+
+
+def write_transcript(output: Path, transcripts: list[str]) -> None:
+    """Join per-chunk transcripts and save them to output."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text("\n\n---\n\n".join(transcripts))
+
+
+class TranscriptWriter:
+    """
+    Write chunk transcripts in chunk order as soon as each one is finished.
+
+    Chunks may finish out of order; each is held back only until every
+    earlier chunk has been written. With an output path the text is appended
+    to <output>.partial and fsynced after every chunk, and close() renames
+    the finished file to output, so readers can follow the partial file but
+    never see a half-written final one. Otherwise each chunk is written to
+    stream as a JSON line with its index, file name and source offsets.
+    """
+
+    def __init__(self, chunks: list[dict], output: Path | None = None, stream: TextIO | None = None):
+        self.chunks = chunks
+        self.output = output
+        self._pending = {}
+        self._next = 0
+        self._lock = threading.Lock()
+        if output is not None:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            self.partial_path = output.with_name(f"{output.name}.partial")
+            self._file = open(self.partial_path, "w", encoding="utf-8")
+        else:
+            self._file = stream or sys.stdout
+
+    def add(self, index: int, text: str) -> None:
+        """Accept a finished chunk and write every chunk that is now next in line."""
+        with self._lock:
+            self._pending[index] = text
+            while self._next in self._pending:
+                self._write(self._next, self._pending.pop(self._next))
+                self._next += 1
+
+    def _write(self, index: int, text: str) -> None:
+        if self.output is None:
+            line = {"chunk": index, **self.chunks[index], "text": text}
+            self._file.write(json.dumps(line, ensure_ascii=False) + "\n")
+            self._file.flush()
+            return
+        self._file.write(("\n\n---\n\n" if index else "") + text)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Finish writing; the partial file only replaces output once every chunk is in it."""
+        if self.output is None:
+            return
+        self._file.close()
+        if self._next == len(self.chunks):
+            os.replace(self.partial_path, self.output)
+            # Make the rename itself durable
+            directory = os.open(self.output.parent, os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+
+class TranscriptionWorkers:
+    """
+    Warm workers that turn whole recordings into transcripts.
+
+    One API client, one process pool for decoding and chunking, and
+    transcribe/GPT thread pools shared by every recording are created up
+    front and reused, so each new recording pays no process startup, import
+    or client construction cost. submit() returns a future that resolves to
+    the transcript once it is done. Recordings transcribed into an output
+    file keep a job manifest next to it.
+    """
+
+    def __init__(self, args: argparse.Namespace, options: dict):
+        self.args = args
+        self.options = options
+        self.client = create_client()
+        self.cache = None if args.no_cache else ResultCache(args.cache_dir)
+        self.silence_maps = None if args.no_cache else SilenceMapStore(args.cache_dir / "silence")
+        self.temp_dir = Path(tempfile.mkdtemp(prefix="audio-chunker-workers-"))
+        # Spawned rather than forked: recordings arrive while API threads are already running.
+        # Ctrl+C is handled by the parent, which shuts the pool down.
+        self._decode_pool = ProcessPoolExecutor(
+            max_workers=max(args.jobs, 1),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=signal.signal,
+            initargs=(signal.SIGINT, signal.SIG_IGN),
+        )
+        self._transcribe_pool = ThreadPoolExecutor(max_workers=max(args.concurrency, 1))
+        self._parts_pool = ThreadPoolExecutor(max_workers=max(args.gpt_concurrency, 1))
+        # More recordings in the API stage than API workers would only queue behind them
+        self._job_pool = ThreadPoolExecutor(max_workers=max(args.concurrency, 1))
+        # Recordings are hashed just ahead of the decode pool
+        self._hash_pool = ThreadPoolExecutor(max_workers=max(args.jobs, 1))
+
+    def __enter__(self) -> "TranscriptionWorkers":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for pool in (self._hash_pool, self._decode_pool, self._job_pool, self._parts_pool, self._transcribe_pool):
+            pool.shutdown(cancel_futures=True)
+        if self.args.keep_chunks:
+            print(f"\nChunks kept in: {self.temp_dir}", flush=True)
+        else:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def submit(
+        self,
+        recording: Path,
+        output: Path | None = None,
+        options: dict | None = None,
+        on_chunked: Callable[[int], None] | None = None,
+        on_chunk: Callable[[int, str], None] | None = None,
+    ) -> Future:
+        """
+        Chunk recording on the process pool, then transcribe it on the shared API pools.
+
+        options are job options as recorded in the manifest (model,
+        format_conversation, ...) and default to the ones the workers were
+        created with. With an output the transcript is also written there.
+        on_chunked gets the number of chunks once the recording is split;
+        on_chunk is passed through to run_transcript_pipeline.
+        The recording is hashed (for the manifest and the silence map key)
+        on a worker thread, so submit returns at once.
+        """
+        args = self.args
+        options = options or self.options
+        done = Future()
+        manifest = None
+        chunk_dir = Path(tempfile.mkdtemp(prefix=f"{recording.stem}-", dir=self.temp_dir))
+
+        def transcribe(chunk_paths: list[Path]) -> str:
+            try:
+                if manifest is not None:
+                    manifest.set_chunks(chunk_paths, read_chunk_plan(chunk_dir))
+                transcripts = run_transcript_pipeline(
+                    self.client,
+                    chunk_paths,
+                    options["model"],
+                    format=options["format_conversation"],
+                    diarize=options["diarize"],
+                    single_pass=options["single_pass"],
+                    batch_tokens=options["batch_tokens"],
+                    output_tokens=options["output_tokens"],
+                    cache=self.cache,
+                    manifest=manifest,
+                    concurrency=args.concurrency,
+                    gpt_concurrency=args.gpt_concurrency,
+                    transcribe_pool=self._transcribe_pool,
+                    parts_pool=self._parts_pool,
+                    on_chunk=on_chunk,
+                )
+                if output is not None:
+                    write_transcript(output, transcripts)
+                    manifest.remove()
+                return "\n\n---\n\n".join(transcripts)
+            finally:
+                if not args.keep_chunks:
+                    shutil.rmtree(chunk_dir, ignore_errors=True)
+
+        def finished(future: Future) -> None:
+            if future.exception() is not None:
+                done.set_exception(future.exception())
+            else:
+                done.set_result(future.result())
+
+        def chunked(future: Future) -> None:
+            if future.exception() is not None:
+                done.set_exception(future.exception())
+                return
+            chunk_paths = future.result()
+            print(f"Chunked {recording.name} into {len(chunk_paths)} chunks", flush=True)
+            if on_chunked is not None:
+                on_chunked(len(chunk_paths))
+            self._job_pool.submit(transcribe, chunk_paths).add_done_callback(finished)
+
+        def start() -> None:
+            nonlocal manifest
+            source_hash = None
+            if output is not None or self.silence_maps is not None:
+                source_hash = hash_file(recording)
+            if output is not None:
+                manifest = open_manifest(output, recording, options, args.resume, source_hash)
+            self._decode_pool.submit(
+                chunk_audio,
+                recording,
+                chunk_dir,
+                diarize=options["diarize"],
+                stream_threshold_ms=int(args.stream_threshold * 60000),
+                export_mode=args.export_mode,
+                upload_profile=options["upload_profile"],
+                chunks=manifest.chunk_plan if manifest is not None else None,
+                min_silence_len=options["min_silence_len"],
+                silence_thresh=options["silence_thresh"],
+                silence_maps=self.silence_maps,
+                silence_key=source_hash and SilenceMapStore.make_key(source_hash, options["upload_profile"]),
+                trim_silence_ms=None if options["trim_silence"] is None else int(options["trim_silence"] * 1000),
+            ).add_done_callback(chunked)
+
+        def started(future: Future) -> None:
+            if future.exception() is not None:
+                done.set_exception(future.exception())
+
+        self._hash_pool.submit(start).add_done_callback(started)
+        return done
+
+
+def process_vault(args: argparse.Namespace, options: dict) -> list[Path]:
+    """
+    Transcribe every recording in the vault that has no transcript yet.
+
+    Recordings are decoded and chunked args.jobs at a time; as each one is
+    chunked its transcription starts on API pools shared by the whole batch
+    (see TranscriptionWorkers), so the CPU and the API quota are kept busy
+    at the same time. Returns the recordings that failed.
+    """
+    config, config_path = load_config(args.config)
+    vault = resolve_vault_path(config_path.parent, config.get("vault", "."))
+    pending = find_untranscribed_recordings(config, vault)
+    print(f"Vault: {vault} ({len(pending)} recordings without a transcript)", flush=True)
+    if not pending:
+        return []
+
+    failed = []
+    with TranscriptionWorkers(args, options) as workers:
+        print(f"Chunking {len(pending)} recordings ({args.jobs} at a time) to: {workers.temp_dir}", flush=True)
+        futures = {workers.submit(recording, output): (recording, output) for recording, output in pending}
+        for future in as_completed(futures):
+            recording, output = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error: {recording.name} failed: {e}", file=sys.stderr)
+                failed.append(recording)
+                continue
+            print(f"Transcript saved to: {output}", flush=True)
+
+    return failed
+
+
 def main():
     """CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -478,12 +3511,22 @@ Examples:
 
   # Full therapy session workflow (transcribe, format, translate)
   audio-chunker recording.m4a --format-conversation --output transcript.txt
+
+  # Transcribe every recording in the vault that has no transcript yet
+  audio-chunker --vault --format-conversation
+
+  # Keep transcribing new recordings as they are synced into the vault
+  audio-chunker --watch --format-conversation
+
+  # Serve a job API; then: curl -d '{"input": "/data/session.m4a"}' -H 'Content-Type: application/json' localhost:8750/jobs
+  audio-chunker --serve --format-conversation
         """,
     )
 
     parser.add_argument(
         "input",
         type=Path,
+        nargs="?",
         help="Path to audio file OR directory containing chunk files",
     )
     parser.add_argument(
@@ -511,17 +3554,201 @@ Examples:
         action="store_true",
         help="Format as 2-person therapy conversation (Me/Therapist) and fix grammar",
     )
+    parser.add_argument(
+        "--single-pass",
+        action="store_true",
+        help="With --format-conversation, format and translate each part in one GPT-4o request",
+    )
     parser.add_argument(
         "--model",
         default="whisper-1",
-        choices=["whisper-1", "gpt-4o-transcribe"],
+        choices=TRANSCRIBE_MODELS,
         help="Model to use for transcription (default: whisper-1)",
     )
+    parser.add_argument(
+        "--stream-threshold",
+        type=float,
+        default=STREAM_THRESHOLD_MS / 60000,
+        metavar="MINUTES",
+        help="Stream-decode recordings longer than this instead of loading them into memory (default: 30)",
+    )
+    parser.add_argument(
+        "--export-mode",
+        default="copy",
+        choices=["copy", "encode"],
+        help="Cut chunks losslessly with ffmpeg stream copy, or re-encode them (default: copy)",
+    )
+    parser.add_argument(
+        "--upload-profile",
+        choices=sorted(UPLOAD_PROFILES),
+        help="Downmix, resample and re-encode the recording for upload before chunking",
+    )
+    parser.add_argument(
+        "--min-silence-len",
+        type=int,
+        default=MIN_SILENCE_LEN,
+        metavar="MS",
+        help=f"Shortest pause that counts as a split point (default: {MIN_SILENCE_LEN})",
+    )
+    parser.add_argument(
+        "--silence-thresh",
+        type=float,
+        default=SILENCE_THRESH,
+        metavar="DBFS",
+        help=f"Loudness below which audio counts as silence (default: {SILENCE_THRESH})",
+    )
+    parser.add_argument(
+        "--trim-silence",
+        type=float,
+        nargs="?",
+        const=TRIM_MIN_PAUSE_MS / 1000,
+        metavar="SECONDS",
+        help=f"Cut pauses longer than SECONDS (default: {TRIM_MIN_PAUSE_MS / 1000:g}) down to {TRIM_GAP_MS / 1000:g}s "
+             "before chunking, so dead air isn't uploaded; chunks are re-encoded and --segments times still "
+             "refer to the original recording",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=TRANSCRIBE_CONCURRENCY,
+        metavar="N",
+        help=f"Number of chunks to transcribe in parallel (default: {TRANSCRIBE_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--gpt-concurrency",
+        type=int,
+        default=GPT_CONCURRENCY,
+        metavar="N",
+        help=f"Number of GPT-4o formatting/translation requests in flight (default: {GPT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--batch-tokens",
+        type=int,
+        default=GPT_BATCH_TOKENS,
+        metavar="N",
+        help=f"Transcript tokens packed into each GPT-4o formatting/translation request (default: {GPT_BATCH_TOKENS})",
+    )
+    parser.add_argument(
+        "--output-tokens",
+        type=int,
+        default=GPT_OUTPUT_TOKENS,
+        metavar="N",
+        help=f"Most tokens each GPT-4o request may write; longer replies are redone in halves (default: {GPT_OUTPUT_TOKENS})",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory for cached API results and silence maps (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't read or write cached API results or silence maps",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from the job manifest next to --output",
+    )
+    parser.add_argument(
+        "--stream-output",
+        action="store_true",
+        help="Write each chunk's transcript as soon as it and all earlier chunks are done: "
+             "to <output>.partial, renamed to --output at the end, or as JSON Lines on stdout",
+    )
+    parser.add_argument(
+        "--segments",
+        type=Path,
+        metavar="FILE",
+        help="Also save timed transcript segments as JSON Lines (chunk, start_ms, end_ms, speaker, text)",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        metavar="FILE",
+        help="Save a report of where time, bytes, retries and tokens went in this run (JSON)",
+    )
+    parser.add_argument(
+        "--metrics-format",
+        choices=["json", "otlp"],
+        default="json",
+        help="--metrics as a run report (json, default) or OpenTelemetry OTLP/JSON trace data (otlp)",
+    )
+    parser.add_argument(
+        "--vault",
+        action="store_true",
+        help="Transcribe every recording in the mindwork vault that has no transcript yet",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Run until interrupted, transcribing new recordings as they appear in the vault",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=WATCH_SETTLE_SECONDS,
+        metavar="SECONDS",
+        help=f"With --watch, how long a new file must stop changing before it is queued (default: {WATCH_SETTLE_SECONDS:g})",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run an HTTP job API for submitting recordings and fetching transcripts, until interrupted",
+    )
+    parser.add_argument(
+        "--listen",
+        default=SERVE_ADDRESS,
+        metavar="ADDRESS",
+        help=f"host:port or Unix socket path for --serve (default: {SERVE_ADDRESS})",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        metavar="DIR",
+        help="With --serve, the directory job outputs are written under; "
+             "without it, jobs can't name an output and only return their transcript",
+    )
+    parser.add_argument(
+        "--config",
+        type=Path,
+        help="mindwork.yaml to use with --vault/--watch (default: ./mindwork.yaml, ~/.config/mindwork/config.yaml, ~/.mindwork.yaml)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        metavar="N",
+        help="Number of recordings decoded and chunked in parallel with --vault/--watch/--serve, or of processes "
+             "scanning a single long recording for silence (default: number of CPU cores)",
+    )
 
     args = parser.parse_args()
 
+    if args.serve:
+        if args.input or args.output or args.no_transcribe or args.vault or args.watch or args.metrics:
+            parser.error("--serve takes recordings through its API; "
+                         "it can't be combined with an input, --output, --no-transcribe, --vault, --watch or --metrics")
+    elif args.vault or args.watch:
+        if args.input or args.output or args.no_transcribe or args.metrics:
+            parser.error("--vault/--watch find their own recordings and write transcripts into the vault; "
+                         "they can't be combined with an input, --output, --no-transcribe or --metrics")
+    elif args.input is None:
+        parser.error("an input file or directory is required unless --vault, --watch or --serve is given")
+    if args.output_dir and not args.serve:
+        parser.error("--output-dir only applies to --serve; use --output otherwise")
+    if args.single_pass and not args.format_conversation:
+        parser.error("--single-pass only applies to --format-conversation")
+    if args.batch_tokens <= 0:
+        parser.error("--batch-tokens must be a positive number of tokens")
+    if args.output_tokens <= 0:
+        parser.error("--output-tokens must be a positive number of tokens")
+    if args.trim_silence is not None and args.trim_silence * 1000 <= TRIM_GAP_MS:
+        parser.error(f"--trim-silence must be longer than the {TRIM_GAP_MS / 1000:g}s pauses are cut down to")
+
     # Validate input exists
-    if not args.input.exists():
+    if args.input and not args.input.exists():
         print(f"Error: Input not found: {args.input}", file=sys.stderr)
         sys.exit(1)
 
@@ -530,8 +3757,79 @@ Examples:
         print("Error: OPENAI_API_KEY environment variable not set", file=sys.stderr)
         sys.exit(1)
 
+    if args.resume and not (args.output or args.vault or args.watch or args.serve):
+        print("Error: --resume needs --output to locate the job manifest", file=sys.stderr)
+        sys.exit(1)
+
+    # Job manifest for checkpointing; only kept when the transcript goes to a file
+    manifest_options = {
+        "model": args.model,
+        "format_conversation": args.format_conversation,
+        "diarize": args.diarize,
+        "single_pass": args.single_pass,
+        "upload_profile": args.upload_profile,
+        "min_silence_len": args.min_silence_len,
+        "silence_thresh": args.silence_thresh,
+        "batch_tokens": args.batch_tokens,
+        "output_tokens": args.output_tokens,
+        "trim_silence": args.trim_silence,
+    }
+
+    # Imported here: both modules build on this one
+    if args.serve:
+        from job_server import serve
+        serve(args, manifest_options)
+        return
+
+    if args.watch:
+        from vault_watch import watch_vault
+        try:
+            watch_vault(args, manifest_options)
+        except FileNotFoundError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if args.vault:
+        try:
+            failed = process_vault(args, manifest_options)
+        except FileNotFoundError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if failed:
+            print(f"\n{len(failed)} recordings failed; re-run with --vault --resume to retry them", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    # A recording is hashed once, for both the job manifest and the silence map key
+    manifest = None
+    source_hash = None
+    keep_manifest = args.output and not args.no_transcribe
+    if args.input.is_file() and (keep_manifest or not args.no_cache):
+        source_hash = hash_file(args.input)
+    if keep_manifest:
+        manifest = open_manifest(args.output, args.input, manifest_options, args.resume, source_hash)
+
+    if args.metrics:
+        metrics.enable(
+            input=args.input.name,
+            input_bytes=args.input.stat().st_size if args.input.is_file() else None,
+            model="gpt-4o-transcribe-diarize" if args.diarize else args.model,
+            format_conversation=args.format_conversation,
+            single_pass=args.single_pass,
+            export_mode=args.export_mode,
+            upload_profile=args.upload_profile,
+        )
+
     temp_dir = None
     chunk_paths = []
+    writer = None
+
+    # JSON Lines go to stdout, so progress messages move to stderr
+    transcript_stream = sys.stdout
+    progress = ExitStack()
+    if args.stream_output and not args.output and not args.no_transcribe:
+        progress.enter_context(redirect_stdout(sys.stderr))
 
     try:
         if args.input.is_dir():
@@ -542,11 +3840,29 @@ Examples:
                 print(f"Error: No audio files found in {args.input}", file=sys.stderr)
                 sys.exit(1)
             print(f"Found {len(chunk_paths)} chunk files", flush=True)
+            chunk_offsets = read_chunk_plan(args.input)
+            time_maps = read_time_maps(args.input)
         else:
             # Input is an audio file - chunk it to /tmp
             temp_dir = Path(tempfile.mkdtemp(prefix="audio-chunker-"))
             print(f"Chunking audio to temp directory: {temp_dir}", flush=True)
-            chunk_paths = chunk_audio(args.input, temp_dir, diarize=args.diarize)
+            chunk_paths = chunk_audio(
+                args.input,
+                temp_dir,
+                diarize=args.diarize,
+                stream_threshold_ms=int(args.stream_threshold * 60000),
+                export_mode=args.export_mode,
+                upload_profile=args.upload_profile,
+                chunks=manifest.chunk_plan if manifest is not None else None,
+                min_silence_len=args.min_silence_len,
+                silence_thresh=args.silence_thresh,
+                silence_maps=None if args.no_cache else SilenceMapStore(args.cache_dir / "silence"),
+                silence_key=None if args.no_cache else SilenceMapStore.make_key(source_hash, args.upload_profile),
+                trim_silence_ms=None if args.trim_silence is None else int(args.trim_silence * 1000),
+                jobs=args.jobs,
+            )
+            chunk_offsets = read_chunk_plan(temp_dir)
+            time_maps = read_time_maps(temp_dir)
 
             if args.no_transcribe:
                 print(f"\nChunking complete. {len(chunk_paths)} chunks saved to {temp_dir}")
@@ -554,39 +3870,66 @@ Examples:
                     print("Use --keep-chunks to preserve the chunk files")
                 return
 
-        # Process each chunk
-        client = OpenAI()
-        all_transcripts = []
-
-        for i, chunk_path in enumerate(chunk_paths):
-            print(f"\n--- Processing chunk {i + 1}/{len(chunk_paths)}: {chunk_path.name} ---", flush=True)
-
-            # Step 1: Transcribe
-            print(f"Transcribing with {args.model}...", flush=True)
-            with open(chunk_path, "rb") as audio_file:
-                response = client.audio.transcriptions.create(
-                    model=args.model,
-                    file=audio_file,
-                )
-            raw_text = response.text
-
-            if args.format_conversation:
-                # Step 2: Format as conversation
-                chunk_transcript = format_conversation(raw_text, client)
-                # Step 3: Translate to English
-                chunk_transcript = translate_text(chunk_transcript, client)
-            else:
-                chunk_transcript = raw_text
-
-            all_transcripts.append(chunk_transcript)
+        if manifest is not None:
+            manifest.set_chunks(chunk_paths, chunk_offsets)
+
+        client = create_client()
+        cache = None if args.no_cache else ResultCache(args.cache_dir)
+        stages = "transcribe"
+        if args.format_conversation:
+            stages += ", format+translate" if args.single_pass else ", format, translate"
+        model_name = "gpt-4o-transcribe-diarize" if args.diarize else args.model
+        print(f"\nProcessing {len(chunk_paths)} chunks with {model_name} ({stages})...", flush=True)
+        if args.stream_output:
+            chunks = []
+            for path in chunk_paths:
+                start_ms, end_ms = chunk_offsets.get(path.name, (None, None))
+                chunks.append({"file": path.name, "start_ms": start_ms, "end_ms": end_ms})
+            writer = TranscriptWriter(chunks, args.output, transcript_stream)
+        chunk_segments = [None] * len(chunk_paths)
+        try:
+            all_transcripts = run_transcript_pipeline(
+                client,
+                chunk_paths,
+                args.model,
+                format=args.format_conversation,
+                diarize=args.diarize,
+                single_pass=args.single_pass,
+                concurrency=args.concurrency,
+                gpt_concurrency=args.gpt_concurrency,
+                batch_tokens=args.batch_tokens,
+                output_tokens=args.output_tokens,
+                cache=cache,
+                manifest=manifest,
+                on_chunk=writer.add if writer is not None else None,
+                on_segments=chunk_segments.__setitem__ if args.segments else None,
+            )
+        except Exception:
+            if manifest is not None:
+                print(f"\nProgress saved to {manifest.path}; re-run with --resume to continue", file=sys.stderr)
+            raise
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if args.segments:
+            write_segments(args.segments, place_segments(chunk_segments, chunk_paths, chunk_offsets, time_maps))
+            print(f"Segments saved to: {args.segments}", flush=True)
+
+        if writer is not None:
+            if manifest is not None:
+                manifest.remove()
+            if args.output:
+                print(f"\nTranscript saved to: {args.output}")
+            return
 
         # Combine all chunks
         transcript = "\n\n---\n\n".join(all_transcripts)
 
         # Output transcript
         if args.output:
-            args.output.parent.mkdir(parents=True, exist_ok=True)
-            args.output.write_text(transcript)
+            write_transcript(args.output, all_transcripts)
+            manifest.remove()
             print(f"\nTranscript saved to: {args.output}")
         else:
             print("\n" + "=" * 50)
@@ -599,6 +3942,10 @@ Examples:
         if temp_dir and temp_dir.exists() and not args.keep_chunks:
             print(f"\nCleaning up temp chunks: {temp_dir}", flush=True)
             shutil.rmtree(temp_dir)
+        if args.metrics:
+            metrics.write(args.metrics, args.metrics_format)
+            print(f"Metrics saved to: {args.metrics}", flush=True)
+        progress.close()
 
 
 if __name__ == "__main__":
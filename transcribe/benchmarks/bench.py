@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the chunker and the transcription pipeline.
+
+Generates synthetic speech-like recordings (harmonic tone bursts separated
+by pauses of controlled length), runs chunk_audio on them with its stages
+timed, and runs the full CLI against a local stand-in for the OpenAI API
+with configurable latency and rate limiting. Both runs get the same
+--export-mode, --stream-threshold and --jobs, so they take the same
+chunking path. Results are written as JSON so runs on different commits
+can be compared.
+
+Usage:
+    python benchmarks/bench.py run --durations 5 30 --formats wav mp3 m4a
+    python benchmarks/bench.py run --skip-pipeline --output before.json
+    python benchmarks/bench.py run --durations 60 --formats wav --stream-threshold 0 --jobs 4
+    python benchmarks/bench.py compare before.json after.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+
+TRANSCRIBE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(TRANSCRIBE_DIR))
+
+from audio_chunker import MIN_SILENCE_LEN, STREAM_THRESHOLD_MS, chunk_audio, metrics, probe_audio  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+# Spans chunk_audio records; which ones a recording gets depends on the path it takes
+STAGES = ("transcode", "decode", "calibrate", "silence_detection", "planning", "export", "stream_chunking")
+
+# Encoder settings per synthetic recording format, close to what phones and recorders produce
+FORMAT_ENCODERS = {
+    "wav": ["-c:a", "pcm_s16le"],
+    "flac": ["-c:a", "flac"],
+    "mp3": ["-c:a", "libmp3lame", "-b:a", "128k"],
+    "m4a": ["-c:a", "aac", "-b:a", "96k"],
+    "ogg": ["-c:a", "libopus", "-b:a", "32k"],
+}
+
+
+# Runs the CLI in argv[2:] and writes its VmHWM line to the file named in argv[1] when it exits
+CLI_LAUNCHER = """
+import atexit, runpy, sys
+from pathlib import Path
+peak_path = Path(sys.argv[1])
+def save_peak():
+    lines = Path("/proc/self/status").read_text().splitlines()
+    peak_path.write_text(next(line for line in lines if line.startswith("VmHWM:")))
+atexit.register(save_peak)
+sys.argv = sys.argv[2:]
+sys.path.insert(0, str(Path(sys.argv[0]).parent))
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process so far.
+
+    On Linux this is VmHWM, which starts over at exec; ru_maxrss would carry
+    over the parent's RSS at the time it started the process.
+    """
+    with contextlib.suppress(OSError):
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    # macOS reports bytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 / 1024
+
+
+def git_revision() -> dict:
+    """Commit the benchmarked tree is at and whether it has local changes."""
+    def git(*args: str) -> str:
+        result = subprocess.run(["git", *args], cwd=TRANSCRIBE_DIR, capture_output=True, text=True)
+        return result.stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "."))}
+
+
+def ffmpeg_version() -> str | None:
+    try:
+        result = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    return result.stdout.splitlines()[0] if result.stdout else None
+
+
+def synthesize_speech(
+    rng: np.random.Generator,
+    frame_rate: int,
+    duration_s: float,
+    pause_range: tuple[float, float],
+) -> np.ndarray:
+    """
+    One stretch of speech-like float audio: bursts of a harmonic tone with a syllable-rate envelope.
+
+    Bursts last 0.3-4 s and are followed by a pause drawn from pause_range;
+    stretches of audio are generated until duration_s is filled.
+    """
+    frames = int(frame_rate * duration_s)
+    audio = np.zeros(frames, dtype=np.float32)
+    position = 0
+    while position < frames:
+        burst = min(int(frame_rate * rng.uniform(0.3, 4.0)), frames - position)
+        t = np.arange(burst) / frame_rate
+        pitch = rng.uniform(90, 250)
+        tone = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+        envelope = 0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3, 6) * t)
+        audio[position:position + burst] = 0.3 * tone * envelope
+        position += burst + int(frame_rate * rng.uniform(*pause_range))
+    return audio
+
+
+def make_recording(
+    path: Path,
+    duration_s: float,
+    frame_rate: int = 44100,
+    channels: int = 1,
+    pause_range: tuple[float, float] = (0.2, 2.0),
+    seed: int = 0,
+) -> Path:
+    """
+    Write a synthetic recording of duration_s, encoded by its extension (see FORMAT_ENCODERS).
+
+    Audio is generated a minute at a time into a WAV file, so memory use
+    doesn't grow with duration; other formats are encoded from it with ffmpeg.
+    """
+    rng = np.random.default_rng(seed)
+    wav_path = path if path.suffix == ".wav" else path.with_suffix(".source.wav")
+    with wave.open(str(wav_path), "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(frame_rate)
+        remaining = duration_s
+        while remaining > 0:
+            block = synthesize_speech(rng, frame_rate, min(remaining, 60), pause_range)
+            # Background noise well below the silence threshold
+            block += rng.normal(0, 0.001, len(block)).astype(np.float32)
+            samples = (np.clip(block, -1, 1) * 32767).astype(np.int16)
+            f.writeframes(np.repeat(samples, channels).tobytes())
+            remaining -= 60
+
+    if wav_path != path:
+        try:
+            subprocess.run(
+                ["ffmpeg", "-v", "error", "-y", "-i", str(wav_path), *FORMAT_ENCODERS[path.suffix[1:]], str(path)],
+                check=True,
+            )
+        finally:
+            wav_path.unlink()
+    return path
+
+
+def run_stages(path: Path, output_dir: Path, export_mode: str, stream_threshold_ms: int | None, jobs: int) -> dict:
+    """
+    Run chunk_audio on one recording and time the stages it went through; meant to run in its own process.
+
+    Stage times are the spans chunk_audio records for --metrics, so the
+    whole-file, in-memory, streaming and parallel-window paths are timed as
+    the CLI runs them; path says which one was taken. Silence maps aren't
+    used, as in the pipeline run with --no-cache. peak_rss_mb is this
+    process only, without the parallel-window workers.
+    """
+    metrics.enable()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunk_paths = chunk_audio(
+            path, output_dir, stream_threshold_ms=stream_threshold_ms, export_mode=export_mode, jobs=jobs,
+        )
+    seconds = time.perf_counter() - started
+
+    report = metrics.report()
+    totals = report["totals"]
+    if "stream_chunking" in totals:
+        parallel = any(span["attributes"].get("parallel") for span in report["spans"])
+        chunking_path = "parallel" if parallel else "stream"
+    else:
+        chunking_path = "in_memory" if "decode" in totals else "whole_file"
+    return {
+        "path": chunking_path,
+        "duration_ms": probe_audio(path)["duration_ms"],
+        "chunks": len(chunk_paths),
+        "chunk_bytes": sum(p.stat().st_size for p in chunk_paths),
+        "stages": {stage: {"seconds": totals[stage]["wall_s"]} for stage in STAGES if stage in totals},
+        "total_seconds": round(seconds, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+class StubAPI:
+    """
+    Local stand-in for the transcription and chat completion endpoints.
+
+    Every request waits latency seconds; a rate_limit fraction of them is
+    answered with a 429 carrying retry_after_ms instead. Request counts per
+    path and the number of injected 429s are kept in stats.
+    """
+
+    def __init__(self, latency: float = 0.2, rate_limit: float = 0.0, retry_after_ms: int = 100, seed: int = 0):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.retry_after_ms = retry_after_ms
+        self.stats = {"requests": {}, "rate_limited": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self) -> str:
+        """Start serving on a free local port and return the base URL for OPENAI_BASE_URL."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, headers, reply = stub.respond(self.path, body)
+                data = json.dumps(reply).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, path: str, body: bytes) -> tuple[int, dict, dict]:
+        with self._lock:
+            self.stats["requests"][path] = self.stats["requests"].get(path, 0) + 1
+            limited = self._random.random() < self.rate_limit
+            if limited:
+                self.stats["rate_limited"] += 1
+        time.sleep(self.latency)
+        if limited:
+            return 429, {"retry-after-ms": str(self.retry_after_ms)}, {"error": {"message": "Rate limit reached"}}
+        if path.endswith("/chat/completions"):
+            return 200, {}, self.chat_completion(json.loads(body))
+        if b"diarized_json" in body:
+            return 200, {}, {
+                "text": "Merhaba. Nasılsın?",
+                "segments": [
+                    {"start": 0.0, "end": 2.0, "speaker": "A", "text": "Merhaba."},
+                    {"start": 2.5, "end": 4.0, "speaker": "B", "text": "Nasılsın?"},
+                ],
+            }
+        return 200, {}, {
+            "text": "Merhaba. Bugün nasılsın? İyiyim, teşekkür ederim.",
+            "segments": [{"start": 0.0, "end": 4.0, "text": "Merhaba. Bugün nasılsın? İyiyim, teşekkür ederim."}],
+        }
+
+    @staticmethod
+    def chat_completion(request: dict) -> dict:
+        text = request["messages"][-1]["content"]
+        if request.get("response_format"):
+            content = json.dumps({"turns": [{"speaker": "Me", "original": text, "english": text}]})
+        else:
+            content = f"**Me:** {text}"
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": 0,
+            "model": request["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        }
+
+
+def run_pipeline(path: Path, output_dir: Path, cli_args: list[str], stub: StubAPI) -> dict:
+    """Run the CLI on one recording against stub and measure its wall time and peak RSS."""
+    base_url = stub.start()
+    try:
+        env = {**os.environ, "OPENAI_BASE_URL": base_url, "OPENAI_API_KEY": "bench"}
+        rss_path = output_dir / f"{path.stem}.rss"
+        command = [
+            sys.executable, "-c", CLI_LAUNCHER, str(rss_path), str(TRANSCRIBE_DIR / "audio_chunker.py"), str(path),
+            "--no-cache", "--output", str(output_dir / f"{path.stem}.md"), *cli_args,
+        ]
+        started = time.perf_counter()
+        result = subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        seconds = time.perf_counter() - started
+    finally:
+        stub.stop()
+
+    if result.returncode != 0:
+        print(f"  CLI failed ({result.returncode}): {result.stderr.strip()[-500:]}", flush=True)
+    return {
+        "returncode": result.returncode,
+        "seconds": round(seconds, 3),
+        # VmHWM is Linux-only; elsewhere the launcher can't report a peak
+        "peak_rss_mb": round(int(rss_path.read_text().split()[1]) / 1024, 1) if rss_path.exists() else None,
+        **stub.stats,
+    }
+
+
+def run(args: argparse.Namespace) -> None:
+    results = {
+        **git_revision(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ffmpeg": ffmpeg_version(),
+        "settings": {
+            "durations_min": args.durations,
+            "formats": args.formats,
+            "frame_rate": args.frame_rate,
+            "channels": args.channels,
+            "pause_range_s": args.pause_range,
+            "export_mode": args.export_mode,
+            "stream_threshold_min": args.stream_threshold,
+            "jobs": args.jobs,
+            "seed": args.seed,
+            "latency_s": args.latency,
+            "rate_limit": args.rate_limit,
+            "cli_args": args.cli_args,
+        },
+        "recordings": [],
+    }
+
+    # The pipeline run chunks the way run_stages does
+    chunking_args = [
+        "--export-mode", args.export_mode, "--stream-threshold", f"{args.stream_threshold:g}", "--jobs", str(args.jobs),
+    ]
+    stream_threshold_ms = int(args.stream_threshold * 60000)
+
+    with tempfile.TemporaryDirectory(prefix="mindwork-bench-") as work_dir:
+        work_dir = Path(work_dir)
+        for minutes in args.durations:
+            for format in args.formats:
+                name = f"{minutes:g}min-{format}"
+                print(f"{name}: generating...", flush=True)
+                path = make_recording(
+                    work_dir / f"{name}.{format}", minutes * 60, args.frame_rate, args.channels,
+                    tuple(args.pause_range), args.seed,
+                )
+                entry = {"name": name, "format": format, "minutes": minutes, "bytes": path.stat().st_size}
+
+                if not args.skip_stages:
+                    chunk_dir = work_dir / f"{name}-chunks"
+                    # A fresh process per recording, so peak RSS isn't carried over from the last one
+                    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                        entry.update(pool.submit(
+                            run_stages, path, chunk_dir, args.export_mode, stream_threshold_ms, args.jobs,
+                        ).result())
+                    timings = ", ".join(f"{stage} {timing['seconds']:.2f}s" for stage, timing in entry["stages"].items())
+                    print(
+                        f"  chunking ({entry['path']}): {entry['total_seconds']:.2f}s, {entry['chunks']} chunks"
+                        f"{f' ({timings})' if timings else ''}, peak {entry['peak_rss_mb']:.0f} MB",
+                        flush=True,
+                    )
+
+                if not args.skip_pipeline:
+                    stub = StubAPI(args.latency, args.rate_limit, args.retry_after_ms, args.seed)
+                    entry["pipeline"] = run_pipeline(path, work_dir, chunking_args + shlex.split(args.cli_args), stub)
+                    pipeline = entry["pipeline"]
+                    print(
+                        f"  pipeline: {pipeline['seconds']:.2f}s, peak {pipeline['peak_rss_mb']:.0f} MB, "
+                        f"{sum(pipeline['requests'].values())} requests ({pipeline['rate_limited']} rate limited)",
+                        flush=True,
+                    )
+
+                results["recordings"].append(entry)
+                path.unlink()
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"{(results['commit'] or 'unknown')[:12]}{'-dirty' if results['dirty'] else ''}.json"
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nResults saved to: {output}", flush=True)
+
+
+def compare(args: argparse.Namespace) -> None:
+    """Print per-stage timings of two result files side by side; exit 1 if any got slower than --threshold."""
+    before, after = (json.loads(path.read_text()) for path in (args.before, args.after))
+    print(f"{(before['commit'] or '?')[:12]} -> {(after['commit'] or '?')[:12]}\n")
+    previous = {entry["name"]: entry for entry in before["recordings"]}
+    regressions = 0
+
+    def row(label: str, old: float, new: float, unit: str) -> None:
+        nonlocal regressions
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > args.threshold and (unit != "s" or new - old > args.min_seconds):
+            flag = "  <-- slower" if unit == "s" else "  <-- more memory"
+            regressions += 1
+        print(f"  {label:<16} {old:>10.2f}{unit} {new:>10.2f}{unit} {change:>+8.1%}{flag}")
+
+    for entry in after["recordings"]:
+        old = previous.get(entry["name"])
+        if old is None:
+            continue
+        print(entry["name"])
+        if old.get("path") != entry.get("path"):
+            print(f"  chunking path changed: {old.get('path')} -> {entry.get('path')}")
+        for stage in STAGES:
+            if stage in entry.get("stages", {}) and stage in old.get("stages", {}):
+                row(stage, old["stages"][stage]["seconds"], entry["stages"][stage]["seconds"], "s")
+        if "total_seconds" in entry and "total_seconds" in old:
+            row("chunking", old["total_seconds"], entry["total_seconds"], "s")
+        if "peak_rss_mb" in entry and "peak_rss_mb" in old:
+            row("peak RSS", old["peak_rss_mb"], entry["peak_rss_mb"], "M")
+        if "pipeline" in entry and "pipeline" in old:
+            row("pipeline", old["pipeline"]["seconds"], entry["pipeline"]["seconds"], "s")
+            row("pipeline RSS", old["pipeline"]["peak_rss_mb"], entry["pipeline"]["peak_rss_mb"], "M")
+
+    if regressions:
+        print(f"\n{regressions} regressions over {args.threshold:.0%}", flush=True)
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the audio chunker and transcription pipeline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Generate recordings, time chunk_audio and the full CLI on them")
+    run_parser.add_argument(
+        "--durations", type=float, nargs="+", default=[5, 30], metavar="MINUTES",
+        help="Lengths of the synthetic recordings (default: 5 30)",
+    )
+    run_parser.add_argument(
+        "--formats", nargs="+", default=["wav", "mp3", "m4a"], choices=list(FORMAT_ENCODERS),
+        help="Formats to generate each length in (default: wav mp3 m4a)",
+    )
+    run_parser.add_argument("--frame-rate", type=int, default=44100, help="Sample rate of the recordings (default: 44100)")
+    run_parser.add_argument("--channels", type=int, default=1, choices=[1, 2], help="Channel count (default: 1)")
+    run_parser.add_argument(
+        "--pause-range", type=float, nargs=2, default=[0.2, 2.0], metavar=("MIN", "MAX"),
+        help=f"Pause lengths between bursts in seconds; pauses under {MIN_SILENCE_LEN}ms don't split (default: 0.2 2.0)",
+    )
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed for the generated audio and injected 429s")
+    run_parser.add_argument(
+        "--export-mode", choices=["copy", "encode"], default="copy",
+        help="Export mode for chunking and the pipeline, as for the CLI (default: copy)",
+    )
+    run_parser.add_argument(
+        "--stream-threshold", type=float, default=STREAM_THRESHOLD_MS / 60000, metavar="MINUTES",
+        help="Stream-decode recordings longer than this, as for the CLI (default: 30)",
+    )
+    run_parser.add_argument(
+        "--jobs", type=int, default=1,
+        help="Processes scanning long recordings for silence, as for the CLI (default: 1)",
+    )
+    run_parser.add_argument("--skip-stages", action="store_true", help="Don't time chunk_audio on its own")
+    run_parser.add_argument("--skip-pipeline", action="store_true", help="Don't run the CLI against the stub API")
+    run_parser.add_argument("--latency", type=float, default=0.2, help="Stub API latency per request in seconds (default: 0.2)")
+    run_parser.add_argument(
+        "--rate-limit", type=float, default=0.1,
+        help="Fraction of stub API requests answered with a 429 (default: 0.1)",
+    )
+    run_parser.add_argument(
+        "--retry-after-ms", type=int, default=100, help="retry-after-ms sent with injected 429s (default: 100)",
+    )
+    run_parser.add_argument(
+        "--cli-args", default="--format-conversation",
+        help='Extra CLI arguments for the pipeline run (default: "--format-conversation")',
+    )
+    run_parser.add_argument(
+        "--output", type=Path, help=f"Where to write the JSON results (default: {RESULTS_DIR}/<commit>.json)",
+    )
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("before", type=Path)
+    compare_parser.add_argument("after", type=Path)
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Relative slowdown reported as a regression (default: 0.1)",
+    )
+    compare_parser.add_argument(
+        "--min-seconds", type=float, default=0.05, help="Ignore slowdowns smaller than this (default: 0.05)",
+    )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Transcription server for the audio chunker
+
+An HTTP job API over TCP or a Unix socket, backed by one warm set of
+TranscriptionWorkers shared by every job.
+"""
+
+import argparse
+import json
+import shutil
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from audio_chunker import TRANSCRIBE_MODELS, TRIM_GAP_MS, UPLOAD_PROFILES, TranscriptionWorkers
+
+SERVE_JOB_TTL = 60 * 60  # Seconds a finished job stays queryable
+
+
+class TranscriptionJobs:
+    """
+    Jobs submitted to the transcription server, tracked in memory.
+
+    Each job runs on the shared TranscriptionWorkers; its status moves from
+    chunking to transcribing to done or failed, and every finished chunk is
+    kept so a partial transcript can be streamed while the rest is running.
+    Finished jobs are forgotten ttl seconds after they end.
+    """
+
+    def __init__(self, workers: TranscriptionWorkers, ttl: float = SERVE_JOB_TTL):
+        self.workers = workers
+        self.ttl = ttl
+        self._jobs = {}
+        self._changed = threading.Condition()
+
+    def _expire(self) -> None:
+        deadline = time.time() - self.ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished"] is not None and job["finished"] < deadline
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(
+        self,
+        recording: Path,
+        output: Path | None = None,
+        options: dict | None = None,
+        upload_dir: Path | None = None,
+    ) -> str:
+        """Start transcribing recording and return the new job's id; upload_dir is removed when it ends."""
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "id": job_id,
+            "input": str(recording),
+            "output": str(output) if output else None,
+            "status": "chunking",
+            "chunks": None,
+            "parts": {},
+            "result": None,
+            "error": None,
+            "finished": None,
+        }
+        with self._changed:
+            self._expire()
+            self._jobs[job_id] = job
+
+        def chunked(count: int) -> None:
+            with self._changed:
+                job["status"] = "transcribing"
+                job["chunks"] = count
+                self._changed.notify_all()
+
+        def chunk_done(index: int, text: str) -> None:
+            with self._changed:
+                job["parts"][index] = text
+                self._changed.notify_all()
+
+        def finished(future: Future) -> None:
+            with self._changed:
+                if future.exception() is not None:
+                    job["status"] = "failed"
+                    job["error"] = str(future.exception())
+                else:
+                    job["status"] = "done"
+                    job["result"] = future.result()
+                job["finished"] = time.time()
+                self._changed.notify_all()
+            if upload_dir is not None:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+
+        self.workers.submit(
+            recording, output, options, on_chunked=chunked, on_chunk=chunk_done,
+        ).add_done_callback(finished)
+        return job_id
+
+    def status(self, job_id: str) -> dict | None:
+        """Everything about a job except its text, or None if there's no such job."""
+        with self._changed:
+            self._expire()
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {
+                **{key: value for key, value in job.items() if key not in ("parts", "result")},
+                "chunks_done": len(job["parts"]),
+            }
+
+    def result(self, job_id: str) -> str | None:
+        with self._changed:
+            job = self._jobs.get(job_id)
+            return job["result"] if job is not None else None
+
+    def iter_transcript(self, job_id: str) -> Iterator[str]:
+        """Yield a job's chunk transcripts in order as they finish, until the job is over."""
+        with self._changed:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return
+        index = 0
+        while True:
+            with self._changed:
+                self._changed.wait_for(
+                    lambda: index in job["parts"] or job["status"] in ("done", "failed")
+                )
+                text = job["parts"].get(index)
+                if text is None:
+                    return
+            yield text
+            index += 1
+
+
+def validate_job_options(options: dict) -> None:
+    """Raise ValueError unless per-job options hold values the matching CLI flags would accept."""
+    if options["model"] not in TRANSCRIBE_MODELS:
+        raise ValueError(f"model must be one of: {', '.join(TRANSCRIBE_MODELS)}")
+    for name in ("format_conversation", "diarize", "single_pass"):
+        if not isinstance(options[name], bool):
+            raise ValueError(f"{name} must be true or false")
+    if options["upload_profile"] is not None and options["upload_profile"] not in UPLOAD_PROFILES:
+        raise ValueError(f"upload_profile must be null or one of: {', '.join(sorted(UPLOAD_PROFILES))}")
+    if type(options["min_silence_len"]) is not int or options["min_silence_len"] <= 0:
+        raise ValueError("min_silence_len must be a positive number of milliseconds")
+    if type(options["silence_thresh"]) not in (int, float):
+        raise ValueError("silence_thresh must be a number of dBFS")
+    for name in ("batch_tokens", "output_tokens"):
+        if type(options[name]) is not int or options[name] <= 0:
+            raise ValueError(f"{name} must be a positive number of tokens")
+    trim_silence = options["trim_silence"]
+    if trim_silence is not None and (type(trim_silence) not in (int, float) or trim_silence * 1000 <= TRIM_GAP_MS):
+        raise ValueError(f"trim_silence must be null or a number of seconds above {TRIM_GAP_MS / 1000:g}")
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP API of the transcription server.
+
+    POST /jobs                  Submit a recording: a JSON body {"input": path,
+                                "output": path (optional), ...job options}, or the
+                                audio itself as the body with ?filename=name.m4a.
+                                Outputs must be inside the server's output_dir.
+    GET  /jobs/<id>             Job status as JSON
+    GET  /jobs/<id>/transcript  Finished chunks as plain text, streamed until the job ends
+    GET  /jobs/<id>/result      The whole transcript once the job is done
+    """
+
+    server_version = "mindwork-transcribe"
+
+    @property
+    def jobs(self) -> TranscriptionJobs:
+        return self.server.jobs
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def send_json(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_text(self, text: str) -> None:
+        body = text.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/jobs":
+            self.send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        if self.headers.get_content_type() != "application/json":
+            filename = Path(parse_qs(url.query).get("filename", ["upload.m4a"])[0]).name
+            upload_dir = Path(tempfile.mkdtemp(prefix="upload-", dir=self.jobs.workers.temp_dir))
+            recording = upload_dir / filename
+            with open(recording, "wb") as f:
+                while length > 0:
+                    block = self.rfile.read(min(length, 1024 * 1024))
+                    if not block:
+                        break
+                    f.write(block)
+                    length -= len(block)
+            job_id = self.jobs.submit(recording, upload_dir=upload_dir)
+            self.send_json(202, self.jobs.status(job_id))
+            return
+
+        try:
+            request = json.loads(self.rfile.read(length))
+            recording = Path(request.pop("input"))
+            output = request.pop("output", None)
+            if output is not None and not isinstance(output, str):
+                raise TypeError("output must be a path")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.send_json(400, {"error": 'expected a JSON object with an "input" path and an optional "output" path'})
+            return
+        if output:
+            output_dir = self.server.output_dir
+            if output_dir is None:
+                self.send_json(403, {"error": "outputs are disabled; start the server with --output-dir"})
+                return
+            # Relative outputs are taken from output_dir; nothing may resolve outside it
+            output = (output_dir / output).resolve()
+            if not output.is_relative_to(output_dir.resolve()):
+                self.send_json(403, {"error": f"output must be inside {output_dir}"})
+                return
+        unknown = set(request) - set(self.jobs.workers.options)
+        if unknown:
+            self.send_json(400, {"error": f"unknown options: {', '.join(sorted(unknown))}"})
+            return
+        options = {**self.jobs.workers.options, **request}
+        try:
+            validate_job_options(options)
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        if not recording.is_file():
+            self.send_json(400, {"error": f"input not found: {recording}"})
+            return
+        job_id = self.jobs.submit(recording, output or None, options)
+        self.send_json(202, self.jobs.status(job_id))
+
+    def do_GET(self):
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        if len(parts) not in (2, 3) or parts[0] != "jobs":
+            self.send_json(404, {"error": "not found"})
+            return
+        status = self.jobs.status(parts[1])
+        if status is None:
+            self.send_json(404, {"error": f"no job {parts[1]}"})
+            return
+
+        if len(parts) == 2:
+            self.send_json(200, status)
+        elif parts[2] == "result":
+            if status["status"] == "done":
+                self.send_text(self.jobs.result(parts[1]))
+            else:
+                self.send_json(409 if status["status"] != "failed" else 500, status)
+        elif parts[2] == "transcript":
+            # No Content-Length: the body ends when the job does and the connection closes
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.end_headers()
+            try:
+                for i, text in enumerate(self.jobs.iter_transcript(parts[1])):
+                    self.wfile.write((("\n\n---\n\n" if i else "") + text).encode())
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        else:
+            self.send_json(404, {"error": "not found"})
+
+
+class UnixHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer listening on a Unix domain socket."""
+
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def create_server(address: str) -> ThreadingHTTPServer:
+    """Listen on a Unix socket path (anything containing a /) or on host:port."""
+    if "/" in address:
+        Path(address).unlink(missing_ok=True)
+        server = UnixHTTPServer(address, JobRequestHandler)
+    else:
+        host, _, port = address.rpartition(":")
+        server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), JobRequestHandler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(args: argparse.Namespace, options: dict) -> None:
+    """
+    Run the transcription server until interrupted.
+
+    All jobs share one set of TranscriptionWorkers, so the OpenAI client and
+    its connection pool, the decode processes and the API thread pools stay
+    warm between requests. options are the defaults for submitted jobs.
+    Jobs can only write transcripts under args.output_dir.
+    """
+    with TranscriptionWorkers(args, options) as workers:
+        server = create_server(args.listen)
+        server.jobs = TranscriptionJobs(workers)
+        server.output_dir = args.output_dir
+        print(f"Serving transcription jobs on {args.listen}; press Ctrl+C to stop", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopping server", flush=True)
+        finally:
+            server.server_close()
+            if server.address_family == socket.AF_UNIX:
+                Path(args.listen).unlink(missing_ok=True)
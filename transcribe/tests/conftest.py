@@ -0,0 +1,66 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from openai import OpenAI
+
+
+class StubOpenAI:
+    """
+    Local stand-in for the OpenAI API.
+
+    Queue (status, headers, body) replies with reply(); each request pops the
+    next one, and once the queue is empty every request gets a 200 with a
+    short transcript. The paths of all requests are kept in requests.
+    """
+
+    def __init__(self):
+        self.replies = []
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def reply(self, status: int, headers: dict | None = None, body: dict | None = None) -> None:
+        with self._lock:
+            self.replies.append((status, headers or {}, body if body is not None else {"error": {"message": "stub"}}))
+
+    def next_reply(self, path: str) -> tuple[int, dict, dict]:
+        with self._lock:
+            self.requests.append(path)
+            if self.replies:
+                return self.replies.pop(0)
+        return 200, {}, {"text": "stub transcript"}
+
+
+@pytest.fixture
+def openai_stub():
+    """A running StubOpenAI and an OpenAI client pointed at it, without SDK retries."""
+    stub = StubOpenAI()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            status, headers, body = stub.next_reply(self.path)
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    stub.client = OpenAI(
+        api_key="test",
+        base_url=f"http://127.0.0.1:{server.server_port}/v1",
+        max_retries=0,
+    )
+    yield stub
+    server.shutdown()
+    server.server_close()
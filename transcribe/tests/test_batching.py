@@ -0,0 +1,82 @@
+import wave
+
+import audio_chunker
+from audio_chunker import (
+    count_tokens, pack_text_units, plan_text_batches, run_transcript_pipeline, split_leftover, split_text_units,
+)
+
+
+def make_turns(count: int) -> str:
+    return "\n\n".join(
+        f"[{'AB'[i % 2]}]: " + " ".join(f"Turn {i} has sentence {j} in it." for j in range(i % 7 + 1))
+        for i in range(count)
+    )
+
+
+def test_batches_stay_within_budget_and_keep_turns_whole():
+    text = make_turns(300)
+    batches = plan_text_batches(text, 500)
+    assert all(count_tokens(batch) <= 500 for batch in batches)
+    assert all(batch.startswith("[") for batch in batches)
+    assert "\n\n".join(batches) == text
+
+
+def test_batches_are_balanced():
+    text = make_turns(300)
+    batches = plan_text_batches(text, 500)
+    sizes = [count_tokens(batch) for batch in batches]
+    assert len(batches) == len(pack_text_units(split_text_units(text, 500), 500))
+    assert min(sizes) > 500 * 0.8
+
+
+def test_long_turns_split_at_sentences_then_words():
+    sentences = " ".join(f"Sentence {i} goes on for a little while." for i in range(200))
+    batches = plan_text_batches(sentences, 300)
+    assert len(batches) > 1
+    assert all(batch.endswith(".") for batch in batches)
+    assert " ".join(batches) == sentences
+
+    words = "word " * 3000
+    batches = plan_text_batches(words, 1000)
+    assert all(count_tokens(batch) <= 1000 for batch in batches)
+    assert " ".join(batches) == words.strip()
+
+
+def test_short_text_is_one_batch():
+    assert plan_text_batches("", 100) == []
+    assert plan_text_batches("[A]: Hello.", 100) == ["[A]: Hello."]
+
+
+def test_short_tail_is_left_over():
+    text = make_turns(40)
+    kept, leftover = split_leftover(text, 500)
+    assert leftover
+    assert count_tokens(leftover) < 250
+    assert leftover.startswith("[")
+    assert f"{kept}\n\n{leftover}" == text
+    assert split_leftover("[A]: Hello.", 500) == ("[A]: Hello.", "")
+
+
+def test_each_chunk_is_split_once(openai_stub, tmp_path, monkeypatch):
+    chunks = []
+    for i in range(12):
+        chunks.append(tmp_path / f"rec_chunk_{i:03d}.wav")
+        with wave.open(str(chunks[-1]), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(16000)
+            f.writeframes(b"\0\0" * 1600)
+    splits = []
+    monkeypatch.setattr(
+        audio_chunker, "split_leftover", lambda text, max_tokens: splits.append(text) or split_leftover(text, max_tokens),
+    )
+    formatted = []
+    monkeypatch.setattr(audio_chunker, "format_conversation", lambda text, *args: formatted.append(text) or text)
+    monkeypatch.setattr(audio_chunker, "translate_text", lambda text, *args: text)
+
+    transcripts = run_transcript_pipeline(
+        openai_stub.client, chunks, "whisper-1", format=True, concurrency=2, gpt_concurrency=1,
+    )
+    assert transcripts == ["stub transcript"] * 12
+    assert len(splits) == 11
+    assert sorted(formatted) == ["stub transcript"] * 12
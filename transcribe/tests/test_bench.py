@@ -0,0 +1,32 @@
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def bench(monkeypatch):
+    monkeypatch.syspath_prepend(str(Path(__file__).resolve().parent.parent / "benchmarks"))
+    import bench
+    return bench
+
+
+@pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="needs ffmpeg and ffprobe")
+def test_run_and_compare(bench, tmp_path, monkeypatch, capsys):
+    results = tmp_path / "results.json"
+    monkeypatch.setattr(sys, "argv", [
+        "bench.py", "run", "--durations", "0.1", "--formats", "wav", "--frame-rate", "16000",
+        "--latency", "0", "--rate-limit", "0", "--cli-args", "", "--output", str(results),
+    ])
+    bench.main()
+    (recording,) = json.loads(results.read_text())["recordings"]
+    assert recording["path"] == "whole_file" and recording["chunks"] == 1
+    assert recording["pipeline"]["returncode"] == 0
+    assert recording["pipeline"]["requests"] == {"/v1/audio/transcriptions": 1}
+
+    monkeypatch.setattr(sys, "argv", ["bench.py", "compare", str(results), str(results)])
+    bench.main()
+    assert "0.1min-wav" in capsys.readouterr().out
+
@@ -0,0 +1,99 @@
+import sys
+import time
+import wave
+
+import pytest
+
+import audio_chunker
+from audio_chunker import FORMAT_PROMPT, TRANSLATE_PROMPT, ResultCache, format_part, transcribe_chunk, translate_part
+
+
+def write_silence(path, seconds: float) -> None:
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\0\0" * int(16000 * seconds))
+
+
+def completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    }
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Make time.time() tick one second per call, so access times never tie."""
+    ticks = iter(range(1, 10**6))
+    monkeypatch.setattr(time, "time", lambda: float(next(ticks)))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = ResultCache(tmp_path, max_bytes=10)
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    assert cache.get("a") == "aaaa"
+    cache.set("c", "cccc")
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("aaaa", None, "cccc")
+
+    # Entries survive reopening, and a value over the cap evicts everything older
+    cache = ResultCache(tmp_path, max_bytes=10)
+    assert cache.get("c") == "cccc"
+    cache.set("d", "d" * 10)
+    assert (cache.get("a"), cache.get("c"), cache.get("d")) == (None, None, "d" * 10)
+
+
+def test_keys_cover_endpoint_model_and_prompt():
+    key = ResultCache.make_key("chat/completions", "gpt-4o", FORMAT_PROMPT, "text")
+    assert key == ResultCache.make_key("chat/completions", "gpt-4o", FORMAT_PROMPT, "text")
+    assert len({
+        key,
+        ResultCache.make_key("chat/completions", "gpt-4o-mini", FORMAT_PROMPT, "text"),
+        ResultCache.make_key("chat/completions", "gpt-4o", TRANSLATE_PROMPT, "text"),
+        ResultCache.make_key("responses", "gpt-4o", FORMAT_PROMPT, "text"),
+    }) == 4
+    assert ResultCache.make_key("ab", "c") != ResultCache.make_key("a", "bc")
+
+
+def test_chunks_are_cached_per_endpoint_and_model(openai_stub, tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    chunk = tmp_path / "rec_chunk_000.wav"
+    write_silence(chunk, 0.1)
+
+    assert transcribe_chunk(openai_stub.client, chunk, "whisper-1", False, cache=cache).text == "stub transcript"
+    transcribe_chunk(openai_stub.client, chunk, "whisper-1", False, cache=cache)
+    assert len(openai_stub.requests) == 1
+    transcribe_chunk(openai_stub.client, chunk, "gpt-4o-transcribe", False, cache=cache)
+    transcribe_chunk(openai_stub.client, chunk, "whisper-1", False, translate=True, cache=cache)
+    assert openai_stub.requests == [
+        "/v1/audio/transcriptions", "/v1/audio/transcriptions", "/v1/audio/translations",
+    ]
+
+    # Formatting and translating the same text are different prompts
+    openai_stub.reply(200, body=completion("**Me:** Merhaba."))
+    openai_stub.reply(200, body=completion("Hello."))
+    assert format_part("merhaba", openai_stub.client, cache) == "**Me:** Merhaba."
+    assert translate_part("merhaba", openai_stub.client, cache) == "Hello."
+    assert format_part("merhaba", openai_stub.client, cache) == "**Me:** Merhaba."
+    assert len(openai_stub.requests) == 5
+
+
+@pytest.mark.parametrize("no_cache", [False, True])
+def test_no_cache_skips_the_cache(openai_stub, tmp_path, monkeypatch, no_cache):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(audio_chunker, "create_client", lambda: openai_stub.client)
+    chunk_dir = tmp_path / "chunks"
+    chunk_dir.mkdir()
+    write_silence(chunk_dir / "rec_chunk_000.wav", 0.1)
+    argv = ["audio_chunker", str(chunk_dir), "--output", str(tmp_path / "out.md"), "--cache-dir", str(tmp_path / "cache")]
+    monkeypatch.setattr(sys, "argv", argv + (["--no-cache"] if no_cache else []))
+
+    audio_chunker.main()
+    audio_chunker.main()
+    assert len(openai_stub.requests) == (2 if no_cache else 1)
+    assert (tmp_path / "cache").exists() != no_cache
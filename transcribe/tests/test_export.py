@@ -0,0 +1,44 @@
+import shutil
+import subprocess
+
+import pytest
+
+from audio_chunker import export_chunks_from_file
+
+pytestmark = pytest.mark.skipif(
+    not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="needs ffmpeg and ffprobe",
+)
+
+
+@pytest.fixture
+def recording(tmp_path):
+    path = tmp_path / "rec.mp3"
+    subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=16000:duration=60",
+            "-ac", "1", "-b:a", "16k", str(path),
+        ],
+        check=True,
+    )
+    return path
+
+
+def test_reencoded_chunks_over_the_limit_are_split(tmp_path, recording):
+    # 30s at 16 kbps is about 60 KB: too big to copy, and re-encoding at 32 kbps makes it worse
+    cuts = []
+    paths = export_chunks_from_file(
+        recording, [(0, 30000), (30000, 60000)], tmp_path / "chunks", "mp3", "rec",
+        encoder_args=["-b:a", "32k"], cuts=cuts, max_bytes=50 * 1024,
+    )
+    assert len(paths) > 2
+    assert [path.name for path in paths] == [f"rec_chunk_{i:03d}.mp3" for i in range(len(paths))]
+    assert all(path.stat().st_size <= 50 * 1024 for path in paths)
+    assert sorted(path.name for path in (tmp_path / "chunks").iterdir()) == [path.name for path in paths]
+    # The cuts still cover the recording end to end
+    assert cuts[0][0] <= 30 and cuts[-1][1] == 60000
+    assert all(end == next_start for (_, end), (next_start, _) in zip(cuts, cuts[1:]))
+
+
+def test_chunk_that_cant_get_small_enough(tmp_path, recording):
+    with pytest.raises(RuntimeError, match="under"):
+        export_chunks_from_file(recording, [(0, 60000)], tmp_path / "chunks", "mp3", "rec", max_bytes=100)
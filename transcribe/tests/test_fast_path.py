@@ -0,0 +1,89 @@
+import shutil
+import wave
+from pathlib import Path
+
+import pytest
+
+from audio_chunker import (
+    MAX_CHUNK_BYTES, MAX_DIARIZE_DURATION_MS, UPLOAD_PROFILES, chunk_audio, fits_upload, get_encoded_bytes_per_ms,
+    get_stream_bytes_per_ms, probe_audio, read_chunk_plan,
+)
+
+needs_ffmpeg = pytest.mark.skipif(
+    not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="needs ffmpeg and ffprobe",
+)
+
+
+def info(size_bytes: int, duration_ms: int, bit_rate: int | None = None) -> dict:
+    return {
+        "duration_ms": duration_ms, "frame_rate": 16000, "channels": 1, "bit_rate": bit_rate, "size_bytes": size_bytes,
+    }
+
+
+def test_fits_upload():
+    assert fits_upload(Path("rec.m4a"), info(MAX_CHUNK_BYTES, 3600 * 1000))
+    assert not fits_upload(Path("rec.m4a"), info(MAX_CHUNK_BYTES + 1, 600 * 1000))
+    assert not fits_upload(Path("rec.aiff"), info(1024, 1000))
+    assert fits_upload(Path("rec.MP3"), info(1024, MAX_DIARIZE_DURATION_MS), diarize=True)
+    assert not fits_upload(Path("rec.mp3"), info(1024, MAX_DIARIZE_DURATION_MS + 1), diarize=True)
+
+
+def test_encoded_rate_is_known_for_pcm_and_constant_bitrate_mp3():
+    assert get_encoded_bytes_per_ms("wav", 16000, 1) == 32
+    assert get_encoded_bytes_per_ms("wav", 44100, 2) == 176.4
+    assert get_encoded_bytes_per_ms("mp3", 16000, 1, UPLOAD_PROFILES["mp3-16k-mono"]["encoder_args"]) == 4
+    assert get_encoded_bytes_per_ms("mp3", 16000, 1) is None
+    assert get_encoded_bytes_per_ms("ogg", 16000, 1, UPLOAD_PROFILES["speech-opus-16k"]["encoder_args"]) is None
+
+
+def test_copied_chunks_follow_the_audio_bitrate():
+    assert get_stream_bytes_per_ms(info(10_000_000, 600 * 1000, bit_rate=64000)) == 8
+    assert get_stream_bytes_per_ms(info(4_800_000, 600 * 1000)) == 8
+
+
+def write_silence(path: Path, seconds: int) -> None:
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\0\0" * 16000 * seconds)
+
+
+@needs_ffmpeg
+def test_probe_reads_bitrate_and_size(tmp_path):
+    path = tmp_path / "rec.wav"
+    write_silence(path, 3)
+    probed = probe_audio(path)
+    assert probed["bit_rate"] == 256000
+    assert probed["size_bytes"] == path.stat().st_size
+    assert probed["duration_ms"] == 3000
+
+
+@needs_ffmpeg
+def test_recording_that_fits_is_sent_whole(tmp_path, monkeypatch):
+    path = tmp_path / "rec.wav"
+    write_silence(path, 3)
+
+    def no_decoding(*args, **kwargs):
+        raise AssertionError("decoded a recording that fits in one upload")
+
+    monkeypatch.setattr("audio_chunker.load_audio", no_decoding)
+    monkeypatch.setattr("audio_chunker.read_pcm_blocks", no_decoding)
+    chunk_paths = chunk_audio(path, tmp_path / "chunks")
+
+    assert [p.name for p in chunk_paths] == ["rec_chunk_000.wav"]
+    assert chunk_paths[0].read_bytes() == path.read_bytes()
+    assert read_chunk_plan(tmp_path / "chunks") == {"rec_chunk_000.wav": (0, 3000)}
+
+
+@needs_ffmpeg
+def test_asking_for_re_encoding_skips_the_fast_path(tmp_path):
+    path = tmp_path / "rec.wav"
+    write_silence(path, 3)
+
+    transcoded = chunk_audio(path, tmp_path / "transcoded", upload_profile="mp3-16k-mono")
+    assert [p.name for p in transcoded] == ["rec_chunk_000.mp3"]
+
+    encoded = chunk_audio(path, tmp_path / "encoded", export_mode="encode", encoder_args=["-ac", "1", "-ar", "8000"])
+    assert len(encoded) == 1
+    assert probe_audio(encoded[0])["frame_rate"] == 8000
@@ -0,0 +1,135 @@
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from job_server import TranscriptionJobs, create_server, validate_job_options
+
+OPTIONS = {
+    "model": "whisper-1",
+    "format_conversation": False,
+    "diarize": False,
+    "single_pass": False,
+    "upload_profile": None,
+    "min_silence_len": 500,
+    "silence_thresh": -40,
+    "batch_tokens": 3000,
+    "output_tokens": 8000,
+    "trim_silence": None,
+}
+
+
+class FakeWorkers:
+    """Stands in for TranscriptionWorkers; every recording is transcribed at once."""
+
+    def __init__(self, temp_dir):
+        self.options = OPTIONS
+        self.temp_dir = temp_dir
+        self.submitted = []
+
+    def submit(self, recording, output=None, options=None, on_chunked=None, on_chunk=None):
+        self.submitted.append((recording, output, options))
+        on_chunked(1)
+        on_chunk(0, "transcript")
+        future = Future()
+        future.set_result("transcript")
+        return future
+
+
+@pytest.fixture
+def recording(tmp_path):
+    path = tmp_path / "session.m4a"
+    path.write_bytes(b"audio")
+    return path
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = create_server("127.0.0.1:0")
+    server.jobs = TranscriptionJobs(FakeWorkers(tmp_path))
+    server.output_dir = tmp_path / "vault"
+    server.output_dir.mkdir()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, body: dict) -> tuple[int, dict]:
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port)
+    connection.request("POST", "/jobs", json.dumps(body), {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_outputs_stay_inside_output_dir(server, recording, tmp_path):
+    (server.output_dir / "outside").symlink_to(tmp_path)
+    for output in ("../escaped.md", str(tmp_path / "escaped.md"), "notes/../../escaped.md", "outside/escaped.md"):
+        status, body = post(server, {"input": str(recording), "output": output})
+        assert status == 403, output
+        assert "must be inside" in body["error"]
+    assert server.jobs.workers.submitted == []
+
+    status, body = post(server, {"input": str(recording), "output": "transcriptions/session.md"})
+    assert status == 202
+    assert body["output"] == str((server.output_dir / "transcriptions" / "session.md").resolve())
+
+
+def test_outputs_need_an_output_dir(server, recording):
+    server.output_dir = None
+    status, body = post(server, {"input": str(recording), "output": "session.md"})
+    assert status == 403 and "--output-dir" in body["error"]
+
+    status, body = post(server, {"input": str(recording)})
+    assert status == 202 and body["output"] is None
+
+
+@pytest.mark.parametrize("options", [
+    {"model": "gpt-5"},
+    {"diarize": "yes"},
+    {"format_conversation": 1},
+    {"upload_profile": "flac"},
+    {"min_silence_len": 0},
+    {"min_silence_len": 500.5},
+    {"silence_thresh": "-40"},
+    {"batch_tokens": True},
+    {"output_tokens": 0},
+    {"trim_silence": 1},
+    {"trim_silence": "30"},
+])
+def test_bad_options_are_rejected(server, recording, options):
+    with pytest.raises(ValueError):
+        validate_job_options({**OPTIONS, **options})
+    status, _ = post(server, {"input": str(recording), **options})
+    assert status == 400
+    assert server.jobs.workers.submitted == []
+
+
+def test_unknown_options_and_bad_requests_are_rejected(server, recording):
+    status, body = post(server, {"input": str(recording), "resume": True})
+    assert status == 400 and body["error"] == "unknown options: resume"
+    assert post(server, {"output": "session.md"})[0] == 400
+    assert post(server, {"input": str(recording), "output": 3})[0] == 400
+    assert post(server, {"input": str(recording.with_name("missing.m4a"))})[0] == 400
+
+    status, _ = post(server, {"input": str(recording), "diarize": True, "trim_silence": 30})
+    assert status == 202
+    assert server.jobs.workers.submitted[0][2] == {**OPTIONS, "diarize": True, "trim_silence": 30}
+
+
+def test_finished_jobs_expire(tmp_path, recording, monkeypatch):
+    jobs = TranscriptionJobs(FakeWorkers(tmp_path), ttl=60)
+    job_id = jobs.submit(recording)
+    assert jobs.status(job_id)["status"] == "done"
+    assert list(jobs.iter_transcript(job_id)) == ["transcript"]
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 30)
+    assert jobs.status(job_id) is not None
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert jobs.status(job_id) is None
+    assert jobs.result(job_id) is None
@@ -0,0 +1,133 @@
+import shutil
+import subprocess
+import sys
+import wave
+
+import pytest
+
+import audio_chunker
+from audio_chunker import JobManifest, chunk_audio, open_manifest, read_chunk_plan, run_transcript_pipeline
+
+OPTIONS = {"model": "whisper-1", "format_conversation": True}
+
+
+def write_silence(path, seconds: float) -> None:
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\0\0" * int(16000 * seconds))
+
+
+def completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    }
+
+
+@pytest.fixture
+def chunks(tmp_path):
+    chunk_dir = tmp_path / "chunks"
+    chunk_dir.mkdir()
+    paths = [chunk_dir / f"rec_chunk_{i:03d}.wav" for i in range(2)]
+    for i, path in enumerate(paths):
+        write_silence(path, 0.1 * (i + 1))
+    return paths
+
+
+def test_resume_needs_the_same_recording_and_options(tmp_path, chunks, capsys):
+    recording = tmp_path / "rec.wav"
+    write_silence(recording, 1)
+    output = tmp_path / "out.md"
+    manifest = open_manifest(output, recording, OPTIONS, resume=False)
+    manifest.set_chunks(chunks, {chunks[0].name: (0, 100), chunks[1].name: (100, 300)})
+    manifest.complete(0, "transcribed", "hello")
+
+    assert open_manifest(output, recording, OPTIONS, resume=True).result(0, "transcribed") == "hello"
+    assert open_manifest(output, recording, {**OPTIONS, "model": "gpt-4o-transcribe"}, resume=True).data["chunks"] == []
+
+    write_silence(recording, 2)
+    resumed = open_manifest(output, recording, OPTIONS, resume=True)
+    assert resumed.data["chunks"] == [] and resumed.chunk_plan is None
+    assert "written for a different recording" in capsys.readouterr().out
+
+
+def test_changed_chunks_lose_their_stages(tmp_path, chunks):
+    manifest = JobManifest.create(tmp_path / "out.md.manifest.json", chunks[0].parent, OPTIONS)
+    manifest.set_chunks(chunks, {})
+    manifest.complete(0, "transcribed", "zero")
+    manifest.complete(1, "transcribed", "one")
+
+    write_silence(chunks[1], 0.5)
+    manifest = JobManifest.load(manifest.path)
+    manifest.set_chunks(chunks, {})
+    assert (manifest.result(0, "transcribed"), manifest.result(1, "transcribed")) == ("zero", None)
+
+
+def test_resume_redoes_only_missing_stages(openai_stub, tmp_path, chunks):
+    manifest = JobManifest.create(tmp_path / "out.md.manifest.json", chunks[0].parent, OPTIONS)
+    manifest.set_chunks(chunks, {})
+    for stage, result in (("transcribed", "merhaba"), ("formatted", "**Me:** Merhaba."), ("translated", "**Me:** Hello.")):
+        manifest.complete(0, stage, result)
+    manifest.complete(1, "transcribed", "güle güle")
+    openai_stub.reply(200, body=completion("**Me:** Güle güle."))
+    openai_stub.reply(200, body=completion("**Me:** Goodbye."))
+
+    transcripts = run_transcript_pipeline(
+        openai_stub.client, chunks, "whisper-1", format=True, manifest=manifest,
+    )
+    assert transcripts == ["**Me:** Hello.", "**Me:** Goodbye."]
+    assert openai_stub.requests == ["/v1/chat/completions"] * 2
+    saved = JobManifest.load(manifest.path)
+    assert saved.result(1, "formatted") == "**Me:** Güle güle."
+    assert saved.result(1, "translated") == "**Me:** Goodbye."
+
+
+def test_main_resumes_and_removes_the_manifest(openai_stub, tmp_path, chunks, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(audio_chunker, "create_client", lambda: openai_stub.client)
+    output = tmp_path / "out.md"
+    argv = ["audio_chunker", str(chunks[0].parent), "--output", str(output), "--no-cache", "--concurrency", "1"]
+    openai_stub.reply(200, body={"text": "zero"})
+    openai_stub.reply(400, body={"error": {"message": "bad chunk"}})
+    monkeypatch.setattr(sys, "argv", argv)
+    with pytest.raises(Exception):
+        audio_chunker.main()
+    manifest = JobManifest.load(JobManifest.path_for(output))
+    assert [chunk["stages"] for chunk in manifest.data["chunks"]] == [{"transcribed": "zero"}, {}]
+
+    openai_stub.requests.clear()
+    openai_stub.reply(200, body={"text": "one"})
+    monkeypatch.setattr(sys, "argv", argv + ["--resume"])
+    audio_chunker.main()
+    assert openai_stub.requests == ["/v1/audio/transcriptions"]
+    assert output.read_text() == "zero\n\n---\n\none"
+    assert not JobManifest.path_for(output).exists()
+
+
+@pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="needs ffmpeg and ffprobe")
+def test_saved_plan_cuts_the_same_chunks(tmp_path):
+    # 25 minutes of 8s tones and 2s pauses: too long for one diarized upload
+    recording = tmp_path / "rec.mp3"
+    subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=16000:duration=1500",
+            "-af", "volume='if(lt(mod(t,10),8),1,0)':eval=frame", "-ac", "1", "-b:a", "16k", str(recording),
+        ],
+        check=True,
+    )
+    first = chunk_audio(recording, tmp_path / "first", diarize=True)
+    assert len(first) > 1
+    manifest = JobManifest.create(tmp_path / "out.md.manifest.json", recording, OPTIONS)
+    manifest.set_chunks(first, read_chunk_plan(tmp_path / "first"))
+
+    again = chunk_audio(
+        recording, tmp_path / "again", diarize=True, chunks=JobManifest.load(manifest.path).chunk_plan,
+    )
+    assert [path.name for path in again] == [path.name for path in first]
+    assert [path.read_bytes() for path in again] == [path.read_bytes() for path in first]
+    assert read_chunk_plan(tmp_path / "again") == read_chunk_plan(tmp_path / "first")
@@ -0,0 +1,108 @@
+import json
+import threading
+import wave
+
+import pytest
+
+import audio_chunker
+from audio_chunker import RunMetrics, call_with_retries, transcribe_chunk
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = RunMetrics()
+    recorder.enable(input="session.m4a")
+    monkeypatch.setattr(audio_chunker, "metrics", recorder)
+    return recorder
+
+
+def test_disabled_records_nothing():
+    recorder = RunMetrics()
+    with recorder.span("decode"):
+        recorder.add(bytes_read=10)
+    assert recorder.spans == []
+
+
+def test_spans_nest_and_collect_counters(recorder):
+    with recorder.span("export", file="a.m4a"):
+        recorder.add(bytes_written=100)
+        with recorder.span("transcription"):
+            recorder.add(retries=1)
+            recorder.add(retries=1)
+        recorder.add(bytes_written=50)
+    recorder.add(bytes_written=1)  # no open span: ignored
+
+    inner, outer = recorder.spans
+    assert outer["name"] == "export" and outer["parent_id"] is None
+    assert outer["attributes"] == {"file": "a.m4a"}
+    assert outer["counters"] == {"bytes_written": 150}
+    assert inner["parent_id"] == outer["id"]
+    assert inner["counters"] == {"retries": 2}
+
+
+def test_spans_are_per_thread(recorder):
+    def work():
+        with recorder.span("transcription"):
+            recorder.add(bytes_uploaded=5)
+
+    with recorder.span("export"):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    transcription = next(span for span in recorder.spans if span["name"] == "transcription")
+    assert transcription["parent_id"] is None
+
+
+def test_errors_are_recorded(recorder):
+    with pytest.raises(ValueError):
+        with recorder.span("decode"):
+            raise ValueError("bad file")
+    assert recorder.spans[0]["error"] == "ValueError: bad file"
+
+
+def test_decorated_functions_get_a_span_per_call(recorder):
+    @recorder.span("formatting", model="gpt-4o")
+    def format_part(text: str) -> str:
+        recorder.add(input_tokens=len(text))
+        return text
+
+    format_part("abc")
+    format_part("de")
+    report = recorder.report()
+    assert report["totals"]["formatting"]["count"] == 2
+    assert report["totals"]["formatting"]["input_tokens"] == 5
+    assert [span["attributes"] for span in report["spans"]] == [{"model": "gpt-4o"}] * 2
+
+
+def test_retries_uploads_and_usage_are_counted(recorder, openai_stub, tmp_path):
+    chunk = tmp_path / "chunk.wav"
+    with wave.open(str(chunk), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\0\0" * 1600)
+    openai_stub.reply(429, {"retry-after-ms": "10"})
+    openai_stub.reply(200, body={"text": "hi", "usage": {"type": "tokens", "input_tokens": 12, "output_tokens": 3}})
+
+    with recorder.span("transcription"):
+        call_with_retries(transcribe_chunk, openai_stub.client, chunk, "gpt-4o-transcribe", False)
+    counters = recorder.spans[0]["counters"]
+    assert counters["retries"] == 1
+    assert counters["bytes_uploaded"] == 2 * chunk.stat().st_size
+    assert counters["input_tokens"] == 12 and counters["output_tokens"] == 3
+
+
+def test_otlp_output(recorder, tmp_path):
+    with recorder.span("decode", file="session.m4a"):
+        recorder.add(bytes_read=1024)
+    path = tmp_path / "metrics.json"
+    recorder.write(path, "otlp")
+
+    spans = json.loads(path.read_text())["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root, decode = spans
+    assert root["name"] == "run" and "parentSpanId" not in root
+    assert decode["parentSpanId"] == root["spanId"]
+    assert decode["traceId"] == root["traceId"] and len(root["traceId"]) == 32
+    attributes = {a["key"]: a["value"] for a in decode["attributes"]}
+    assert attributes["file"] == {"stringValue": "session.m4a"}
+    assert attributes["bytes_read"] == {"intValue": "1024"}
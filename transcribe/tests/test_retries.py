@@ -0,0 +1,94 @@
+import time
+import wave
+from email.utils import formatdate
+
+import pytest
+from openai import APIConnectionError, APIStatusError, OpenAI
+
+import audio_chunker
+from audio_chunker import call_with_retries, get_retry_delay, transcribe_chunk
+
+
+@pytest.fixture
+def chunk(tmp_path):
+    path = tmp_path / "chunk.wav"
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\0\0" * 1600)
+    return path
+
+
+def api_error(stub, status: int, headers: dict | None = None) -> APIStatusError:
+    """Let the stub fail one request and return the error the SDK raised for it."""
+    stub.reply(status, headers)
+    with pytest.raises(APIStatusError) as raised:
+        stub.client.audio.transcriptions.create(model="whisper-1", file=b"audio")
+    return raised.value
+
+
+def test_retry_after_seconds(openai_stub):
+    assert get_retry_delay(api_error(openai_stub, 429, {"Retry-After": "3"}), 0) == 3.0
+
+
+def test_retry_after_ms_takes_precedence(openai_stub):
+    error = api_error(openai_stub, 429, {"Retry-After": "3", "retry-after-ms": "250"})
+    assert get_retry_delay(error, 0) == 0.25
+
+
+def test_retry_after_http_date(openai_stub):
+    error = api_error(openai_stub, 503, {"Retry-After": formatdate(time.time() + 30, usegmt=True)})
+    assert 28 <= get_retry_delay(error, 0) <= 30
+
+
+def test_retry_after_http_date_in_the_past(openai_stub):
+    error = api_error(openai_stub, 429, {"Retry-After": formatdate(time.time() - 30, usegmt=True)})
+    assert get_retry_delay(error, 0) == 0
+
+
+def test_unparseable_retry_after_falls_back_to_backoff(openai_stub):
+    error = api_error(openai_stub, 429, {"Retry-After": "soon"})
+    assert 0 <= get_retry_delay(error, 2) <= audio_chunker.RETRY_BASE_DELAY * 4
+
+
+def test_server_errors_back_off_exponentially(openai_stub):
+    error = api_error(openai_stub, 500)
+    for attempt in range(10):
+        limit = min(audio_chunker.RETRY_MAX_DELAY, audio_chunker.RETRY_BASE_DELAY * 2 ** attempt)
+        assert 0 <= get_retry_delay(error, attempt) <= limit
+
+
+def test_client_errors_are_not_retried(openai_stub):
+    assert get_retry_delay(api_error(openai_stub, 400), 0) is None
+    assert get_retry_delay(ValueError("bad"), 0) is None
+
+
+def test_connection_errors_are_retried():
+    client = OpenAI(api_key="test", base_url="http://127.0.0.1:9/v1", max_retries=0)
+    with pytest.raises(APIConnectionError) as raised:
+        client.audio.transcriptions.create(model="whisper-1", file=b"audio")
+    assert get_retry_delay(raised.value, 0) is not None
+
+
+def test_call_with_retries_waits_out_rate_limits(openai_stub, chunk):
+    openai_stub.reply(429, {"retry-after-ms": "10"})
+    openai_stub.reply(502, {"retry-after-ms": "10"})
+    response = call_with_retries(transcribe_chunk, openai_stub.client, chunk, "whisper-1", False)
+    assert response.text == "stub transcript"
+    assert len(openai_stub.requests) == 3
+
+
+def test_call_with_retries_gives_up(openai_stub, chunk):
+    for _ in range(3):
+        openai_stub.reply(429, {"retry-after-ms": "10"})
+    with pytest.raises(APIStatusError):
+        call_with_retries(transcribe_chunk, openai_stub.client, chunk, "whisper-1", False, max_retries=2)
+    assert len(openai_stub.requests) == 3
+
+
+def test_call_with_retries_raises_client_errors_at_once(openai_stub, chunk):
+    openai_stub.reply(401)
+    with pytest.raises(APIStatusError):
+        call_with_retries(transcribe_chunk, openai_stub.client, chunk, "whisper-1", False)
+    assert len(openai_stub.requests) == 1
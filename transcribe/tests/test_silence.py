@@ -0,0 +1,111 @@
+import shutil
+import wave
+
+import numpy as np
+import pytest
+from pydub import AudioSegment
+from pydub.silence import detect_silence
+
+from audio_chunker import (
+    ParallelSilenceDetector, StreamingSilenceDetector, detect_silence_ranges, get_ms_energies, get_ms_rms,
+    probe_audio, stream_silent_ranges,
+)
+
+
+def make_audio(frame_rate: int, channels: int, seconds: float, seed: int = 0) -> AudioSegment:
+    """Noise bursts separated by pauses of varying length, some quiet but not silent."""
+    rng = np.random.default_rng(seed)
+    frames = int(frame_rate * seconds)
+    samples = np.zeros((frames, channels), dtype=np.int16)
+    position = 0
+    while position < frames:
+        burst = int(frame_rate * rng.uniform(0.1, 1.5))
+        samples[position:position + burst] = rng.integers(-8000, 8000, size=(min(burst, frames - position), channels))
+        position += burst
+        pause = int(frame_rate * rng.uniform(0.05, 1.2))
+        # Some pauses carry low-level noise close to the -40 dBFS threshold
+        level = rng.choice([0, 200, 400])
+        if level:
+            samples[position:position + pause] = rng.integers(-level, level, size=(min(pause, max(frames - position, 0)), channels))
+        position += pause
+    return AudioSegment(samples.tobytes(), frame_rate=frame_rate, sample_width=2, channels=channels)
+
+
+def stream_silence(audio: AudioSegment, block_frames: int, **kwargs) -> tuple[list, StreamingSilenceDetector]:
+    detector = StreamingSilenceDetector(audio.frame_rate, audio.channels, record=True, **kwargs)
+    samples = np.frombuffer(audio.raw_data, dtype=np.int16)
+    step = block_frames * audio.channels
+    ranges = []
+    for start in range(0, len(samples), step):
+        ranges += detector.feed(samples[start:start + step])
+    ranges += detector.finish()
+    return ranges, detector
+
+
+def test_matches_pydub():
+    audio = make_audio(16000, 1, 4)
+    energies, counts = get_ms_energies(audio)
+    expected = [tuple(r) for r in detect_silence(audio, min_silence_len=500, silence_thresh=-40, seek_step=1)]
+    assert detect_silence_ranges(energies, counts, audio.sample_width) == expected
+    assert stream_silence(audio, 1600)[0] == expected
+
+
+@pytest.mark.parametrize("frame_rate, channels", [(16000, 1), (44100, 2), (22050, 1)])
+@pytest.mark.parametrize("block_frames", [1000, 4410, 16000, 100003])
+def test_streaming_matches_batch(frame_rate, channels, block_frames):
+    audio = make_audio(frame_rate, channels, 30, seed=frame_rate + channels)
+    energies, counts = get_ms_energies(audio)
+    expected = detect_silence_ranges(energies, counts, audio.sample_width)
+    assert expected
+
+    ranges, detector = stream_silence(audio, block_frames)
+    assert ranges == expected
+    assert detector.silent_ranges == expected
+    assert detector.duration_ms == len(audio)
+    np.testing.assert_array_equal(detector.rms, get_ms_rms(energies, counts, audio.sample_width))
+
+
+@pytest.mark.parametrize("min_silence_len, silence_thresh", [(200, -40), (1000, -40), (500, -30), (500, -50)])
+def test_streaming_matches_batch_with_other_parameters(min_silence_len, silence_thresh):
+    audio = make_audio(16000, 1, 20, seed=7)
+    energies, counts = get_ms_energies(audio)
+    expected = detect_silence_ranges(
+        energies, counts, audio.sample_width, min_silence_len=min_silence_len, silence_thresh=silence_thresh,
+    )
+    ranges, _ = stream_silence(audio, 3000, min_silence_len=min_silence_len, silence_thresh=silence_thresh)
+    assert ranges == expected
+
+
+def test_trailing_silence_and_all_silent_audio():
+    silent = AudioSegment.silent(duration=2300, frame_rate=16000)
+    energies, counts = get_ms_energies(silent)
+    assert detect_silence_ranges(energies, counts, silent.sample_width) == [(0, 2300)]
+    assert stream_silence(silent, 777)[0] == [(0, 2300)]
+
+    audio = make_audio(16000, 1, 3) + silent
+    energies, counts = get_ms_energies(audio)
+    expected = detect_silence_ranges(energies, counts, audio.sample_width)
+    assert expected[-1][1] == len(audio)
+    assert stream_silence(audio, 777)[0] == expected
+
+
+@pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="needs ffmpeg and ffprobe")
+@pytest.mark.parametrize("frame_rate, channels", [(16000, 1), (44100, 2)])
+def test_parallel_windows_match_one_pass(tmp_path, frame_rate, channels):
+    audio = make_audio(frame_rate, channels, 20, seed=3)
+    path = tmp_path / "rec.wav"
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(frame_rate)
+        f.writeframes(audio.raw_data)
+    info = probe_audio(path)
+
+    one_pass = StreamingSilenceDetector(frame_rate, channels, record=True)
+    expected = list(stream_silent_ranges(path, info, one_pass))
+    # 2s windows cut through plenty of pauses
+    parallel = ParallelSilenceDetector(2, record=True, window_ms=2000)
+    assert list(stream_silent_ranges(path, info, parallel)) == expected
+    assert parallel.silent_ranges == one_pass.silent_ranges
+    assert parallel.duration_ms == one_pass.duration_ms == len(audio)
+    np.testing.assert_array_equal(parallel.rms, one_pass.rms)
@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pytest
+from pydub import AudioSegment
+
+from audio_chunker import SilenceMapStore, StreamingSilenceDetector, detect_silence_ranges, get_ms_energies
+
+
+def make_audio(seconds: int, seed: int = 0) -> AudioSegment:
+    """Noise bursts and digital silence of random lengths, so no window sits near the threshold."""
+    rng = np.random.default_rng(seed)
+    pieces = []
+    while sum(len(piece) for piece in pieces) < 16000 * seconds:
+        pieces.append(rng.integers(-8000, 8000, int(16000 * rng.uniform(0.2, 2))))
+        pieces.append(np.zeros(int(16000 * rng.uniform(0.1, 1.5)), dtype=int))
+    samples = np.concatenate(pieces)[:16000 * seconds].astype(np.int16)
+    return AudioSegment(samples.tobytes(), frame_rate=16000, sample_width=2, channels=1)
+
+
+def scan(audio: AudioSegment, **kwargs) -> StreamingSilenceDetector:
+    detector = StreamingSilenceDetector(audio.frame_rate, audio.channels, record=True, **kwargs)
+    detector.feed(np.frombuffer(audio.raw_data, dtype=np.int16))
+    detector.finish()
+    return detector
+
+
+@pytest.fixture
+def audio():
+    return make_audio(30)
+
+
+def test_stored_map_gives_the_silences_of_a_fresh_scan(tmp_path, audio):
+    store = SilenceMapStore(tmp_path)
+    detector = scan(audio)
+    store.save("rec", detector.rms, audio.frame_rate, audio.channels, detector.silent_ranges)
+    assert SilenceMapStore(tmp_path).load("rec") == (detector.silent_ranges, len(audio))
+    assert store.load("other") is None
+
+    # Other parameters are derived from the RMS map, as if the audio had been scanned again
+    energies, counts = get_ms_energies(audio)
+    for min_silence_len, silence_thresh in ((300, -40), (1000, -40), (500, -30)):
+        expected = detect_silence_ranges(energies, counts, 2, min_silence_len, silence_thresh)
+        assert scan(audio, min_silence_len=min_silence_len, silence_thresh=silence_thresh).silent_ranges == expected
+        assert store.load("rec", min_silence_len, silence_thresh) == (expected, len(audio))
+
+
+def test_parameters_have_their_own_ranges(tmp_path, audio):
+    store = SilenceMapStore(tmp_path)
+    detector = scan(audio)
+    store.save("rec", detector.rms, audio.frame_rate, audio.channels, detector.silent_ranges)
+    short = store.load("rec", 200, -40)[0]
+    quiet = store.load("rec", 500, -50)[0]
+    assert short != detector.silent_ranges
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "rec.npz", "rec_200_-40.npy", "rec_500_-40.npy", "rec_500_-50.npy",
+    ]
+    # Stored ranges are read back for their own parameters only
+    assert store.load("rec", 200, -40)[0] == short
+    assert store.load("rec", 500, -50)[0] == quiet
+    assert store.load("rec")[0] == detector.silent_ranges
+    assert SilenceMapStore.make_key("abc") != SilenceMapStore.make_key("abc", "mp3-16k-mono")
+
+
+def test_least_recently_used_maps_are_evicted(tmp_path, audio):
+    detector = scan(audio)
+    store = SilenceMapStore(tmp_path, max_bytes=10**9)
+    for key in ("a", "b"):
+        store.save(key, detector.rms, audio.frame_rate, audio.channels, detector.silent_ranges)
+        os.utime(tmp_path / f"{key}.npz", (1, 1 if key == "a" else 2))
+    store.load("a")  # now the most recently used
+
+    size = sum(path.stat().st_size for path in tmp_path.iterdir())
+    store.max_bytes = size + size // 3
+    store.save("c", detector.rms, audio.frame_rate, audio.channels, detector.silent_ranges)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.npz", "a_500_-40.npy", "c.npz", "c_500_-40.npy"]
+    assert store.load("b") is None
@@ -0,0 +1,102 @@
+import json
+import wave
+
+from audio_chunker import JobManifest, ResultCache, format_translate_part, run_transcript_pipeline
+
+TURNS = [
+    {"speaker": "Therapist", "original": "Bugün nasılsın?", "english": "How are you today?"},
+    {"speaker": "Me", "original": "İyiyim, teşekkürler.", "english": "I'm fine, thanks."},
+]
+
+
+def completion(content: str | None, refusal: str | None = None, finish_reason: str = "stop") -> dict:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [{
+            "index": 0,
+            "finish_reason": finish_reason,
+            "message": {"role": "assistant", "content": content, "refusal": refusal},
+        }],
+    }
+
+
+def test_one_request_gives_both_languages(openai_stub, tmp_path):
+    cache = ResultCache(tmp_path)
+    openai_stub.reply(200, body=completion(json.dumps({"turns": TURNS})))
+
+    formatted, translated = format_translate_part("bugün nasılsın iyiyim teşekkürler", openai_stub.client, cache)
+    assert formatted == "**Therapist:** Bugün nasılsın?\n\n**Me:** İyiyim, teşekkürler."
+    assert translated == "**Therapist:** How are you today?\n\n**Me:** I'm fine, thanks."
+    assert openai_stub.requests == ["/v1/chat/completions"]
+
+    assert format_translate_part("bugün nasılsın iyiyim teşekkürler", openai_stub.client, cache) == (formatted, translated)
+    assert len(openai_stub.requests) == 1
+
+
+def test_refusal_falls_back_to_two_requests(openai_stub):
+    openai_stub.reply(200, body=completion(None, refusal="I can't help with that."))
+    openai_stub.reply(200, body=completion("**Me:** Merhaba."))
+    openai_stub.reply(200, body=completion("**Me:** Hello."))
+
+    assert format_translate_part("merhaba", openai_stub.client) == ("**Me:** Merhaba.", "**Me:** Hello.")
+    assert len(openai_stub.requests) == 3
+
+
+def test_refusal_inside_the_turns_falls_back(openai_stub):
+    refused = [{"speaker": "Me", "original": "Merhaba.", "english": "I'm sorry, but I can't translate this."}]
+    openai_stub.reply(200, body=completion(json.dumps({"turns": refused})))
+    openai_stub.reply(200, body=completion("**Me:** Merhaba."))
+    openai_stub.reply(200, body=completion("**Me:** Hello."))
+
+    assert format_translate_part("merhaba", openai_stub.client) == ("**Me:** Merhaba.", "**Me:** Hello.")
+
+
+def test_malformed_reply_falls_back(openai_stub):
+    openai_stub.reply(200, body=completion("**Me:** not json"))
+    openai_stub.reply(200, body=completion("**Me:** Merhaba."))
+    openai_stub.reply(200, body=completion("**Me:** Hello."))
+
+    assert format_translate_part("merhaba", openai_stub.client)[1] == "**Me:** Hello."
+    assert len(openai_stub.requests) == 3
+
+
+def test_pipeline_records_both_stages(openai_stub, tmp_path):
+    chunk = tmp_path / "rec_chunk_000.wav"
+    with wave.open(str(chunk), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\0\0" * 1600)
+    manifest = JobManifest.create(tmp_path / "out.md.manifest.json", tmp_path, {})
+    manifest.set_chunks([chunk], {})
+    openai_stub.reply(200, body={"text": "bugün nasılsın iyiyim teşekkürler"})
+    openai_stub.reply(200, body=completion(json.dumps({"turns": TURNS})))
+
+    transcripts = run_transcript_pipeline(
+        openai_stub.client, [chunk], "whisper-1", format=True, single_pass=True, manifest=manifest,
+    )
+    assert transcripts == ["**Therapist:** How are you today?\n\n**Me:** I'm fine, thanks."]
+    assert openai_stub.requests == ["/v1/audio/transcriptions", "/v1/chat/completions"]
+    assert manifest.result(0, "formatted") == "**Therapist:** Bugün nasılsın?\n\n**Me:** İyiyim, teşekkürler."
+    assert manifest.result(0, "translated") == transcripts[0]
+
+
+def test_cut_off_reply_is_redone_in_halves_within_the_output_budget(openai_stub, monkeypatch):
+    sent = []
+    create = openai_stub.client.chat.completions.create
+    monkeypatch.setattr(
+        openai_stub.client.chat.completions, "create", lambda **kwargs: sent.append(kwargs) or create(**kwargs),
+    )
+    openai_stub.reply(200, body=completion('{"turns": [', finish_reason="length"))
+    openai_stub.reply(200, body=completion(json.dumps({"turns": TURNS[:1]})))
+    openai_stub.reply(200, body=completion(json.dumps({"turns": TURNS[:1]})))
+
+    formatted, translated = format_translate_part(
+        "Bugün nasılsın?\n\nNasılsın bugün?", openai_stub.client, output_tokens=50,
+    )
+    assert translated == "**Therapist:** How are you today?\n\n**Therapist:** How are you today?"
+    assert [kwargs["max_tokens"] for kwargs in sent] == [50, 50, 50]
+    assert [kwargs["messages"][1]["content"] for kwargs in sent[1:]] == ["Bugün nasılsın?", "Nasılsın bugün?"]
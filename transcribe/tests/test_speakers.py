@@ -0,0 +1,93 @@
+import shutil
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from audio_chunker import SpeakerReconciler, assign_speakers, get_speaker_overlaps, match_speakers
+
+
+def segment(speaker: str, start_s: float, end_s: float) -> dict:
+    return {"start_ms": int(start_s * 1000), "end_ms": int(end_s * 1000), "speaker": speaker, "text": "..."}
+
+
+# A 20s bridge over the cut between a 60s chunk and the next one:
+# bridge 0-20s is the previous chunk's 40-60s, bridge 20-40s the next chunk's 0-20s
+PREVIOUS = [segment("A", 0, 30), segment("B", 30, 50), segment("A", 50, 60)]
+CURRENT = [segment("B", 0, 8), segment("A", 8, 20), segment("B", 20, 60)]
+BRIDGE = [segment("X", 0, 10), segment("Y", 10, 28), segment("X", 28, 40)]
+
+
+def test_bridge_links_speakers_across_the_cut():
+    before = get_speaker_overlaps(PREVIOUS, BRIDGE, 40000, 40000, 60000)
+    after = get_speaker_overlaps(CURRENT, BRIDGE, -20000, 0, 20000)
+    assert before == {("X", "B"): 10000, ("Y", "A"): 10000}
+    assert after == {("Y", "B"): 8000, ("X", "A"): 12000}
+    assert match_speakers(before, after) == {"A": "B", "B": "A"}
+
+
+def test_short_overlaps_are_ignored():
+    before = {("X", "A"): 400}
+    after = {("X", "B"): 5000}
+    assert match_speakers(before, after) == {}
+
+
+def test_each_speaker_is_matched_once():
+    before = {("X", "A"): 9000, ("Y", "A"): 3000}
+    after = {("X", "B"): 9000, ("Y", "C"): 3000}
+    assert match_speakers(before, after) == {"B": "A"}
+
+
+def test_new_speakers_get_the_next_label():
+    speakers = []
+    assert assign_speakers([segment("B", 0, 1), segment("A", 1, 2)], {}, speakers) == {"B": "A", "A": "B"}
+    assert assign_speakers([segment("A", 0, 1), segment("C", 1, 2)], {"A": "A"}, speakers) == {"A": "A", "C": "B"}
+    assert assign_speakers([segment("A", 0, 1), segment("B", 1, 2), segment("C", 2, 3)], {}, speakers) == {
+        "A": "C", "B": "D", "C": "E",
+    }
+    assert speakers == ["A", "B", "C", "D", "E"]
+
+
+def test_one_unmatched_speaker_takes_the_one_unheard_speaker():
+    speakers = ["A", "B"]
+    assert assign_speakers([segment("A", 0, 1), segment("B", 1, 2)], {"B": "A"}, speakers) == {"B": "A", "A": "B"}
+    assert speakers == ["A", "B"]
+
+
+def write_silence(path, seconds: int) -> None:
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\0\0" * 16000 * seconds)
+
+
+def diarized(segments: list[dict]) -> dict:
+    return {
+        "text": "...",
+        "segments": [
+            {"start": s["start_ms"] / 1000, "end": s["end_ms"] / 1000, "speaker": s["speaker"], "text": s["text"]}
+            for s in segments
+        ],
+    }
+
+
+@pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="needs ffmpeg and ffprobe")
+def test_reconciler_relabels_chunks(openai_stub, tmp_path):
+    chunk_paths = [tmp_path / "rec_chunk_000.wav", tmp_path / "rec_chunk_001.wav"]
+    for path in chunk_paths:
+        write_silence(path, 60)
+    openai_stub.reply(200, body=diarized(BRIDGE))
+    segments = {0: PREVIOUS, 1: CURRENT}
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        reconciler = SpeakerReconciler(openai_stub.client, chunk_paths, pool, bridge_ms=20000)
+        try:
+            relabeled = reconciler.relabel(1, segments.get)
+            assert [s["speaker"] for s in reconciler.relabel(0, segments.get)] == ["A", "B", "A"]
+        finally:
+            reconciler.close()
+
+    assert [s["speaker"] for s in relabeled] == ["A", "B", "A"]
+    assert openai_stub.requests == ["/v1/audio/transcriptions"]
+    assert not reconciler.temp_dir.exists()
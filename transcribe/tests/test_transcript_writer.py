@@ -0,0 +1,71 @@
+import io
+import json
+import random
+import threading
+
+from audio_chunker import TranscriptWriter
+
+
+def make_chunks(count: int) -> list[dict]:
+    return [
+        {"file": f"rec_chunk_{i:03d}.mp3", "start_ms": i * 1000, "end_ms": (i + 1) * 1000}
+        for i in range(count)
+    ]
+
+
+def test_stream_writes_chunks_in_order():
+    stream = io.StringIO()
+    writer = TranscriptWriter(make_chunks(4), stream=stream)
+    writer.add(2, "two")
+    writer.add(1, "one")
+    assert stream.getvalue() == ""
+    writer.add(0, "zero")
+    assert [json.loads(line)["chunk"] for line in stream.getvalue().splitlines()] == [0, 1, 2]
+    writer.add(3, "three")
+    writer.close()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["text"] for line in lines] == ["zero", "one", "two", "three"]
+    assert lines[3] == {"chunk": 3, "file": "rec_chunk_003.mp3", "start_ms": 3000, "end_ms": 4000, "text": "three"}
+
+
+def test_output_is_written_through_partial_file(tmp_path):
+    output = tmp_path / "out" / "transcript.md"
+    writer = TranscriptWriter(make_chunks(3), output)
+    writer.add(1, "one")
+    assert writer.partial_path.read_text() == ""
+    writer.add(0, "zero")
+    assert writer.partial_path.read_text() == "zero\n\n---\n\none"
+    assert not output.exists()
+    writer.add(2, "two")
+    writer.close()
+
+    assert output.read_text() == "zero\n\n---\n\none\n\n---\n\ntwo"
+    assert not writer.partial_path.exists()
+
+
+def test_unfinished_output_keeps_partial_file(tmp_path):
+    output = tmp_path / "transcript.md"
+    writer = TranscriptWriter(make_chunks(3), output)
+    writer.add(0, "zero")
+    writer.add(2, "two")
+    writer.close()
+
+    assert not output.exists()
+    assert writer.partial_path.read_text() == "zero"
+
+
+def test_concurrent_chunks_keep_their_order(tmp_path):
+    count = 200
+    order = list(range(count))
+    random.Random(0).shuffle(order)
+    output = tmp_path / "transcript.md"
+    writer = TranscriptWriter(make_chunks(count), output)
+    threads = [threading.Thread(target=writer.add, args=(i, f"chunk {i}")) for i in order]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+
+    assert output.read_text().split("\n\n---\n\n") == [f"chunk {i}" for i in range(count)]
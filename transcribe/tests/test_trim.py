@@ -0,0 +1,100 @@
+import shutil
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from audio_chunker import (
+    chunk_audio, get_chunk_time_map, iter_trimmed_silence, place_segments, read_chunk_plan, read_time_maps,
+    to_source_ms,
+)
+
+
+def trim(silent_ranges: list[tuple[int, int]], min_pause_ms: int = 2000) -> tuple[list, list]:
+    time_map = []
+    return list(iter_trimmed_silence(silent_ranges, min_pause_ms, time_map, gap_ms=1000)), time_map
+
+
+def test_long_pauses_are_cut_to_the_gap():
+    # Speech 0-10s, a 1.5s pause, speech, a 10s pause, speech to 40s
+    ranges, time_map = trim([(10000, 11500), (20000, 30000), (40000, 40000)])
+    assert ranges == [(10000, 11500), (20000, 21000), (31000, 31000)]
+    assert time_map == [(0, 0), (20500, 29500)]
+
+
+def test_dead_air_at_the_ends_is_cut_to_half_the_gap():
+    ranges, time_map = trim([(0, 5000), (10000, 11000), (15000, 25000), (25000, 25000)])
+    assert ranges == [(0, 500), (5500, 6500), (10500, 11000), (11000, 11000)]
+    assert time_map == [(0, 4500), (11000, 25000)]
+
+
+def test_all_silent_audio():
+    ranges, time_map = trim([(0, 8000), (8000, 8000)])
+    assert ranges == [(0, 500), (500, 500)]
+    assert time_map == [(0, 7500)]
+
+
+def test_to_source_ms_at_breakpoints():
+    time_map = [(0, 0), (20500, 29500)]
+    assert to_source_ms(time_map, 0) == 0
+    assert to_source_ms(time_map, 20000) == 20000
+    assert to_source_ms(time_map, 20500) == 29500
+    assert to_source_ms(time_map, 20500, end=True) == 20500
+    assert to_source_ms(time_map, 31000) == 40000
+
+
+def test_chunk_time_map_is_relative_to_the_chunk():
+    time_map = [(0, 4500), (20500, 29500), (50000, 70000)]
+    assert get_chunk_time_map(time_map, 10000, 40000) == [(0, 14500), (10500, 29500)]
+    assert get_chunk_time_map(time_map, 20500, 50000) == [(0, 29500)]
+
+
+def test_segments_are_placed_through_the_time_map():
+    segments = [[
+        {"start_ms": 1000, "end_ms": 9000, "speaker": None, "text": "before"},
+        {"start_ms": 11000, "end_ms": 12000, "speaker": None, "text": "after"},
+    ]]
+    placed = place_segments(
+        segments, [Path("rec_chunk_000.wav")], {"rec_chunk_000.wav": (4500, 40000)},
+        {"rec_chunk_000.wav": [(0, 4500), (10000, 30000)]},
+    )
+    assert [(s["start_ms"], s["end_ms"]) for s in placed] == [(5500, 13500), (31000, 32000)]
+
+
+def write_wav(path: Path, samples: np.ndarray) -> None:
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(samples.astype(np.int16).tobytes())
+
+
+@pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="needs ffmpeg and ffprobe")
+def test_trimmed_chunks_keep_only_speech(tmp_path):
+    # 1s bursts numbered by their amplitude, with 0.3s pauses and a 20s pause after the third
+    rng = np.random.default_rng(0)
+    pieces = []
+    for i in range(6):
+        pieces.append(rng.integers(-1000 * (i + 1), 1000 * (i + 1), 16000))
+        pieces.append(np.zeros(int(16000 * (20 if i == 2 else 0.3)), dtype=int) if i < 5 else np.zeros(0, dtype=int))
+    source = tmp_path / "rec.wav"
+    write_wav(source, np.concatenate(pieces))
+
+    chunk_dir = tmp_path / "chunks"
+    chunk_paths = chunk_audio(source, chunk_dir, stream_threshold_ms=None, trim_silence_ms=2000)
+    assert [path.name for path in chunk_paths] == ["rec_chunk_000.wav"]
+    (time_map,) = read_time_maps(chunk_dir).values()
+    # Silence detection windows blur the pause edges by a few milliseconds
+    assert len(time_map) == 2 and time_map[0] == (0, 0)
+    assert abs(time_map[1][0] - 4100) < 50 and abs(time_map[1][1] - 23100) < 50
+    assert read_chunk_plan(chunk_dir) == {"rec_chunk_000.wav": (0, 27200)}
+
+    # 6s of bursts, 4 short pauses and the long one cut to 1s
+    with wave.open(str(chunk_paths[0])) as f:
+        assert f.getnframes() == 16 * (27200 - (time_map[1][1] - time_map[1][0]))
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    with wave.open(str(source)) as f:
+        original = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    kept = np.concatenate([original[:16 * time_map[1][0]], original[16 * time_map[1][1]:]])
+    np.testing.assert_array_equal(samples, kept)
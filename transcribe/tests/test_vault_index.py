@@ -0,0 +1,135 @@
+import json
+import os
+import sys
+
+import pytest
+
+import vault_index
+from vault_index import VaultIndex, extract_tags, find_documents, parse_document
+
+ANALYSIS = """# Analysis: {name}
+
+**Date**: 2024-03-01
+**Source**: transcriptions/{name}.md
+**Type**: transcript
+
+---
+
+## Summary
+
+Talked about {topic}.
+
+---
+
+## Cognitive Patterns Observed
+
+### Catastrophizing
+- **Evidence**: "If I miss this deadline, everything falls apart"
+
+### **All-or-Nothing Thinking**
+- **Evidence**: "I'm a complete failure"
+
+---
+
+## Emotional Themes
+
+### Primary Emotions
+- **Anxiety**: before the review meeting
+- **Guilt:** about saying no
+
+### Triggers Identified
+- Deadlines: work pressure
+"""
+
+
+def write(path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+@pytest.fixture
+def vault(tmp_path):
+    write(tmp_path / "transcriptions" / "2024-01-15-session-001.md", "**Me:** I keep catastrophizing about work.")
+    write(tmp_path / "transcriptions" / "2024-02-20-session-002.md", "**Me:** The boundary talk went well.")
+    write(
+        tmp_path / "analysis" / "2024-01-15-session-001-analysis.md",
+        ANALYSIS.format(name="2024-01-15-session-001", topic="deadlines and self compassion"),
+    )
+    write(
+        tmp_path / "analysis" / "2024" / "2024-02-20-session-002-analysis.md",
+        ANALYSIS.format(name="2024-02-20-session-002", topic="setting boundaries"),
+    )
+    write(tmp_path / "journals" / "2024-01-16.md", "Not indexed")
+    return tmp_path
+
+
+def open_index(vault) -> VaultIndex:
+    index = VaultIndex(vault / vault_index.INDEX_FILENAME)
+    index.update(find_documents({}, vault), vault)
+    return index
+
+
+def test_tags_come_from_the_analysis_sections():
+    assert extract_tags(ANALYSIS.format(name="x", topic="y")) == {
+        ("pattern", "catastrophizing"), ("pattern", "all-or-nothing thinking"),
+        ("emotion", "anxiety"), ("emotion", "guilt"),
+    }
+
+
+def test_session_and_date_link_transcripts_and_analyses(vault):
+    analysis = vault / "analysis" / "2024-01-15-session-001-analysis.md"
+    meta = parse_document(analysis, "analysis", analysis.read_text())
+    assert (meta["date"], meta["session"], meta["type"]) == ("2024-01-15", "session-001", "transcript")
+    transcript = vault / "transcriptions" / "2024-01-15-session-001.md"
+    assert parse_document(transcript, "transcript", transcript.read_text())["session"] == "session-001"
+
+
+def test_recent_range_and_tags(vault):
+    with open_index(vault) as index:
+        recent = index.documents("analysis", limit=1)
+        assert [r["path"] for r in recent] == ["analysis/2024/2024-02-20-session-002-analysis.md"]
+        assert "pattern:catastrophizing" in recent[0]["tags"]
+
+        january = index.documents(since="2024-01-01", until="2024-01-31")
+        assert sorted(r["path"] for r in january) == [
+            "analysis/2024-01-15-session-001-analysis.md", "transcriptions/2024-01-15-session-001.md",
+        ]
+        assert len(index.documents(tag="Anxiety")) == 2
+
+        counts = index.tag_counts("emotion", by_month=True)
+        assert [(r["month"], r["tag"], r["count"]) for r in counts] == [
+            ("2024-01", "anxiety", 1), ("2024-01", "guilt", 1), ("2024-02", "anxiety", 1), ("2024-02", "guilt", 1),
+        ]
+
+
+def test_search_stems_and_survives_bad_syntax(vault):
+    with open_index(vault) as index:
+        results = index.search("catastrophize", kind="transcript")
+        assert [r["path"] for r in results] == ["transcriptions/2024-01-15-session-001.md"]
+        assert "[catastrophizing]" in results[0]["snippet"]
+        assert [r["path"] for r in index.search("boundary", since="2024-02-01")][0].endswith("session-002.md")
+        assert index.search("self-compassion AND (") != []
+
+
+def test_update_is_incremental(vault):
+    with open_index(vault) as index:
+        transcript = vault / "transcriptions" / "2024-01-15-session-001.md"
+        stat = transcript.stat()
+        os.utime(transcript, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert index.update(find_documents({}, vault), vault) == (0, 0)
+
+        transcript.write_text("**Me:** Mindfulness helped this week.")
+        (vault / "transcriptions" / "2024-02-20-session-002.md").unlink()
+        assert index.update(find_documents({}, vault), vault) == (1, 1)
+        assert [r["path"] for r in index.search("mindfulness")] == ["transcriptions/2024-01-15-session-001.md"]
+        assert index.search("catastrophizing", kind="transcript") == []
+
+
+def test_cli_recent_uses_context_count(vault, monkeypatch, capsys):
+    write(vault / "mindwork.yaml", "vault: .\npreferences:\n  context_count: 1\n")
+    monkeypatch.setattr(
+        sys, "argv", ["vault_index", "--config", str(vault / "mindwork.yaml"), "--json", "recent", "--kind", "analysis"],
+    )
+    vault_index.main()
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["session"] for line in lines] == ["session-002"]
@@ -0,0 +1,60 @@
+import sqlite3
+from argparse import Namespace
+
+import pytest
+
+import vault_watch
+
+
+class FailingWorkers:
+    """Stands in for TranscriptionWorkers; every submit fails the way a vanished recording would."""
+
+    def __init__(self, args, options):
+        self.submitted = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def submit(self, recording, output):
+        self.submitted.append(recording)
+        raise FileNotFoundError(f"No such file: {recording}")
+
+
+@pytest.fixture
+def vault(tmp_path):
+    (tmp_path / "recordings").mkdir()
+    (tmp_path / "recordings" / "session-001.m4a").write_bytes(b"audio")
+    (tmp_path / "mindwork.yaml").write_text("vault: .\n")
+    return tmp_path
+
+
+def test_watch_survives_vanishing_and_failing_recordings(vault, monkeypatch, capsys):
+    recording = vault / "recordings" / "session-001.m4a"
+    output = vault / "transcriptions" / "session-001.md"
+    # The sync client renamed this one between the scan and the stat
+    vanished = vault / "recordings" / "session-002.m4a.tmp"
+    monkeypatch.setattr(
+        vault_watch, "find_untranscribed_recordings",
+        lambda config, vault: [(vanished, vault / "transcriptions" / "x.md"), (recording, output)],
+    )
+    monkeypatch.setattr(vault_watch, "TranscriptionWorkers", FailingWorkers)
+    waits = []
+
+    def wait(self, timeout):
+        waits.append(timeout)
+        if len(waits) == 3:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(vault_watch.DirectoryWatcher, "wait", wait)
+    args = Namespace(config=vault / "mindwork.yaml", cache_dir=vault / "cache", settle=0, jobs=1, concurrency=1)
+    vault_watch.watch_vault(args, {})
+
+    assert len(waits) == 3
+    rows = sqlite3.connect(vault / "cache" / "watch-queue.sqlite3").execute(
+        "SELECT recording, status, error FROM queue"
+    ).fetchall()
+    assert rows == [(str(recording), "failed", f"No such file: {recording}")]
+    assert "Error: session-001.m4a failed" in capsys.readouterr().err
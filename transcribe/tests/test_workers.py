@@ -0,0 +1,60 @@
+import threading
+import wave
+from argparse import Namespace
+
+import audio_chunker
+from audio_chunker import JobManifest, SilenceMapStore, TranscriptionWorkers
+
+OPTIONS = {
+    "model": "whisper-1",
+    "format_conversation": False,
+    "diarize": False,
+    "single_pass": False,
+    "upload_profile": None,
+    "min_silence_len": 500,
+    "silence_thresh": -40,
+    "batch_tokens": 4000,
+    "output_tokens": 16384,
+    "trim_silence": None,
+}
+
+
+def test_recordings_are_hashed_once_off_the_callers_thread(openai_stub, tmp_path, monkeypatch):
+    recording = tmp_path / "session.wav"
+    with wave.open(str(recording), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\0\0" * 1600)
+    output = tmp_path / "session.md"
+    monkeypatch.setattr(audio_chunker, "create_client", lambda: openai_stub.client)
+    hashed = []
+    release = threading.Event()
+    hash_file = audio_chunker.hash_file
+
+    def slow_hash(path):
+        if path == recording:
+            hashed.append(threading.current_thread())
+            release.wait(10)
+        return hash_file(path)
+
+    monkeypatch.setattr(audio_chunker, "hash_file", slow_hash)
+    args = Namespace(
+        no_cache=False, cache_dir=tmp_path / "cache", jobs=1, concurrency=1, gpt_concurrency=1,
+        keep_chunks=False, resume=False, stream_threshold=30, export_mode="copy",
+    )
+    with TranscriptionWorkers(args, OPTIONS) as workers:
+        chunk_audio = []
+        submit = workers._decode_pool.submit
+        monkeypatch.setattr(
+            workers._decode_pool, "submit", lambda *a, **kwargs: chunk_audio.append(kwargs) or submit(*a, **kwargs),
+        )
+        done = workers.submit(recording, output)
+        assert not done.done()
+        release.set()
+        assert done.result(timeout=60) == "stub transcript"
+
+    assert len(hashed) == 1 and hashed[0] is not threading.current_thread()
+    assert chunk_audio[0]["silence_key"] == SilenceMapStore.make_key(hash_file(recording))
+    assert output.read_text() == "stub transcript"
+    assert not JobManifest.path_for(output).exists()
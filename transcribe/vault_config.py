@@ -0,0 +1,38 @@
+"""
+mindwork.yaml loading shared by the transcription tools
+
+Kept apart from audio_chunker so tools that only read the vault (the
+index CLI) start without importing the audio and OpenAI dependencies.
+"""
+
+from pathlib import Path
+
+import yaml
+
+CONFIG_LOCATIONS = [  # mindwork.yaml lookup order, same as the skills
+    Path("mindwork.yaml"),
+    Path("~/.config/mindwork/config.yaml"),
+    Path("~/.mindwork.yaml"),
+]
+
+
+def load_config(path: Path | None = None) -> tuple[dict, Path]:
+    """Read mindwork.yaml from path, or from the first of CONFIG_LOCATIONS that exists."""
+    for candidate in [path] if path is not None else CONFIG_LOCATIONS:
+        candidate = candidate.expanduser()
+        if candidate.is_file():
+            return yaml.safe_load(candidate.read_text()) or {}, candidate
+    searched = path or ", ".join(str(location) for location in CONFIG_LOCATIONS)
+    raise FileNotFoundError(f"No mindwork config found (looked for {searched})")
+
+
+def resolve_vault_path(base: Path, path: str) -> Path:
+    """Resolve a config path against base; ~ and absolute paths are used as they are."""
+    return base / Path(path).expanduser()
+
+
+def get_transcription_dirs(config: dict, vault: Path) -> list[Path]:
+    """Where transcripts are written and where earlier ones may already live."""
+    output_dir = resolve_vault_path(vault, config.get("outputs", {}).get("transcriptions", "transcriptions/"))
+    sources = config.get("sources", {}).get("transcriptions", {}).get("paths", [])
+    return [output_dir] + [resolve_vault_path(vault, path) for path in sources]
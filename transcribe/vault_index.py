@@ -0,0 +1,466 @@
+"""
+Search index for the mindwork vault
+
+Keeps transcripts and analyses in a SQLite database with full-text search,
+dates, session names and the pattern/emotion tags of every analysis, so the
+analyze, progress and insights skills can look up recent, dated or matching
+files without re-reading the whole vault. The index is brought up to date
+incrementally before every query.
+
+    mindwork-index recent --kind analysis
+    mindwork-index range --since 2024-01-01 --until 2024-03-31
+    mindwork-index search catastrophizing
+    mindwork-index tags --kind pattern --since 2024-01-01
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from vault_config import get_transcription_dirs, load_config, resolve_vault_path
+
+INDEX_FILENAME = ".mindwork-index.sqlite3"  # Kept in the vault root, next to the files it indexes
+INDEX_VERSION = 1  # Bump when the schema or what is extracted changes; the index is rebuilt
+DOCUMENT_SUFFIXES = {".md", ".txt"}
+SNIPPET_TOKENS = 12  # Words of context around a search hit
+
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def find_documents(config: dict, vault: Path) -> dict[Path, str]:
+    """Map every transcript and analysis file in the vault to its kind ("transcript" or "analysis")."""
+    outputs = config.get("outputs", {})
+    folders = [(directory, "transcript") for directory in get_transcription_dirs(config, vault)]
+    folders.append((resolve_vault_path(vault, outputs.get("analysis", "analysis/")), "analysis"))
+    documents = {}
+    for directory, kind in folders:
+        if directory.is_dir():
+            for path in directory.rglob("*"):
+                if path.suffix.lower() in DOCUMENT_SUFFIXES and path.is_file():
+                    documents.setdefault(path, kind)
+    return documents
+
+
+def normalize_tag(text: str) -> str:
+    """Lower-case a heading or bullet label without markdown emphasis, numbering or trailing punctuation."""
+    text = re.sub(r"[*_`]", "", text)
+    text = re.sub(r"^\d+[.)]\s*", "", text.strip())
+    return re.sub(r"\s+", " ", text).strip(" :.-").lower()
+
+
+def get_sections(text: str, level: int) -> dict[str, str]:
+    """Split markdown into {heading: body} at headings of the given level."""
+    marker = "#" * level
+    sections = {}
+    heading = None
+    lines = []
+    for line in text.splitlines():
+        match = re.match(rf"{marker}\s+(.+?)\s*#*$", line)
+        if match and not line.startswith(marker + "#"):
+            if heading is not None:
+                sections[heading] = "\n".join(lines)
+            heading, lines = normalize_tag(match.group(1)), []
+        elif heading is not None:
+            lines.append(line)
+    if heading is not None:
+        sections[heading] = "\n".join(lines)
+    return sections
+
+
+def extract_tags(text: str) -> set[tuple[str, str]]:
+    """
+    Pattern and emotion tags of an analysis, as (kind, tag) pairs.
+
+    Patterns are the ### headings under "Cognitive Patterns Observed";
+    emotions are the bullet labels under "Emotional Themes" > "Primary
+    Emotions" (see the analyze skill's output format).
+    """
+    sections = get_sections(text, 2)
+    tags = set()
+    for heading in get_sections(sections.get("cognitive patterns observed", ""), 3):
+        tags.add(("pattern", heading))
+    emotions = get_sections(sections.get("emotional themes", ""), 3).get("primary emotions", "")
+    for match in re.finditer(r"^\s*[-*]\s+(.+?)(?::|\s+[-–—]\s|$)", emotions, re.MULTILINE):
+        tags.add(("emotion", normalize_tag(match.group(1))))
+    return {(kind, tag) for kind, tag in tags if tag and not tag.startswith("{")}
+
+
+def get_field(text: str, name: str) -> str | None:
+    """The value of a **Name**: line, as written in analysis headers."""
+    match = re.search(rf"^\*\*{name}\*\*:\s*(.+?)\s*$", text, re.MULTILINE)
+    return match.group(1) if match else None
+
+
+def parse_date(text: str | None) -> str | None:
+    """An ISO date from the start of text (2024-01-15 or 20240115), or None."""
+    match = re.match(r"(\d{4})-?(\d{2})-?(\d{2})", text or "")
+    if not match:
+        return None
+    try:
+        return date(*map(int, match.groups())).isoformat()
+    except ValueError:
+        return None
+
+
+def parse_document(path: Path, kind: str, text: str) -> dict:
+    """
+    Metadata of one vault file: date, session, title, type and tags.
+
+    The date comes from the {date}-{name} file name the skills write, then
+    an analysis's **Date** line, then the file's modification time. The
+    session is the file name without the date and -analysis suffix, so a
+    transcript and its analysis share it.
+    """
+    name = path.stem
+    session = re.sub(r"^\d{4}-?\d{2}-?\d{2}-?", "", name)
+    if kind == "analysis":
+        session = re.sub(r"[-_ ]analysis$", "", session)
+    title = re.search(r"^#\s+(.+?)\s*$", text, re.MULTILINE)
+    doc_date = (
+        parse_date(name)
+        or parse_date(get_field(text, "Date"))
+        or datetime.fromtimestamp(path.stat().st_mtime).date().isoformat()
+    )
+    return {
+        "date": doc_date,
+        "session": session or name,
+        "title": title.group(1) if title else name,
+        "type": get_field(text, "Type") if kind == "analysis" else "transcript",
+        "tags": extract_tags(text) if kind == "analysis" else set(),
+    }
+
+
+class VaultIndex:
+    """
+    SQLite index of the vault's transcripts and analyses, with FTS5 full-text search.
+
+    update() re-reads only files whose size or mtime changed, and re-indexes
+    only those whose content hash changed; files that disappeared are
+    dropped. Paths are stored relative to the vault.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            self._db.executescript(
+                "DROP TABLE IF EXISTS tags; DROP TABLE IF EXISTS documents_fts; DROP TABLE IF EXISTS documents;"
+            )
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, kind TEXT NOT NULL, date TEXT NOT NULL, "
+            "session TEXT NOT NULL, title TEXT NOT NULL, type TEXT, size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, hash TEXT NOT NULL, indexed REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS documents_date ON documents (kind, date);"
+            "CREATE TABLE IF NOT EXISTS tags ("
+            "document INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE, "
+            "kind TEXT NOT NULL, tag TEXT NOT NULL, PRIMARY KEY (document, kind, tag));"
+            "CREATE INDEX IF NOT EXISTS tags_tag ON tags (kind, tag);"
+            # Porter stemming so "catastrophize" finds "catastrophizing"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5 ("
+            "title, body, tokenize = 'porter unicode61 remove_diacritics 2');"
+            f"PRAGMA user_version = {INDEX_VERSION};"
+        )
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "VaultIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def update(self, documents: dict[Path, str], vault: Path) -> tuple[int, int]:
+        """Bring the index in line with documents (see find_documents); return how many files were (re)indexed and removed."""
+        known = {
+            row[0]: row[1:]
+            for row in self._db.execute("SELECT path, id, size, mtime_ns, hash FROM documents")
+        }
+        indexed = 0
+        self._db.execute("BEGIN")
+        try:
+            for path, kind in documents.items():
+                relative = path.relative_to(vault).as_posix() if path.is_relative_to(vault) else str(path)
+                stat = path.stat()
+                row = known.pop(relative, None)
+                if row is not None and row[1:3] == (stat.st_size, stat.st_mtime_ns):
+                    continue
+                digest = file_hash(path)
+                if row is not None and row[3] == digest:
+                    # Touched or synced again, but unchanged
+                    self._db.execute(
+                        "UPDATE documents SET size = ?, mtime_ns = ? WHERE id = ?",
+                        (stat.st_size, stat.st_mtime_ns, row[0]),
+                    )
+                    continue
+                if row is not None:
+                    self._delete(row[0])
+                self._insert(path, relative, kind, stat, digest)
+                indexed += 1
+            for row in known.values():
+                self._delete(row[0])
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return indexed, len(known)
+
+    def _insert(self, path: Path, relative: str, kind: str, stat, digest: str) -> None:
+        text = path.read_text(errors="replace")
+        meta = parse_document(path, kind, text)
+        cursor = self._db.execute(
+            "INSERT INTO documents (path, kind, date, session, title, type, size, mtime_ns, hash, indexed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                relative, kind, meta["date"], meta["session"], meta["title"], meta["type"],
+                stat.st_size, stat.st_mtime_ns, digest, time.time(),
+            ),
+        )
+        document = cursor.lastrowid
+        self._db.execute("INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)", (document, meta["title"], text))
+        self._db.executemany(
+            "INSERT INTO tags (document, kind, tag) VALUES (?, ?, ?)",
+            [(document, tag_kind, tag) for tag_kind, tag in sorted(meta["tags"])],
+        )
+
+    def _delete(self, document: int) -> None:
+        self._db.execute("DELETE FROM documents_fts WHERE rowid = ?", (document,))
+        self._db.execute("DELETE FROM documents WHERE id = ?", (document,))
+
+    def _filters(self, kind: str | None, since: str | None, until: str | None) -> tuple[str, list]:
+        clauses, params = [], []
+        if kind is not None:
+            clauses.append("d.kind = ?")
+            params.append(kind)
+        if since is not None:
+            clauses.append("d.date >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("d.date <= ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _rows(self, sql: str, params: list) -> list[dict]:
+        cursor = self._db.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        results = [dict(zip(columns, row)) for row in cursor]
+        for result in results:
+            result["tags"] = [
+                f"{kind}:{tag}"
+                for kind, tag in self._db.execute(
+                    "SELECT kind, tag FROM tags WHERE document = ? ORDER BY kind, tag", (result.pop("id"),),
+                )
+            ]
+        return results
+
+    def documents(
+        self,
+        kind: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int | None = None,
+        tag: str | None = None,
+    ) -> list[dict]:
+        """Documents in a date range (inclusive ISO dates), newest first; optionally only those with a tag."""
+        where, params = self._filters(kind, since, until)
+        if tag is not None:
+            where += (" AND " if where else " WHERE ") + "d.id IN (SELECT document FROM tags WHERE tag = ?)"
+            params.append(normalize_tag(tag))
+        sql = f"SELECT d.id, d.path, d.kind, d.date, d.session, d.title, d.type FROM documents d{where} ORDER BY d.date DESC, d.path DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._rows(sql, params)
+
+    def search(
+        self,
+        query: str,
+        kind: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 20,
+    ) -> list[dict]:
+        """
+        Full-text search, best matches first, with a snippet around the hit.
+
+        query is FTS5 syntax ("self compassion", boundar*, anxiety NOT work);
+        if it doesn't parse, its words are searched for as they are.
+        """
+        where, params = self._filters(kind, since, until)
+        where = where.replace(" WHERE ", " AND ", 1)
+        sql = (
+            "SELECT d.id, d.path, d.kind, d.date, d.session, d.title, d.type, "
+            f"snippet(documents_fts, 1, '[', ']', '...', {SNIPPET_TOKENS}) AS snippet "
+            "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+            f"WHERE documents_fts MATCH ?{where} ORDER BY bm25(documents_fts) LIMIT ?"
+        )
+        try:
+            return self._rows(sql, [query, *params, limit])
+        except sqlite3.OperationalError:
+            quoted = " ".join('"{}"'.format(word.replace('"', '""')) for word in query.split())
+            return self._rows(sql, [quoted, *params, limit])
+
+    def tag_counts(
+        self,
+        kind: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        by_month: bool = False,
+    ) -> list[dict]:
+        """How many analyses carry each tag, most frequent first, or per month in date order with by_month."""
+        where, params = self._filters(None, since, until)
+        if kind is not None:
+            where += (" AND " if where else " WHERE ") + "t.kind = ?"
+            params.append(kind)
+        month = "substr(d.date, 1, 7)" if by_month else "NULL"
+        order = "month, count DESC, t.tag" if by_month else "count DESC, t.tag"
+        sql = (
+            f"SELECT {month} AS month, t.kind, t.tag, count(*) AS count "
+            f"FROM tags t JOIN documents d ON d.id = t.document{where} "
+            f"GROUP BY month, t.kind, t.tag ORDER BY {order}"
+        )
+        cursor = self._db.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+
+def iso_date(value: str) -> str:
+    """argparse type for YYYY-MM-DD dates."""
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a YYYY-MM-DD date, got {value!r}")
+
+
+def print_documents(results: list[dict], as_json: bool) -> None:
+    for result in results:
+        if as_json:
+            print(json.dumps(result, ensure_ascii=False))
+            continue
+        tags = f"  [{', '.join(result['tags'])}]" if result["tags"] else ""
+        print(f"{result['date']}  {result['kind']:<10}  {result['path']}{tags}")
+        if result.get("snippet"):
+            print(f"    {' '.join(result['snippet'].split())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Index and query the transcripts and analyses in a mindwork vault",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s update
+  %(prog)s recent --kind analysis
+  %(prog)s range --since 2024-01-01 --until 2024-01-31
+  %(prog)s search "self compassion" --kind analysis
+  %(prog)s tags --kind pattern --by-month
+""",
+    )
+    parser.add_argument(
+        "--config",
+        type=Path,
+        help="mindwork.yaml to use (default: ./mindwork.yaml, ~/.config/mindwork/config.yaml, ~/.mindwork.yaml)",
+    )
+    parser.add_argument(
+        "--vault",
+        type=Path,
+        help="Vault directory, overriding the config's (the config is optional with this)",
+    )
+    parser.add_argument(
+        "--index",
+        type=Path,
+        metavar="FILE",
+        help=f"Index database (default: {INDEX_FILENAME} in the vault)",
+    )
+    parser.add_argument(
+        "--no-update",
+        action="store_true",
+        help="Query the index as it is, without checking the vault for changed files first",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON Lines")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("update", help="Index new and changed files and drop deleted ones")
+
+    recent = commands.add_parser("recent", help="The most recent documents")
+    recent.add_argument(
+        "-n", type=int, metavar="N",
+        help="How many (default: preferences.context_count from the config, or 5)",
+    )
+
+    date_range = commands.add_parser("range", help="Documents dated within a range, newest first")
+    date_range.add_argument("--tag", help="Only documents with this pattern or emotion tag")
+
+    search = commands.add_parser("search", help="Full-text search, best matches first")
+    search.add_argument("query", help='Words, "a phrase", prefix* or FTS5 query syntax')
+    search.add_argument("-n", type=int, default=20, metavar="N", help="How many results (default: 20)")
+
+    tags = commands.add_parser("tags", help="How often each pattern and emotion tag appears in analyses")
+    tags.add_argument("--by-month", action="store_true", help="Count per month, for trends")
+
+    for command in (recent, date_range, search, tags):
+        command.add_argument(
+            "--kind",
+            choices=["pattern", "emotion"] if command is tags else ["transcript", "analysis"],
+            help="Only this kind",
+        )
+    for command in (date_range, search, tags):
+        command.add_argument("--since", type=iso_date, metavar="YYYY-MM-DD", help="Dated on or after this day")
+        command.add_argument("--until", type=iso_date, metavar="YYYY-MM-DD", help="Dated on or before this day")
+
+    args = parser.parse_args()
+    if getattr(args, "n", None) is not None and args.n <= 0:
+        parser.error("-n must be a positive number")
+
+    config, config_path = {}, None
+    try:
+        config, config_path = load_config(args.config)
+    except FileNotFoundError as e:
+        if args.vault is None:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    if args.vault is not None:
+        vault = args.vault.expanduser()
+    else:
+        vault = resolve_vault_path(config_path.parent, config.get("vault", "."))
+    if not vault.is_dir():
+        print(f"Error: Vault not found: {vault}", file=sys.stderr)
+        sys.exit(1)
+
+    with VaultIndex(args.index or vault / INDEX_FILENAME) as index:
+        if args.command == "update" or not args.no_update:
+            indexed, removed = index.update(find_documents(config, vault), vault)
+            if args.command == "update":
+                print(f"Indexed {indexed} files, removed {removed}: {index.path}", flush=True)
+                return
+
+        if args.command == "recent":
+            limit = args.n or config.get("preferences", {}).get("context_count") or 5
+            print_documents(index.documents(args.kind, limit=limit), args.json)
+        elif args.command == "range":
+            print_documents(index.documents(args.kind, args.since, args.until, tag=args.tag), args.json)
+        elif args.command == "search":
+            print_documents(index.search(args.query, args.kind, args.since, args.until, args.n), args.json)
+        elif args.command == "tags":
+            for row in index.tag_counts(args.kind, args.since, args.until, args.by_month):
+                if args.json:
+                    print(json.dumps(row, ensure_ascii=False))
+                else:
+                    month = f"{row['month']}  " if args.by_month else ""
+                    print(f"{month}{row['count']:>4}  {row['kind']}:{row['tag']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Watch mode for the audio chunker
+
+Keeps transcribing new recordings as they are synced into the mindwork
+vault, with a persistent work queue so restarts pick up where they left off.
+"""
+
+import argparse
+import ctypes
+import os
+import select
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from audio_chunker import TranscriptionWorkers, find_untranscribed_recordings
+from vault_config import load_config, resolve_vault_path
+
+
+class WorkQueue:
+    """
+    Persistent queue of recordings waiting for transcription, stored in SQLite.
+
+    Each recording is queued once per version of the file (its size and
+    mtime); a failed recording is only retried after it changes, and a
+    running one isn't queued a second time. Items still
+    marked running when the queue is reopened were interrupted and are put
+    back in line.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS queue ("
+            "recording TEXT PRIMARY KEY, output TEXT NOT NULL, signature TEXT NOT NULL, "
+            "status TEXT NOT NULL, error TEXT, updated REAL NOT NULL)"
+        )
+        self._db.execute("UPDATE queue SET status = 'queued' WHERE status = 'running'")
+
+    def put(self, recording: Path, output: Path, signature: str) -> bool:
+        """Queue recording unless it is running or this version of it is already queued or processed."""
+        row = self._db.execute("SELECT signature, status FROM queue WHERE recording = ?", (str(recording),)).fetchone()
+        if row is not None and (row[0] == signature or row[1] == "running"):
+            return False
+        self._db.execute(
+            "INSERT OR REPLACE INTO queue (recording, output, signature, status, error, updated) "
+            "VALUES (?, ?, ?, 'queued', NULL, ?)",
+            (str(recording), str(output), signature, time.time()),
+        )
+        return True
+
+    def take(self) -> tuple[Path, Path] | None:
+        """Mark the oldest queued recording as running and return it with its output path."""
+        row = self._db.execute(
+            "SELECT recording, output FROM queue WHERE status = 'queued' ORDER BY updated LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE queue SET status = 'running', updated = ? WHERE recording = ?", (time.time(), row[0]))
+        return Path(row[0]), Path(row[1])
+
+    def finish(self, recording: Path, error: str | None = None) -> None:
+        """Record that recording was transcribed, or why it failed."""
+        self._db.execute(
+            "UPDATE queue SET status = ?, error = ?, updated = ? WHERE recording = ?",
+            ("failed" if error else "done", error, time.time(), str(recording)),
+        )
+
+
+class DirectoryWatcher:
+    """
+    Wait for changes in a set of directories.
+
+    Uses Linux inotify through libc when it is available; elsewhere, or on
+    file systems without inotify support, wait() just sleeps and callers
+    fall back to polling.
+    """
+
+    EVENTS = 0x2 | 0x8 | 0x80 | 0x100  # IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, directories: list[Path]):
+        self.fd = None
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd < 0:
+            return
+        if not all(libc.inotify_add_watch(fd, bytes(directory), self.EVENTS) >= 0 for directory in directories):
+            os.close(fd)
+            return
+        self.fd = fd
+
+    def wait(self, timeout: float) -> None:
+        """Return after timeout seconds, or sooner if a watched directory changed."""
+        if self.fd is None:
+            time.sleep(timeout)
+            return
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            # Drain the pending events; callers rescan the directories anyway
+            try:
+                while os.read(self.fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def watch_vault(args: argparse.Namespace, options: dict) -> None:
+    """
+    Keep transcribing new recordings as they appear in the vault, until interrupted.
+
+    The recording folders are rescanned whenever inotify reports a change
+    and at least every args.settle seconds. A recording is queued once its
+    size and mtime have stayed the same for args.settle seconds, so files
+    that are still being synced aren't picked up half-written. The queue
+    lives in the cache directory and survives restarts.
+    """
+    config, config_path = load_config(args.config)
+    vault = resolve_vault_path(config_path.parent, config.get("vault", "."))
+    directories = [
+        directory
+        for path in config.get("sources", {}).get("recordings", {}).get("paths", ["recordings/"])
+        if (directory := resolve_vault_path(vault, path)).is_dir()
+    ]
+    if not directories:
+        raise FileNotFoundError(f"No recording folders found in vault {vault}")
+
+    queue = WorkQueue(args.cache_dir / "watch-queue.sqlite3")
+    watcher = DirectoryWatcher(directories)
+    mode = "inotify" if watcher.fd is not None else f"polling every {args.settle:g}s"
+    print(f"Watching {', '.join(str(d) for d in directories)} ({mode}); press Ctrl+C to stop", flush=True)
+
+    growing = {}  # recording -> (signature, monotonic time it was first seen with it)
+    running = {}  # future -> (recording, output)
+    # Enough recordings in flight to keep both the decoders and the API workers busy
+    capacity = max(args.jobs, 1) + max(args.concurrency, 1)
+
+    with TranscriptionWorkers(args, options) as workers:
+        try:
+            while True:
+                now = time.monotonic()
+                for recording, output in find_untranscribed_recordings(config, vault):
+                    try:
+                        stat = recording.stat()
+                    except FileNotFoundError:
+                        # Renamed or deleted by the sync client since the scan
+                        growing.pop(recording, None)
+                        continue
+                    signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+                    seen = growing.get(recording)
+                    if seen is None or seen[0] != signature:
+                        growing[recording] = (signature, now)
+                    elif now - seen[1] >= args.settle:
+                        del growing[recording]
+                        if queue.put(recording, output, signature):
+                            print(f"Queued: {recording.name}", flush=True)
+
+                while len(running) < capacity and (item := queue.take()) is not None:
+                    try:
+                        running[workers.submit(*item)] = item
+                    except Exception as e:
+                        # submit() reads the recording, which may have vanished or become unreadable
+                        print(f"Error: {item[0].name} failed: {e}", file=sys.stderr)
+                        queue.finish(item[0], str(e))
+
+                for future in [future for future in running if future.done()]:
+                    recording, output = running.pop(future)
+                    if future.exception() is not None:
+                        print(f"Error: {recording.name} failed: {future.exception()}", file=sys.stderr)
+                        queue.finish(recording, str(future.exception()))
+                    else:
+                        print(f"Transcript saved to: {output}", flush=True)
+                        queue.finish(recording)
+
+                watcher.wait(args.settle)
+        except KeyboardInterrupt:
+            print("\nStopping; unfinished recordings will be picked up on the next start", flush=True)
+        finally:
+            watcher.close()